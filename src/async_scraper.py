@@ -0,0 +1,182 @@
+import asyncio
+import importlib.util
+import logging
+import os
+import time
+
+import httpx
+
+from dedup import StreamingDedup
+from downloads import CHUNK_SIZE, ImageRejected
+from profiling import timed
+from scraper import SnowboardsScraper
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncSnowboardsScraper(SnowboardsScraper):
+    """基于 httpx.AsyncClient 的异步版本, 页面解析与字段提取API与 SnowboardsScraper 相同
+
+    列表页按顺序获取 (分页结束要看上一页), 解析在线程或解析进程池中进行; 每页的新产品
+    图片作为任务立即开始下载, 与后续页面的获取和解析重叠, 数百个下载在单线程上并发。
+
+    max_connections  连接池总连接数, 也是图片下载的并发上限
+    max_keepalive    空闲时保持的keep-alive连接数
+    keepalive_expiry 空闲连接保持的秒数
+    http2            None时在安装了h2包的情况下启用HTTP/2
+    """
+
+    def __init__(self, *args, max_connections=100, max_keepalive=20, keepalive_expiry=30.0, http2=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_keepalive,
+                                   keepalive_expiry=keepalive_expiry)
+        self.http2 = importlib.util.find_spec('h2') is not None if http2 is None else http2
+        self.concurrency = max_connections
+
+    def client(self):
+        return httpx.AsyncClient(limits=self.limits, http2=self.http2, headers=dict(self.session.headers),
+                                 timeout=httpx.Timeout(20.0), follow_redirects=True)
+
+    async def get_page_async(self, client, page_num=1):
+        """获取页面内容 (缓存、回放和长度检查与 get_page 相同)"""
+        if self.offline:
+            return self.read_replay_page(page_num)
+
+        try:
+            url = self.page_url(page_num)
+            cached = self.read_cache(url)
+            if cached:
+                logger.info(f'📦 使用缓存页面 {page_num}')
+                return cached
+
+            logger.info(f'📄 获取页面 {page_num}')
+            await asyncio.sleep(self.rate_limiter.reserve())
+            response = await client.get(url)
+            response.raise_for_status()
+
+            if len(response.text) < 1000:
+                logger.warning('页面内容过少')
+                return None
+
+            logger.info(f'✅ 成功获取页面 {page_num} ({response.http_version})')
+            self.write_cache(url, response.text)
+            return response.text
+
+        except Exception as e:
+            logger.error(f'❌ 获取页面失败: {e}')
+            return None
+
+    async def parse_async(self, html, pool=None):
+        """在线程 (或解析进程池) 中解析, 不阻塞事件循环上的图片下载
+
+        parse阶段只记录解析调用本身的耗时; 等待期间事件循环上并发进行的图片下载不计入。
+        """
+        loop = asyncio.get_running_loop()
+        if pool is None:
+            products, elapsed = await loop.run_in_executor(None, timed, self.parse_products, html)
+            self.record_stage('parse', elapsed)
+            return products
+        from parse_pool import parse_page
+        if not self.offline:
+            self.save_debug_html(html)
+        records, elapsed = await loop.run_in_executor(pool.executor, timed, parse_page, html.encode('utf-8'))
+        start = time.perf_counter()
+        products = pool.expand(records)
+        self.record_stage('parse', elapsed + time.perf_counter() - start)
+        return products
+
+    async def download_image_async(self, client, semaphore, product):
+        """流式下载一张图片: 分块写入临时文件, 完成后改名, 失败时不留下半个文件"""
+        image_url = product.get('image_url')
+        if not image_url:
+            return None
+        filename = self.image_filename(image_url, product['brand'], product['name'])
+        filepath = os.path.join(self.images_dir, filename)
+        existing = self.existing_image(filename)
+        if existing:
+            return existing
+
+        download = self.image_download(image_url, filepath)
+        async with semaphore:
+            try:
+                await asyncio.sleep(self.rate_limiter.reserve())
+                async with client.stream('GET', image_url, timeout=15.0) as response:
+                    response.raise_for_status()
+                    download.check_headers(response.headers)
+                    async for chunk in response.aiter_bytes(CHUNK_SIZE):
+                        download.write(chunk)
+                download.commit()
+                logger.info(f'✅ 图片保存: {filename}')
+                return filename
+            except ImageRejected as e:
+                download.abort(e.reason)
+                logger.warning(f'🚫 丢弃图片 {image_url[:50]}: {e}')
+                return None
+            except Exception as e:
+                download.abort('error')
+                logger.error(f'❌ 下载图片失败: {e}')
+                return None
+
+    async def fill_image(self, client, semaphore, product):
+        product['local_image'] = await self.download_image_async(client, semaphore, product)
+
+    async def crawl_pages_async(self, max_pages=2):
+        """异步抓取并解析所有页面, 返回去重后的产品列表 (不保存)"""
+        self.dedup = StreamingDedup(self.bloom_capacity)
+        unique_products, downloads = [], []
+        semaphore = asyncio.Semaphore(self.concurrency)
+        # 与同步版相同: 第一页在线程中解析, 取到第二页时才启动解析进程池
+        workers = min(self.parse_workers, max_pages - 1)
+        pool, parsed = None, 0
+
+        try:
+            async with self.client() as client:
+                async for page, html in self.iter_pages_async(client, max_pages):
+                    if pool is None and parsed and workers > 1:
+                        from parse_pool import ParsePool
+                        pool = ParsePool(self, workers)
+                    parsed += 1
+                    products = await self.parse_async(html, pool)
+                    with self.stage('dedup'):
+                        unique = self.dedup.filter(products)
+                    logger.info(f'✅ 第 {page} 页找到 {len(products)} 个产品, 其中新产品 {len(unique)} 个')
+                    unique_products.extend(unique)
+                    if self.download_images:
+                        downloads.extend(asyncio.create_task(self.fill_image(client, semaphore, product))
+                                         for product in unique if product.get('image_url'))
+
+                with self.stage('images'):
+                    await asyncio.gather(*downloads)
+            self.finish_images(unique_products)
+        finally:
+            if pool:
+                pool.executor.shutdown(wait=True)
+
+        logger.info(f'📊 去重后剩余 {len(unique_products)} 个产品 (丢弃重复 {self.dedup.duplicates} 个)')
+        return unique_products
+
+    async def iter_pages_async(self, client, max_pages=2):
+        """异步版的 iter_pages: 停止条件相同, 页间延迟不阻塞正在进行的图片下载"""
+        seen = {}
+        for page in range(1, max_pages + 1):
+            logger.info(f'📄 正在处理第 {page}/{max_pages} 页')
+            # 等待期间事件循环上仍在下载图片, 不跨await开启分析阶段, 只记录请求耗时
+            start = time.perf_counter()
+            html = await self.get_page_async(client, page)
+            self.record_stage('fetch', time.perf_counter() - start)
+            status = self.check_page(page, html, seen)
+            if status == 'stop':
+                break
+            if status == 'skip':
+                continue
+
+            yield page, html
+
+            if self.is_last_page(page, html):
+                break
+            delay = self.next_page_delay(page, max_pages)
+            if delay:
+                await asyncio.sleep(delay)
+
+    def crawl_pages(self, max_pages=2):
+        return asyncio.run(self.crawl_pages_async(max_pages))
@@ -0,0 +1,381 @@
+#!/usr/bin/env python3
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+from scraper import OUTPUT_FORMATS, SnowboardsScraper, configure_logging, parse_formats
+from stub_server import StubRetailer
+
+logger = logging.getLogger(__name__)
+
+
+def percentile(values, pct):
+    """最近秩法百分位数"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[rank]
+
+
+class StageTimer:
+    """记录每个阶段每次调用的耗时 (作为scraper的profiler, 开销远小于cProfile)"""
+
+    def __init__(self):
+        self.durations = {}
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.durations.setdefault(name, []).append(time.perf_counter() - start)
+
+    def record(self, name, seconds):
+        """记录在其他线程或进程中测得的一次耗时"""
+        self.durations.setdefault(name, []).append(seconds)
+
+    def summary(self):
+        return {
+            name: {
+                'calls': len(values),
+                'total_s': round(sum(values), 4),
+                'p50_ms': round(percentile(values, 50) * 1000, 2),
+                'p95_ms': round(percentile(values, 95) * 1000, 2),
+                'max_ms': round(max(values) * 1000, 2)
+            }
+            for name, values in self.durations.items()
+        }
+
+
+def run_benchmark(pages='data', max_pages=5, workers=4, rate_limit=0, latency=0.0, jitter=0.0,
+                  error_rate=0.0, server_rate_limit=0, formats=('json',), download_images=True,
+                  derivatives=False, parse_workers=1, async_http=False, max_connections=100, placeholder_rate=0.0,
+                  bad_image_rate=0.0, output_dir=None):
+    """启动模拟零售商, 对其完整运行一次 scrape_all_pages, 返回吞吐量报告"""
+    output_dir = output_dir or tempfile.mkdtemp(prefix='snowboard-bench-')
+    stub = StubRetailer.from_replay(pages, page_count=max_pages, latency=latency, jitter=jitter,
+                                    error_rate=error_rate, rate_limit=server_rate_limit,
+                                    placeholder_rate=placeholder_rate, bad_image_rate=bad_image_rate)
+    timer = StageTimer()
+    with stub:
+        scraper_class, extra = SnowboardsScraper, {}
+        if async_http:
+            from async_scraper import AsyncSnowboardsScraper
+            scraper_class, extra = AsyncSnowboardsScraper, {'max_connections': max_connections}
+        scraper = scraper_class(
+            base_url=stub.base_url,
+            web_dir=os.path.join(output_dir, 'web'),
+            data_dir=os.path.join(output_dir, 'data'),
+            profiler=timer,
+            workers=workers,
+            rate_limit=rate_limit,
+            page_delay=None,
+            formats=formats,
+            download_images=download_images,
+            derivatives=derivatives,
+            parse_workers=parse_workers,
+            **extra
+        )
+        start = time.perf_counter()
+        result = scraper.scrape_all_pages(max_pages)
+        elapsed = time.perf_counter() - start
+        # 调试HTML不属于被测输出, 避免占用临时目录
+        for name in os.listdir(scraper.data_dir):
+            if name.startswith('debug_'):
+                os.remove(os.path.join(scraper.data_dir, name))
+
+    server = dict(stub.stats)
+    unique = len(result['products']) if result else 0
+    return {
+        'config': {
+            'max_pages': max_pages,
+            'workers': workers,
+            'rate_limit': rate_limit,
+            'latency': latency,
+            'jitter': jitter,
+            'error_rate': error_rate,
+            'server_rate_limit': server_rate_limit,
+            'formats': list(formats),
+            'download_images': download_images,
+            'derivatives': derivatives,
+            'parse_workers': parse_workers,
+            'async_http': async_http,
+            'max_connections': max_connections if async_http else None,
+            'placeholder_rate': placeholder_rate,
+            'bad_image_rate': bad_image_rate
+        },
+        'elapsed_s': round(elapsed, 3),
+        'pages': server['pages'],
+        'pages_per_s': round(server['pages'] / elapsed, 2) if elapsed else 0,
+        'products_parsed': scraper.dedup.seen,
+        'products_unique': unique,
+        'products_per_s': round(scraper.dedup.seen / elapsed, 1) if elapsed else 0,
+        'images': server['images'],
+        'bytes': server['bytes'],
+        'mb_per_s': round(server['bytes'] / elapsed / 1024 / 1024, 2) if elapsed else 0,
+        'image_downloads': scraper.image_stats.summary(scraper.images_dir),
+        'server': server,
+        'stages': timer.summary(),
+        'output_dir': output_dir
+    }
+
+
+def jsonld_item_list(products):
+    """把产品写成schema.org ItemList JSON-LD (真实站点的结构化数据形式)"""
+    items = []
+    for position, product in enumerate(products, 1):
+        offer = {'@type': 'Offer', 'price': f"{product['price_cents'] / 100:.2f}" if product.get('price_cents') else None,
+                 'priceCurrency': 'USD', 'url': product.get('product_url')}
+        if product.get('original_price_cents'):
+            offer['priceSpecification'] = {'@type': 'UnitPriceSpecification', 'priceType': 'https://schema.org/ListPrice',
+                                           'price': f"{product['original_price_cents'] / 100:.2f}"}
+        items.append({'@type': 'ListItem', 'position': position, 'item': {
+            '@type': 'Product', 'name': product['name'], 'brand': {'@type': 'Brand', 'name': product['brand']},
+            'image': product.get('image_url'), 'url': product.get('product_url'), 'offers': offer}})
+    data = {'@context': 'https://schema.org', '@type': 'ItemList', 'itemListElement': items}
+    return f'<script type="application/ld+json">{json.dumps(data, ensure_ascii=False)}</script>'
+
+
+def run_parse_paths(pages='data', limit=None):
+    """在存档页面上比较JSON-LD快速路径和选择器启发式的解析耗时
+
+    存档页面的JSON-LD只有站点/组织信息, 快速路径在其上只做一次扫描后回退;
+    另外把启发式解析结果作为ItemList注入同一页面, 测量快速路径命中时的耗时和字段一致率。
+    """
+    from scraper import RECORD_FIELDS, find_replay_files
+
+    scraper = SnowboardsScraper(web_dir=tempfile.mkdtemp(prefix='snowboard-parse-'), data_dir=tempfile.mkdtemp(
+        prefix='snowboard-parse-'), download_images=False, derivatives=False)
+    timer = StageTimer()
+    counts = {'heuristic': 0, 'scan': 0, 'structured': 0, 'matching': 0}
+    files = find_replay_files(pages)[:limit]
+    for path in files:
+        with open(path, 'r', encoding='utf-8') as f:
+            html = f.read()
+        with timer.stage('heuristic'):
+            heuristic = scraper.extract_heuristic_products(html)
+        with timer.stage('scan'):
+            counts['scan'] += len(scraper.extract_structured_products(html)[0])
+        enriched = html.replace('</head>', jsonld_item_list(heuristic) + '</head>', 1)
+        with timer.stage('structured'):
+            structured = scraper.extract_products(enriched)
+        counts['heuristic'] += len(heuristic)
+        counts['structured'] += len(structured)
+        record = lambda product: tuple(product[field] for field in RECORD_FIELDS)
+        counts['matching'] += len({record(p) for p in heuristic} & {record(p) for p in structured})
+    stages = timer.summary()
+    return {
+        'pages': len(files),
+        'products': counts,
+        'stages': stages,
+        'speedup': round(stages['heuristic']['total_s'] / stages['structured']['total_s'], 1) if files else 0
+    }
+
+
+def measure(func, trace_memory=True):
+    """运行一次并返回 (结果, 耗时和内存峰值); 跟踪内存时耗时包含tracemalloc开销"""
+    if trace_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        result = func()
+    finally:
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1] if trace_memory else 0
+        if trace_memory:
+            tracemalloc.stop()
+    return result, {'seconds': round(elapsed, 3), 'peak_mb': round(peak / 1024 / 1024, 1) if trace_memory else None}
+
+
+def path_size(path):
+    """文件或目录的总字节数"""
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    total = 0
+    for root, _, files in os.walk(path):
+        total += sum(os.path.getsize(os.path.join(root, name)) for name in files)
+    return total
+
+
+def run_scaling(scales=(1000, 10000), days=30, skew=1.2, churn=0.05, formats=OUTPUT_FORMATS,
+                trace_memory=True, output_dir=None):
+    """在各规模的合成目录上测量 save_data、页面生成的耗时/内存和输出文件大小
+
+    每个规模先写出 days-1 天的历史快照和前一天的feed版本, 再对当天目录计时,
+    因此feed增量、价格历史和走势聚合都按日常运行的状态测量。
+    """
+    from delta import publish_feed
+    from synthetic import generate_history, write_snapshot
+
+    output_dir = output_dir or tempfile.mkdtemp(prefix='snowboard-scale-')
+    results = []
+    for count in scales:
+        root = os.path.join(output_dir, f'scale_{count}')
+        data_dir, web_dir = os.path.join(root, 'data'), os.path.join(root, 'web')
+        os.makedirs(os.path.join(web_dir, 'images'), exist_ok=True)
+
+        generated = time.perf_counter()
+        previous = latest = None
+        for scraped_at, products in generate_history(count, days, skew, churn):
+            if latest is not None:
+                write_snapshot(latest, data_dir, latest_at)
+            previous, latest, latest_at = latest, products, scraped_at
+        if previous is not None and 'feed' in formats:
+            publish_feed(previous, web_dir)
+        generated = time.perf_counter() - generated
+
+        scraper = SnowboardsScraper(web_dir=web_dir, data_dir=data_dir, formats=formats,
+                                    download_images=False, derivatives=False)
+        _, save = measure(lambda: scraper.save_data(latest), trace_memory)
+
+        import generate_html
+        cwd = os.getcwd()
+        os.chdir(root)
+        try:
+            _, site = measure(generate_html.generate_github_pages_html, trace_memory)
+        finally:
+            os.chdir(cwd)
+
+        sizes = {
+            name: path_size(os.path.join(root, path))
+            for name, path in (('data.json', 'web/data.json'), ('products.json', 'web/products.json'),
+                               ('index.html', 'web/index.html'), ('catalog.bin', 'web/catalog.bin'),
+                               ('feed', 'web/feed'), ('series', 'web/series'),
+                               ('history.npz', 'data/history.npz'), ('rollups.npz', 'data/rollups.npz'))
+            if os.path.exists(os.path.join(root, path))
+        }
+        results.append({
+            'products': count,
+            'days': days,
+            'generate_s': round(generated, 1),
+            'save': save,
+            'site': site,
+            'bytes': sizes
+        })
+        logger.info(f'📏 规模 {count}: save {save["seconds"]}s, 页面 {site["seconds"]}s')
+    return {'output_dir': output_dir, 'results': results}
+
+
+def print_scaling(report):
+    print(f"{'产品数':>8} {'save(s)':>8} {'save峰值MB':>10} {'页面(s)':>8} {'页面峰值MB':>10} "
+          f"{'data.json':>10} {'products':>10} {'index':>8} {'bin':>8} {'feed':>10} {'series':>10}")
+    kb = lambda sizes, name: f"{sizes.get(name, 0) / 1024:.0f}K"
+    for row in report['results']:
+        sizes = row['bytes']
+        print(f"{row['products']:>8} {row['save']['seconds']:>8} {str(row['save']['peak_mb']):>10} "
+              f"{row['site']['seconds']:>8} {str(row['site']['peak_mb']):>10} "
+              f"{kb(sizes, 'data.json'):>10} {kb(sizes, 'products.json'):>10} {kb(sizes, 'index.html'):>8} "
+              f"{kb(sizes, 'catalog.bin'):>8} {kb(sizes, 'feed'):>10} {kb(sizes, 'series'):>10}")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description='对本地模拟零售商运行端到端吞吐量测试')
+    parser.add_argument('--pages', default='data', help='存档列表页: 目录、通配符或文件 (默认 data/)')
+    parser.add_argument('--max-pages', type=int, default=5, help='抓取页数')
+    parser.add_argument('--workers', type=int, default=4, help='图片下载线程数')
+    parser.add_argument('--parse-workers', type=int, default=1, help='页面解析进程数, 0表示按CPU核数')
+    parser.add_argument('--async-http', action='store_true', help='使用异步scraper (httpx)')
+    parser.add_argument('--max-connections', type=int, default=100, help='异步scraper的连接池大小')
+    parser.add_argument('--rate-limit', type=float, default=0, help='scraper每秒请求数上限')
+    parser.add_argument('--latency', type=float, default=0.0, help='服务器每个请求的延迟(秒)')
+    parser.add_argument('--jitter', type=float, default=0.0, help='服务器额外随机延迟上限(秒)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='服务器随机返回503的比例')
+    parser.add_argument('--server-rate-limit', type=float, default=0, help='服务器每秒允许的请求数')
+    parser.add_argument('--placeholder-rate', type=float, default=0.0, help='服务器图片返回占位图的比例')
+    parser.add_argument('--bad-image-rate', type=float, default=0.0, help='服务器图片返回HTML错误页的比例')
+    parser.add_argument('--formats', help='输出格式, 逗号分隔 (默认吞吐量测试为 json, 规模测试为全部)')
+    parser.add_argument('--no-images', dest='download_images', action='store_false', help='不下载图片')
+    parser.add_argument('--derivatives', action='store_true', help='同时生成缩略图')
+    parser.add_argument('--output-dir', help='抓取输出目录 (默认临时目录)')
+    parser.add_argument('--scales', help='规模测试: 逗号分隔的合成目录产品数, 例如 1000,10000,100000 '
+                                         '(指定后不启动模拟服务器, 只测 save/页面生成/文件大小)')
+    parser.add_argument('--days', type=int, default=30, help='规模测试的历史天数')
+    parser.add_argument('--skew', type=float, default=1.2, help='规模测试的品牌分布偏斜度')
+    parser.add_argument('--churn', type=float, default=0.05, help='规模测试每天价格变化的产品比例')
+    parser.add_argument('--no-memory', dest='trace_memory', action='store_false',
+                        help='规模测试不跟踪内存 (tracemalloc会拉长耗时)')
+    parser.add_argument('--parse-paths', action='store_true',
+                        help='比较JSON-LD快速路径和选择器启发式在存档页面上的解析耗时 (不启动模拟服务器)')
+    parser.add_argument('--report', help='把报告写入JSON文件')
+    parser.add_argument('--log-level', default='WARNING', help='日志级别 (默认 WARNING)')
+    return parser
+
+
+def main(argv=None):
+    options = build_parser().parse_args(argv)
+    configure_logging(log_file=None, level=options.log_level)
+    if options.scales:
+        report = run_scaling(
+            scales=[int(n) for n in options.scales.split(',') if n.strip()],
+            days=options.days,
+            skew=options.skew,
+            churn=options.churn,
+            formats=parse_formats(options.formats) if options.formats else OUTPUT_FORMATS,
+            trace_memory=options.trace_memory,
+            output_dir=options.output_dir
+        )
+        print_scaling(report)
+        if options.report:
+            with open(options.report, 'w', encoding='utf-8') as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+        return 0
+
+    if options.parse_paths:
+        report = run_parse_paths(options.pages, options.max_pages)
+        products = report['products']
+        print(f"{report['pages']} 页: 启发式 {products['heuristic']} 个产品, 存档JSON-LD中 {products['scan']} 个, "
+              f"注入ItemList后快速路径 {products['structured']} 个 (与启发式一致 {products['matching']} 个), "
+              f"快 {report['speedup']} 倍")
+        for name, stage in report['stages'].items():
+            print(f"  {name:12s} 合计 {stage['total_s']:.3f}s  p50 {stage['p50_ms']:.1f}ms  p95 {stage['p95_ms']:.1f}ms")
+        if options.report:
+            with open(options.report, 'w', encoding='utf-8') as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+        return 0
+
+    report = run_benchmark(
+        pages=options.pages,
+        max_pages=options.max_pages,
+        workers=options.workers,
+        rate_limit=options.rate_limit,
+        latency=options.latency,
+        jitter=options.jitter,
+        error_rate=options.error_rate,
+        server_rate_limit=options.server_rate_limit,
+        formats=parse_formats(options.formats) if options.formats else ('json',),
+        download_images=options.download_images,
+        derivatives=options.derivatives,
+        parse_workers=options.parse_workers or os.cpu_count() or 1,
+        async_http=options.async_http,
+        max_connections=options.max_connections,
+        placeholder_rate=options.placeholder_rate,
+        bad_image_rate=options.bad_image_rate,
+        output_dir=options.output_dir
+    )
+
+    print(f"⏱️ {report['elapsed_s']}s  {report['pages']} 页 ({report['pages_per_s']}/s)  "
+          f"{report['products_parsed']} 个产品 ({report['products_per_s']}/s, 去重后 {report['products_unique']})  "
+          f"{report['images']} 张图片  {report['bytes'] / 1024 / 1024:.1f} MB ({report['mb_per_s']} MB/s)")
+    images = report['image_downloads']
+    print(f"  图片: 保存 {images['saved']} 张 {images['saved_bytes'] / 1024:.0f} KB, 丢弃 {sum(images['rejected'].values())} 张 {images['rejected'] or ''} "
+          f"浪费 {images['wasted_bytes'] / 1024:.0f} KB, 图片目录 {images.get('storage_bytes', 0) / 1024:.0f} KB")
+    for name, stage in report['stages'].items():
+        print(f"  {name:12s} {stage['calls']:4d} 次  合计 {stage['total_s']:.3f}s  "
+              f"p50 {stage['p50_ms']:.1f}ms  p95 {stage['p95_ms']:.1f}ms")
+
+    if options.report:
+        with open(options.report, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
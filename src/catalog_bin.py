@@ -0,0 +1,182 @@
+import json
+import logging
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+try:
+    import numpy as np
+except ImportError:  # 没有NumPy时列以memoryview返回, 同样零拷贝
+    np = None
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'SBCAT\x00\x00\x01'
+FORMAT_VERSION = 1
+HEADER = struct.Struct('<8sIII')          # magic, version, rows, columns
+COLUMN_ENTRY = struct.Struct('<24s4sQQ')  # name, dtype, offset, nbytes
+ALIGNMENT = 8
+NULL = -1
+
+# 定长数值列: 列名 -> array类型码
+NUMERIC_COLUMNS = {
+    'price_cents': 'i',
+    'original_price_cents': 'i',
+    'discount_bp': 'i',
+    'brand_id': 'i',
+    'category_id': 'i',
+    'scraped_ts': 'q',
+}
+# 字符串列: 偏移数组 (<列名>.off) + UTF-8字节 (<列名>.dat)
+STRING_COLUMNS = ('key', 'name', 'brand', 'category', 'current_price', 'discount',
+                  'product_url', 'local_image', 'source')
+
+# array类型码 <-> 文件中的dtype描述 (与NumPy dtype字符串一致)
+DTYPES = {'i': 'i4', 'q': 'i8', 'I': 'u4', 'B': 'u1'}
+TYPECODES = {v: k for k, v in DTYPES.items()}
+
+
+def _numeric(values, typecode):
+    """数值列, None记为-1"""
+    return array(typecode, (NULL if v is None else int(v) for v in values))
+
+
+def _strings(values):
+    """字符串列拆成偏移数组和字节块"""
+    offsets = array('I', [0])
+    blob = bytearray()
+    for value in values:
+        if value is not None:
+            blob += str(value).encode('utf-8')
+        offsets.append(len(blob))
+    return offsets, array('B', blob)
+
+
+def write_catalog(products, path, metadata=None):
+    """写出列式二进制目录
+
+    文件结构: 头部 + 列目录 + 按8字节对齐的列数据。数值列为定长小端整数,
+    字符串列为偏移数组加UTF-8字节块, __meta__ 列保存JSON元数据。
+    """
+    columns = []
+    for name, typecode in NUMERIC_COLUMNS.items():
+        columns.append((name, _numeric((p.get(name) for p in products), typecode)))
+    for name in STRING_COLUMNS:
+        offsets, blob = _strings(p.get(name) for p in products)
+        columns.append((f'{name}.off', offsets))
+        columns.append((f'{name}.dat', blob))
+    meta = json.dumps(metadata or {}, ensure_ascii=False).encode('utf-8')
+    columns.append(('__meta__', array('B', meta)))
+
+    if sys.byteorder != 'little':
+        for _, data in columns:
+            data.byteswap()
+
+    directory_size = HEADER.size + COLUMN_ENTRY.size * len(columns)
+    offset = _align(directory_size)
+    entries = []
+    for name, data in columns:
+        nbytes = len(data) * data.itemsize
+        entries.append((name, DTYPES[data.typecode], offset, nbytes))
+        offset = _align(offset + nbytes)
+
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, len(products), len(columns)))
+        for name, dtype, column_offset, nbytes in entries:
+            f.write(COLUMN_ENTRY.pack(name.encode('ascii'), dtype.encode('ascii'), column_offset, nbytes))
+        for (name, data), (_, _, column_offset, _) in zip(columns, entries):
+            f.write(b'\x00' * (column_offset - f.tell()))
+            data.tofile(f)
+    os.replace(tmp_path, path)
+    logger.info(f'💾 保存二进制目录: {path} ({os.path.getsize(path) / 1024:.1f} KB)')
+    return path
+
+
+def _align(offset):
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+class CatalogReader:
+    """基于mmap的列式目录读取器
+
+    打开文件只解析头部和列目录, column() 直接在映射内存上返回NumPy数组
+    (没有NumPy时为memoryview), 不解析、不拷贝; 字符串按行惰性解码。
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'rb')
+        self.mm = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.rows, count = HEADER.unpack_from(self.mm, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            self.close()
+            raise ValueError(f'不是有效的目录文件: {path}')
+
+        self.columns = {}
+        for i in range(count):
+            name, dtype, offset, nbytes = COLUMN_ENTRY.unpack_from(self.mm, HEADER.size + i * COLUMN_ENTRY.size)
+            self.columns[name.rstrip(b'\x00').decode('ascii')] = (dtype.rstrip(b'\x00').decode('ascii'), offset, nbytes)
+        self._metadata = None
+
+    def __len__(self):
+        return self.rows
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """关闭映射; 仍有数组引用映射内存时交给垃圾回收"""
+        try:
+            self.mm.close()
+        except BufferError:
+            pass
+        self.file.close()
+
+    def column(self, name):
+        """零拷贝返回一列"""
+        dtype, offset, nbytes = self.columns[name]
+        if np is not None:
+            return np.frombuffer(self.mm, dtype=f'<{dtype}', count=nbytes // int(dtype[1:]), offset=offset)
+        return memoryview(self.mm)[offset:offset + nbytes].cast(TYPECODES[dtype])
+
+    def string(self, name, row):
+        """解码字符串列的一行"""
+        offsets = self.column(f'{name}.off')
+        start, end = int(offsets[row]), int(offsets[row + 1])
+        _, data_offset, _ = self.columns[f'{name}.dat']
+        return self.mm[data_offset + start:data_offset + end].decode('utf-8')
+
+    def strings(self, name):
+        """逐行解码整列字符串"""
+        offsets = self.column(f'{name}.off')
+        _, data_offset, _ = self.columns[f'{name}.dat']
+        for row in range(self.rows):
+            yield self.mm[data_offset + int(offsets[row]):data_offset + int(offsets[row + 1])].decode('utf-8')
+
+    @property
+    def metadata(self):
+        if self._metadata is None:
+            _, offset, nbytes = self.columns['__meta__']
+            self._metadata = json.loads(self.mm[offset:offset + nbytes].decode('utf-8'))
+        return self._metadata
+
+
+def main():
+    path = sys.argv[1] if len(sys.argv) > 1 else 'web/catalog.bin'
+    with CatalogReader(path) as catalog:
+        prices = catalog.column('price_cents')
+        valid = [int(p) for p in prices if p != NULL]
+        print(f"{path}: {len(catalog)} 个产品, {len(catalog.columns)} 列")
+        if valid:
+            print(f"价格区间: ${min(valid) / 100:.2f} - ${max(valid) / 100:.2f}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
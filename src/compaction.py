@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+import argparse
+import gzip
+import json
+import logging
+import os
+import re
+import sys
+
+import numpy as np
+
+from stats import HISTORY_FILE, load_history
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_DIR = 'archive'
+# 每次运行生成的带时间戳文件: JSON/CSV快照和调试HTML
+TIMESTAMPED_PATTERN = re.compile(r'^(snowboards|debug)_(\d{6})\d{2}_\d{6}\.(json|csv|html)$')
+# 各类文件默认保留的最近份数 (每天一份JSON/CSV, 每页一份调试HTML)
+KEEP_SNAPSHOTS = 14
+KEEP_DEBUG = 4
+
+
+def directory_size(path):
+    """目录下所有文件的总字节数"""
+    total = 0
+    for root, _, files in os.walk(path):
+        total += sum(os.path.getsize(os.path.join(root, name)) for name in files)
+    return total
+
+
+def timestamped_files(data_dir):
+    """按扩展名分组的带时间戳文件, 每组按时间升序"""
+    groups = {'json': [], 'csv': [], 'html': []}
+    for name in sorted(os.listdir(data_dir)):
+        match = TIMESTAMPED_PATTERN.match(name)
+        if match:
+            groups[match.group(3)].append(name)
+    return groups
+
+
+def ingested_snapshots(data_dir):
+    """先增量更新价格历史, 返回已写入 history.npz 的快照文件名"""
+    load_history(data_dir)
+    history_file = os.path.join(data_dir, HISTORY_FILE)
+    if not os.path.exists(history_file):
+        return set()
+    with np.load(history_file, allow_pickle=False) as saved:
+        return set(saved['files'].tolist())
+
+
+def archive_snapshot(path, archive_dir):
+    """把一个JSON快照追加到所在月份的 jsonl.gz 归档 (每个快照一行, 一个gzip成员)"""
+    name = os.path.basename(path)
+    month = TIMESTAMPED_PATTERN.match(name).group(2)
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if not isinstance(data, dict):
+        data = {'products': data}
+    line = json.dumps({'file': name, **data}, ensure_ascii=False, separators=(',', ':'))
+    os.makedirs(archive_dir, exist_ok=True)
+    archive_file = os.path.join(archive_dir, f'snowboards_{month}.jsonl.gz')
+    with gzip.open(archive_file, 'ab') as f:
+        f.write(line.encode('utf-8') + b'\n')
+    return archive_file
+
+
+def compact(data_dir='data', keep_snapshots=KEEP_SNAPSHOTS, keep_debug=KEEP_DEBUG, archive=True,
+            log_dir='logs', dry_run=False):
+    """压缩data目录: 旧快照并入价格历史和月度归档后删除, 只保留最近的原始文件
+
+    删除前先运行 load_history, 保证所有快照的价格已写入 history.npz; 旧CSV与
+    同时间的JSON内容相同, 直接删除; 调试HTML只保留最近keep_debug份作为回放语料。
+    """
+    before = directory_size(data_dir) + (directory_size(log_dir) if log_dir else 0)
+    groups = timestamped_files(data_dir)
+    expired = {
+        'json': groups['json'][:-keep_snapshots] if keep_snapshots else groups['json'],
+        'csv': groups['csv'][:-keep_snapshots] if keep_snapshots else groups['csv'],
+        'html': groups['html'][:-keep_debug] if keep_debug else groups['html']
+    }
+    report = {'dry_run': dry_run, 'archived': 0, 'removed': 0, 'bytes_before': before}
+
+    ingested = set()
+    if expired['json'] and not dry_run:
+        ingested = ingested_snapshots(data_dir)
+    for kind, names in expired.items():
+        for name in names:
+            path = os.path.join(data_dir, name)
+            if dry_run:
+                report['removed'] += 1
+                continue
+            if kind == 'json' and name not in ingested:
+                logger.warning(f'⚠️ 快照 {name} 未写入价格历史, 保留原文件')
+                continue
+            if kind == 'json' and archive:
+                try:
+                    archive_snapshot(path, os.path.join(data_dir, ARCHIVE_DIR))
+                except (OSError, ValueError) as e:
+                    logger.warning(f'⚠️ 无法归档快照 {name}, 保留原文件: {e}')
+                    continue
+                report['archived'] += 1
+            os.remove(path)
+            report['removed'] += 1
+
+    if dry_run:
+        reclaimed = sum(os.path.getsize(os.path.join(data_dir, name)) for names in expired.values() for name in names)
+        report['bytes_after'] = before - reclaimed
+    else:
+        report['bytes_after'] = directory_size(data_dir) + (directory_size(log_dir) if log_dir else 0)
+    report['reclaimed'] = before - report['bytes_after']
+    logger.info(f'🗜️ 压缩完成: 归档 {report["archived"]} 个快照, 删除 {report["removed"]} 个文件, '
+                f'释放 {report["reclaimed"] / 1024 / 1024:.1f} MB')
+    return report
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description='压缩data目录中的旧快照和调试文件')
+    parser.add_argument('--data-dir', default='data')
+    parser.add_argument('--log-dir', default='logs', help='一并统计大小的日志目录')
+    parser.add_argument('--keep', type=int, default=KEEP_SNAPSHOTS, help='保留的最近JSON/CSV快照数')
+    parser.add_argument('--keep-debug', type=int, default=KEEP_DEBUG, help='保留的最近调试HTML数')
+    parser.add_argument('--no-archive', dest='archive', action='store_false',
+                        help='旧JSON快照只并入价格历史, 不写月度归档')
+    parser.add_argument('--dry-run', action='store_true', help='只报告可释放的空间, 不修改文件')
+    return parser
+
+
+def main(argv=None):
+    options = build_parser().parse_args(argv)
+    report = compact(options.data_dir, options.keep, options.keep_debug, options.archive,
+                     options.log_dir, options.dry_run)
+    action = '可释放' if options.dry_run else '已释放'
+    print(f"{action} {report['reclaimed'] / 1024 / 1024:.1f} MB "
+          f"({report['bytes_before'] / 1024 / 1024:.1f} MB -> {report['bytes_after'] / 1024 / 1024:.1f} MB), "
+          f"归档 {report['archived']} 个快照, 删除 {report['removed']} 个文件")
+    return 0
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    sys.exit(main())
@@ -0,0 +1,143 @@
+import json
+import logging
+import os
+import sys
+from datetime import datetime
+
+import numpy as np
+
+from delta import write_json
+from scraper import product_key
+from stats import NULL, catalog_columns, load_history, price_changes
+
+logger = logging.getLogger(__name__)
+
+DEALS_FILE = 'deals.json'
+# 每个品牌/类别预先保留的前K名
+TOP_K = 20
+# 优惠分数 (0-100) 各部分的满分: 折扣深度、当前价在历史价格区间中的位置、最近一次降价
+WEIGHTS = {'discount': 50, 'low': 30, 'recent': 20}
+# 折扣达到此深度 (基点) 时折扣部分满分
+MAX_DISCOUNT_BP = 6000
+# 最近降价部分按距今天数指数衰减的半衰期
+RECENT_HALF_LIFE_DAYS = 7
+
+
+def price_features(keys, price, history=None, today=None):
+    """每个产品的历史最低价、最高价 (都含当前价) 和距最近一次降价的天数 (没有降价记为-1)
+
+    当天快照可能还没写入历史, 当前价低于历史中最后一次记录的价格时视为今天降价。
+    """
+    low, high = price.copy(), price.copy()
+    drop_age = np.full(len(keys), NULL, dtype=np.int64)
+    if history is None or not len(history['day']):
+        return low, high, drop_age
+    today = today if today is not None else (datetime.now() - datetime(1970, 1, 1)).days
+
+    product = history['product']
+    day = history['day'].astype(np.int64)
+    prices = history['price_cents'].astype(np.int64)
+    count = len(history['keys'])
+    hist_low = np.full(count, np.iinfo(np.int64).max)
+    hist_high = np.full(count, NULL, dtype=np.int64)
+    np.minimum.at(hist_low, product, prices)
+    np.maximum.at(hist_high, product, prices)
+    last_drop = np.full(count, NULL, dtype=np.int64)
+    drops = price_changes(history) < 0
+    np.maximum.at(last_drop, product[drops], day[drops])
+    # 历史按 (产品, 日期) 排序, 每个产品的最后一行即最近一次记录的价格
+    last = np.ones(len(product), dtype=bool)
+    last[:-1] = product[1:] != product[:-1]
+    last_price = np.full(count, NULL, dtype=np.int64)
+    last_price[product[last]] = prices[last]
+
+    index = {key: i for i, key in enumerate(history['keys'].tolist())}
+    rows = np.array([index.get(key, NULL) for key in keys], dtype=np.int64)
+    known = (rows != NULL) & (price != NULL)
+    row = rows[known]
+    low[known] = np.minimum(price[known], hist_low[row])
+    high[known] = np.maximum(price[known], hist_high[row])
+    age = np.where(last_drop[row] != NULL, today - last_drop[row], NULL)
+    age[price[known] < last_price[row]] = 0
+    drop_age[known] = age
+    return low, high, drop_age
+
+
+def deal_scores(columns, low, high, drop_age):
+    """优惠分数 (0-100, 保留一位小数)
+
+    折扣部分按折扣深度线性计分, MAX_DISCOUNT_BP 封顶; 历史低价部分为当前价在
+    历史最高和最低价之间的位置 (在最低价时满分, 价格从未变化时为0); 最近降价
+    部分按距今天数衰减。
+    """
+    price = columns['price_cents']
+    discount = np.clip(columns['discount_bp'], 0, MAX_DISCOUNT_BP) / MAX_DISCOUNT_BP
+    spread = high - low
+    position = np.where((price != NULL) & (spread > 0), (high - price) / np.maximum(spread, 1), 0.0)
+    recent = np.where(drop_age >= 0, 0.5 ** (np.maximum(drop_age, 0) / RECENT_HALF_LIFE_DAYS), 0.0)
+    score = WEIGHTS['discount'] * discount + WEIGHTS['low'] * position + WEIGHTS['recent'] * recent
+    return np.round(score, 1)
+
+
+def top_k(scores, codes, labels, k=TOP_K):
+    """按编码分组, 每组分数最高的k个产品下标 (同分时按原顺序), 跳过0分的产品"""
+    candidates = np.flatnonzero(scores > 0)
+    order = candidates[np.lexsort((candidates, -scores[candidates], codes[candidates]))]
+    grouped = codes[order]
+    starts = np.flatnonzero(np.r_[True, grouped[1:] != grouped[:-1]]) if len(order) else np.empty(0, dtype=np.int64)
+    ends = np.r_[starts[1:], len(order)]
+    return {str(labels[grouped[start]]): order[start:min(end, start + k)] for start, end in zip(starts, ends)}
+
+
+def rank_deals(products, history=None, k=TOP_K, today=None):
+    """计算每个产品的优惠分数 (写入 deal_score), 返回总榜和各品牌/类别的前k名
+
+    每个榜单是 [产品key, 分数] 列表, 页面按key取产品, 读取一个榜单是O(k)的。
+    """
+    columns = catalog_columns(products)
+    keys = [product.get('key') or product_key(product) for product in products]
+    low, high, drop_age = price_features(keys, columns['price_cents'], history, today)
+    scores = deal_scores(columns, low, high, drop_age)
+    for product, score in zip(products, scores.tolist()):
+        product['deal_score'] = score
+
+    def entries(rows):
+        return [[keys[i], float(scores[i])] for i in rows]
+
+    overall = top_k(scores, np.zeros(len(products), dtype=np.int32), np.array(['all']), k)
+    return {
+        'k': k,
+        'updated': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'all': entries(overall.get('all', [])),
+        'brands': {label: entries(rows) for label, rows in
+                   top_k(scores, columns['brand'], columns['brands'], k).items()},
+        'categories': {label: entries(rows) for label, rows in
+                       top_k(scores, columns['category'], columns['categories'], k).items()}
+    }
+
+
+def write_deals(products, web_dir='web', data_dir='data', k=TOP_K):
+    """计算优惠排行并写出 web/deals.json, 返回排行"""
+    history = load_history(data_dir) if data_dir and os.path.isdir(data_dir) else None
+    deals = rank_deals(products, history, k)
+    write_json(os.path.join(web_dir, DEALS_FILE), deals)
+    logger.info(f'🔥 优惠排行: {len(deals["brands"])} 个品牌, {len(deals["categories"])} 个类别, 每个前 {k} 名')
+    return deals
+
+
+def main():
+    data_dir = sys.argv[1] if len(sys.argv) > 1 else 'data'
+    web_dir = sys.argv[2] if len(sys.argv) > 2 else 'web'
+    with open(os.path.join(web_dir, 'data.json'), 'r', encoding='utf-8') as f:
+        products = json.load(f).get('products', [])
+    deals = write_deals(products, web_dir, data_dir)
+    names = {product.get('key') or product_key(product): f"{product.get('brand', '')} {product.get('name', '')}"
+             for product in products}
+    for key, score in deals['all'][:10]:
+        print(f"  {score:5.1f}  {names.get(key, key)}")
+    return 0
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    sys.exit(main())
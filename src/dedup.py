@@ -0,0 +1,69 @@
+import hashlib
+import math
+
+
+def dedup_key(product):
+    """去重键: 品牌/名称/现价的64位哈希 (整数比拼接的字符串小得多)"""
+    text = f"{product.get('brand')}_{product.get('name')}_{product.get('current_price')}"
+    return int.from_bytes(hashlib.blake2b(text.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+class HashedKeySet:
+    """精确去重: 保存所有键的64位哈希"""
+
+    def __init__(self):
+        self.keys = set()
+
+    def add(self, key):
+        """加入键, 返回是否为新键"""
+        if key in self.keys:
+            return False
+        self.keys.add(key)
+        return True
+
+
+class BloomFilter:
+    """布隆过滤器: 内存固定, 新产品被误判为重复的概率约为error_rate
+
+    k个位置由64位键的高低32位双重哈希得到, 不再重复计算哈希。
+    """
+
+    def __init__(self, capacity, error_rate=0.001):
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def add(self, key):
+        """加入键, 返回是否为新键 (所有位此前都已置位时视为重复)"""
+        low, high = key & 0xFFFFFFFF, key >> 32
+        new = False
+        for i in range(self.hashes):
+            position = (low + i * high) % self.size
+            byte, bit = divmod(position, 8)
+            if not self.bits[byte] & (1 << bit):
+                self.bits[byte] |= 1 << bit
+                new = True
+        return new
+
+
+class StreamingDedup:
+    """逐页去重, 重复产品在解析后立即丢弃 (不下载图片, 也不保留到抓取结束)
+
+    bloom_capacity 为0时精确去重; 为预计的产品数时改用该容量的布隆过滤器。
+    """
+
+    def __init__(self, bloom_capacity=0, error_rate=0.001):
+        self.keys = BloomFilter(bloom_capacity, error_rate) if bloom_capacity else HashedKeySet()
+        self.seen = 0
+        self.duplicates = 0
+
+    def filter(self, products):
+        """返回本批中首次出现的产品"""
+        unique = []
+        for product in products:
+            self.seen += 1
+            if self.keys.add(dedup_key(product)):
+                unique.append(product)
+            else:
+                self.duplicates += 1
+        return unique
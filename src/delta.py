@@ -0,0 +1,116 @@
+import hashlib
+import json
+import logging
+import os
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+FEED_DIR = 'feed'
+VERSION_FILE = 'version.json'
+# 保留的增量文件数量, 更旧的客户端直接下载全量快照
+KEEP_DELTAS = 30
+# 每次抓取都会变化、不代表产品变化的字段
+VOLATILE_FIELDS = ('id', 'scraped_at', 'scraped_ts', 'updated_at')
+
+
+def content_hash(product):
+    """产品内容指纹 (忽略每次抓取都会变化的字段)"""
+    stable = {k: v for k, v in product.items() if k not in VOLATILE_FIELDS}
+    encoded = json.dumps(stable, ensure_ascii=False, sort_keys=True).encode('utf-8')
+    return hashlib.sha1(encoded).hexdigest()[:16]
+
+
+def write_json(path, data):
+    """紧凑写出JSON (feed文件面向客户端, 不缩进)"""
+    tmp_path = f'{path}.tmp'
+    # json.dumps走C编码器, json.dump写文件对象时逐块用纯Python编码, 大文件慢数倍
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(json.dumps(data, ensure_ascii=False, separators=(',', ':')))
+    os.replace(tmp_path, path)
+
+
+def read_json(path, default=None):
+    if not os.path.exists(path):
+        return default
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def diff_products(previous, current):
+    """比较两个 key->产品 映射, 返回新增/变化/删除"""
+    added, changed = [], []
+    for key, product in current.items():
+        old = previous.get(key)
+        if old is None:
+            added.append(product)
+        elif content_hash(old) != content_hash(product):
+            changed.append(product)
+    removed = [key for key in previous if key not in current]
+    return added, changed, removed
+
+
+def publish_feed(products, web_dir='web', metadata=None, keep_deltas=KEEP_DELTAS):
+    """发布版本化的增量数据
+
+    feed/version.json      当前版本号、快照文件名、可用增量的最小起始版本
+    feed/snapshot_N.json   版本N的全量产品 (只保留最新一份)
+    feed/delta_N.json      从N-1到N的新增/变化/删除
+
+    持有版本v的客户端依次应用 delta_(v+1) ... delta_N 即可, 刷新流量与每日
+    变化量成正比; 没有变化时不产生新版本。
+    """
+    feed_dir = os.path.join(web_dir, FEED_DIR)
+    os.makedirs(feed_dir, exist_ok=True)
+    manifest = read_json(os.path.join(feed_dir, VERSION_FILE), {})
+    version = manifest.get('version', 0)
+
+    current = {product['key']: product for product in products}
+    previous = {}
+    if manifest.get('snapshot'):
+        snapshot = read_json(os.path.join(feed_dir, manifest['snapshot']), {})
+        previous = {product['key']: product for product in snapshot.get('products', [])}
+
+    added, changed, removed = diff_products(previous, current)
+    if version and not (added or changed or removed):
+        logger.info(f'📡 数据没有变化, feed保持版本 {version}')
+        return manifest
+
+    new_version = version + 1
+    if version:
+        write_json(os.path.join(feed_dir, f'delta_{new_version}.json'), {
+            'from': version,
+            'to': new_version,
+            'added': added,
+            'changed': changed,
+            'removed': removed
+        })
+
+    snapshot_file = f'snapshot_{new_version}.json'
+    write_json(os.path.join(feed_dir, snapshot_file), {
+        'version': new_version,
+        'metadata': metadata or {},
+        'products': products
+    })
+
+    # 清理旧快照和超出保留数量的增量
+    oldest_delta = max(2, new_version - keep_deltas + 1)
+    for filename in os.listdir(feed_dir):
+        stem, _, number = filename.rpartition('.')[0].partition('_')
+        if not number.isdigit():
+            continue
+        if (stem == 'snapshot' and int(number) != new_version) or (stem == 'delta' and int(number) < oldest_delta):
+            os.remove(os.path.join(feed_dir, filename))
+
+    manifest = {
+        'version': new_version,
+        'updated': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'count': len(products),
+        'snapshot': snapshot_file,
+        # 客户端版本 >= min_version 时可以只拉增量
+        'min_version': oldest_delta - 1 if new_version > 1 else new_version,
+        'metadata': metadata or {}
+    }
+    write_json(os.path.join(feed_dir, VERSION_FILE), manifest)
+    logger.info(f'📡 发布feed版本 {new_version}: 新增 {len(added)}, 变化 {len(changed)}, 删除 {len(removed)}')
+    return manifest
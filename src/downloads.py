@@ -0,0 +1,216 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 64 * 1024
+MAX_IMAGE_BYTES = 5 * 1024 * 1024
+# 同一次运行中相同内容出现在这么多个不同图片地址时, 认为是站点的占位图
+PLACEHOLDER_MIN_URLS = 3
+PLACEHOLDERS_FILE = 'image_placeholders.json'
+IMAGE_SIGNATURES = ((b'\xff\xd8\xff', 'jpeg'), (b'\x89PNG\r\n\x1a\n', 'png'), (b'GIF87a', 'gif'), (b'GIF89a', 'gif'))
+SNIFF_BYTES = 12
+
+
+def sniff_image(head):
+    """按文件头判断图片格式, 不是图片时返回None"""
+    for signature, kind in IMAGE_SIGNATURES:
+        if head.startswith(signature):
+            return kind
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return 'webp'
+    return None
+
+
+class ImageRejected(Exception):
+    """下载的内容不能作为产品图片保存"""
+
+    def __init__(self, reason, detail=''):
+        super().__init__(f'{reason}: {detail}' if detail else reason)
+        self.reason = reason
+
+
+class DownloadStats:
+    """图片下载统计 (线程安全): 保存的字节数, 以及被拒绝的下载浪费的字节数"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.saved = 0
+        self.saved_bytes = 0
+        self.existing = 0
+        self.rejected = {}
+        self.wasted_bytes = 0
+
+    def record_saved(self, size):
+        with self.lock:
+            self.saved += 1
+            self.saved_bytes += size
+
+    def record_existing(self):
+        with self.lock:
+            self.existing += 1
+
+    def record_rejected(self, reason, size):
+        with self.lock:
+            self.rejected[reason] = self.rejected.get(reason, 0) + 1
+            self.wasted_bytes += size
+
+    def record_purged(self, size):
+        """已保存的图片事后被识别为占位图: 从保存数转入丢弃数"""
+        with self.lock:
+            self.saved -= 1
+            self.saved_bytes -= size
+            self.rejected['placeholder'] = self.rejected.get('placeholder', 0) + 1
+            self.wasted_bytes += size
+
+    def summary(self, images_dir=None):
+        with self.lock:
+            summary = {
+                'saved': self.saved,
+                'saved_bytes': self.saved_bytes,
+                'existing': self.existing,
+                'rejected': dict(self.rejected),
+                'wasted_bytes': self.wasted_bytes
+            }
+        if images_dir and os.path.isdir(images_dir):
+            summary['storage_bytes'] = sum(entry.stat().st_size for entry in os.scandir(images_dir) if entry.is_file())
+        return summary
+
+
+class PlaceholderDetector:
+    """占位图识别: 已知占位图的内容哈希持久化保存, 运行中相同内容对应多个地址时加入
+
+    达到 min_urls 之前这些地址的内容已作为正常图片保存, 识别时把它们的路径
+    移入 stale, 由 purge 删除。
+    """
+
+    def __init__(self, path=None, min_urls=PLACEHOLDER_MIN_URLS):
+        self.path = path
+        self.min_urls = min_urls
+        self.lock = threading.Lock()
+        self.known = set()
+        self.urls = {}
+        self.paths = {}
+        self.stale = []
+        self.dirty = False
+        if path and os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    self.known = set(json.load(f))
+            except (OSError, ValueError) as e:
+                logger.warning(f'⚠️ 无法读取占位图列表 {path}: {e}')
+
+    def check(self, digest, url, path=None):
+        """内容是否为占位图; 不是时记下将要保存的路径"""
+        with self.lock:
+            if digest in self.known:
+                return True
+            urls = self.urls.setdefault(digest, set())
+            urls.add(url)
+            if len(urls) >= self.min_urls:
+                logger.info(f'🪧 识别出占位图 {digest[:10]} (出现在 {len(urls)} 个图片地址)')
+                self.known.add(digest)
+                self.stale.extend(self.paths.pop(digest, []))
+                self.dirty = True
+                return True
+            if path:
+                self.paths.setdefault(digest, []).append(path)
+        return False
+
+    def purge(self, stats=None):
+        """删除识别前已保存的占位图文件, 返回被删除的文件名集合"""
+        with self.lock:
+            stale, self.stale = self.stale, []
+        removed = set()
+        for path in stale:
+            if not os.path.exists(path):
+                continue
+            size = os.path.getsize(path)
+            os.remove(path)
+            if stats:
+                stats.record_purged(size)
+            removed.add(os.path.basename(path))
+        if removed:
+            logger.info(f'🧹 删除识别前已保存的占位图 {len(removed)} 张')
+        return removed
+
+    def merge(self, other):
+        """并入另一个识别器 (同一占位图列表文件) 新识别的占位图"""
+        with self.lock:
+            self.known |= other.known
+            self.dirty = self.dirty or other.dirty
+
+    def save(self):
+        if not self.path or not self.dirty:
+            return
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump(sorted(self.known), f, indent=2)
+        self.dirty = False
+
+
+class ImageDownload:
+    """一次流式图片下载: 分块写入临时文件, 边写边检查大小和文件头, 完成后检查占位图再改名
+
+    同步 (requests iter_content) 和异步 (httpx aiter_bytes) 下载共用。
+    """
+
+    def __init__(self, url, path, stats, placeholders=None, max_bytes=MAX_IMAGE_BYTES):
+        self.url = url
+        self.path = path
+        self.tmp_path = f'{path}.part'
+        self.stats = stats
+        self.placeholders = placeholders
+        self.max_bytes = max_bytes
+        self.file = None
+        self.size = 0
+        self.head = b''
+        self.digest = hashlib.sha1()
+
+    def check_headers(self, headers):
+        """按响应头提前拒绝: 非图片类型或声明的长度超过上限"""
+        content_type = headers.get('content-type', '').split(';')[0].strip().lower()
+        if content_type and not content_type.startswith('image/') and content_type != 'application/octet-stream':
+            raise ImageRejected('content_type', content_type)
+        length = headers.get('content-length')
+        if length and length.isdigit() and int(length) > self.max_bytes:
+            raise ImageRejected('too_large', f'{length} bytes')
+
+    def write(self, chunk):
+        if self.file is None:
+            self.file = open(self.tmp_path, 'wb')
+        if len(self.head) < SNIFF_BYTES:
+            self.head += chunk[:SNIFF_BYTES - len(self.head)]
+            if len(self.head) >= SNIFF_BYTES and not sniff_image(self.head):
+                self.size += len(chunk)
+                raise ImageRejected('not_image', repr(self.head[:8]))
+        self.size += len(chunk)
+        if self.size > self.max_bytes:
+            raise ImageRejected('too_large', f'> {self.max_bytes} bytes')
+        self.digest.update(chunk)
+        self.file.write(chunk)
+
+    def commit(self):
+        """校验完整内容并保存为目标文件, 返回保存的字节数"""
+        self.close()
+        if not sniff_image(self.head):
+            raise ImageRejected('not_image', repr(self.head[:8]))
+        if self.placeholders and self.placeholders.check(self.digest.hexdigest(), self.url, self.path):
+            raise ImageRejected('placeholder', self.digest.hexdigest()[:10])
+        os.replace(self.tmp_path, self.path)
+        self.stats.record_saved(self.size)
+        return self.size
+
+    def abort(self, reason):
+        """丢弃临时文件, 已传输的字节计入浪费"""
+        self.close()
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+        self.stats.record_rejected(reason, self.size)
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
@@ -1,15 +1,108 @@
 #!/usr/bin/env python3
 import os
 import json
-from datetime import datetime
 import logging
 
+from images import PHASH_FILE, image_aliases, load_manifest, load_phash_index, srcset, thumbnail
+from publish import build_assets
+from stats import dashboard_stats, load_history
+
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(levelname)s - %(message)s'
 )
 logger = logging.getLogger(__name__)
 
+# 卡片图片的显示宽度, 配合srcset让浏览器挑选合适的衍生图
+IMAGE_SIZES = '(max-width: 768px) 100vw, 320px'
+# 虚拟滚动按固定行高计算可见范围, 卡片高度和间距需与CSS一致
+CARD_HEIGHT = 545
+GRID_GAP = 25
+# products.json 中保留的字段 (卡片、筛选和排序用到的)
+CARD_FIELDS = ('key', 'brand', 'name', 'category', 'current_price', 'original_price', 'discount',
+               'price_cents', 'product_url', 'image_url', 'local_image', 'thumbnail',
+               'srcset_webp', 'srcset_jpg', 'scraped_at', 'deal_score')
+
+# Service worker: 重复访问时页面和数据直接从缓存加载, 页面再用很小的资源清单判断是否有新数据。
+# 带内容哈希的资源和图片 (文件名不随内容改写) 缓存优先; 页面和其他数据 stale-while-revalidate;
+# 清单文件总是走网络。修改缓存策略时递增 VERSION, 旧缓存在激活时删除。
+SERVICE_WORKER_JS = '''// 由 generate_html.py 生成
+const CACHE_PREFIX = 'snowboards-';
+const VERSION = 'v1';
+const PAGE_CACHE = `${CACHE_PREFIX}pages-${VERSION}`;
+const ASSET_CACHE = `${CACHE_PREFIX}assets-${VERSION}`;
+const MAX_ASSET_ENTRIES = 600;
+// 页面缓存里除了页面本身还有按产品打开的价格序列 (series/*.json), 同样限制条目数
+const MAX_PAGE_ENTRIES = 200;
+const HASHED = /\\.[0-9a-f]{10}\\.[a-z]+$/;
+const NETWORK_ONLY = ['asset-manifest.json', 'feed/version.json'];
+
+self.addEventListener('install', event => {
+  event.waitUntil(caches.open(PAGE_CACHE)
+    .then(cache => cache.add(self.registration.scope))
+    .then(() => self.skipWaiting()));
+});
+
+self.addEventListener('activate', event => {
+  event.waitUntil(caches.keys()
+    .then(keys => Promise.all(keys
+      .filter(key => key.startsWith(CACHE_PREFIX) && key !== PAGE_CACHE && key !== ASSET_CACHE)
+      .map(key => caches.delete(key))))
+    .then(() => self.clients.claim()));
+});
+
+async function trimCache(cache, limit) {
+  // keys() 按加入顺序返回, 超出上限时删除最早加入的 (页面本身始终保留)
+  const keys = (await cache.keys()).filter(key => key.url !== self.registration.scope);
+  for (const key of keys.slice(0, Math.max(0, keys.length - limit))) {
+    await cache.delete(key);
+  }
+}
+
+async function cacheFirst(request) {
+  const cache = await caches.open(ASSET_CACHE);
+  const cached = await cache.match(request);
+  if (cached) return cached;
+  const response = await fetch(request);
+  if (response.ok) {
+    await cache.put(request, response.clone());
+    trimCache(cache, MAX_ASSET_ENTRIES);
+  }
+  return response;
+}
+
+async function staleWhileRevalidate(event, key) {
+  const cache = await caches.open(PAGE_CACHE);
+  const cached = await cache.match(key);
+  const network = fetch(event.request).then(response => {
+    if (response.ok) {
+      event.waitUntil(cache.put(key, response.clone()).then(() => trimCache(cache, MAX_PAGE_ENTRIES)));
+    }
+    return response;
+  });
+  if (cached) {
+    event.waitUntil(network.catch(() => {}));
+    return cached;
+  }
+  return network;
+}
+
+self.addEventListener('fetch', event => {
+  const request = event.request;
+  const url = new URL(request.url);
+  if (request.method !== 'GET' || url.origin !== self.location.origin) return;
+  const path = url.pathname.slice(new URL(self.registration.scope).pathname.length);
+  if (NETWORK_ONLY.includes(path)) return;
+  if (HASHED.test(path) || path.startsWith('images/')) {
+    event.respondWith(cacheFirst(request));
+  } else {
+    // 页面以作用域地址为键, "/" 和 "/index.html" 共用一份缓存
+    const key = request.mode === 'navigate' ? self.registration.scope : request;
+    event.respondWith(staleWhileRevalidate(event, key));
+  }
+});
+'''
+
 def generate_github_pages_html():
     data_file = 'web/data.json'
     if not os.path.exists(data_file):
@@ -26,69 +119,35 @@ def generate_github_pages_html():
         logger.warning('没有产品数据')
         return None
     
-    total_products = len(products)
-    brands = {}
-    categories = {}
-    price_stats = {
-        'under_500': 0,
-        '500_1000': 0,
-        'over_1000': 0
-    }
-    
+    # 附加缩略图和srcset, 卡片按显示宽度加载合适尺寸的图片; 重复图片统一指向规范图片
+    image_manifest = load_manifest('web/images')
+    aliases = image_aliases(load_phash_index(os.path.join('data', PHASH_FILE)))
     for product in products:
-        brand = product.get('brand', '未知品牌')
-        brands[brand] = brands.get(brand, 0) + 1
-        
-        category = product.get('category', '其他')
-        categories[category] = categories.get(category, 0) + 1
-        
-        try:
-            price_str = str(product.get('current_price', '0')).replace('$', '').replace(',', '')
-            price = float(price_str) if price_str else 0
-            if price < 500:
-                price_stats['under_500'] += 1
-            elif price <= 1000:
-                price_stats['500_1000'] += 1
-            else:
-                price_stats['over_1000'] += 1
-        except:
-            pass
+        if product.get('local_image') in aliases:
+            product['local_image'] = aliases[product['local_image']]
+        entry = image_manifest.get(product.get('local_image'))
+        if entry:
+            product['thumbnail'] = thumbnail(entry)
+            product['srcset_webp'] = srcset(entry, 'webp')
+            product['srcset_jpg'] = srcset(entry, 'jpg')
     
-    top_brands = sorted(brands.items(), key=lambda x: x[1], reverse=True)[:10]
-    brands_data_js = ',\n            '.join([f"{{brand: '{b}', count: {c}}}" for b, c in top_brands])
+    # 品牌/类别计数、价格分布、品牌价格区间和每日涨跌都由向量化的统计模块计算
+    history = load_history('data') if os.path.isdir('data') else None
+    stats = dashboard_stats(products, history)
+    price_options = ''.join(
+        f'<option value="{lo * 100}-{hi * 100 if hi else ""}">{label}</option>'
+        for lo, hi, label in zip(stats['price_edges'], stats['price_edges'][1:] + [None], stats['price_labels'])
+    )
     
-    product_cards = []
-    for product in products[:50]:
-        image_src = product.get('local_image', '')
-        if image_src and os.path.exists(os.path.join('web/images', image_src)):
-            img_tag = f'<img src="images/{image_src}" alt="{product["name"]}" class="product-img">'
-        elif product.get('image_url'):
-            img_tag = f'<img src="{product["image_url"]}" alt="{product["name"]}" class="product-img">'
-        else:
-            img_tag = '<div class="no-image">暂无图片</div>'
-        
-        price_html = f'<span class="current-price">{product.get("current_price", "价格待定")}</span>'
-        if product.get('original_price'):
-            price_html = f'<span class="original-price">{product["original_price"]}</span> {price_html}'
-        if product.get('discount'):
-            price_html += f' <span class="discount-badge">{product["discount"]}</span>'
-        
-        card = f'''
-        <div class="product-card">
-            <div class="product-image">
-                {img_tag}
-            </div>
-            <div class="product-info">
-                <h3>{product.get("brand", "")} - {product.get("name", "")}</h3>
-                <div class="product-category">{product.get("category", "")}</div>
-                <div class="product-price">
-                    {price_html}
-                </div>
-                {f'<a href="{product.get("product_url", "#")}" target="_blank" class="view-btn">查看详情 →</a>' if product.get("product_url") else ''}
-            </div>
-        </div>
-        '''
-        product_cards.append(card)
+    # 产品数据单独输出为JSON资源, 页面只内嵌带内容哈希的文件名; 数据不变时浏览器直接用缓存,
+    # 页面大小和首屏时间与产品数量无关
+    card_products = [{field: product[field] for field in CARD_FIELDS if product.get(field) is not None}
+                     for product in products]
+    products_json = json.dumps(card_products, ensure_ascii=False, separators=(',', ':'))
+    with open('web/products.json', 'w', encoding='utf-8') as f:
+        f.write(products_json)
+    asset_manifest = build_assets('web')
+    assets = asset_manifest['assets']
     
     html_content = f'''<!DOCTYPE html>
 <html lang="zh-CN">
@@ -236,12 +295,21 @@ def generate_github_pages_html():
         }}
         
         .products-grid {{
-            display: grid;
-            grid-template-columns: repeat(auto-fill, minmax(320px, 1fr));
-            gap: 25px;
+            position: relative;
             margin: 2rem 0;
         }}
         
+        .products-grid .product-card {{
+            position: absolute;
+            height: {CARD_HEIGHT}px;
+        }}
+        
+        .grid-message {{
+            text-align: center;
+            padding: 3rem;
+            color: var(--text-light);
+        }}
+        
         .product-card {{
             background: var(--card-bg);
             border-radius: 15px;
@@ -422,6 +490,89 @@ def generate_github_pages_html():
             color: var(--text-color);
         }}
         
+        .movers-list {{
+            list-style: none;
+        }}
+        
+        .movers-list li {{
+            display: flex;
+            justify-content: space-between;
+            gap: 10px;
+            padding: 8px 0;
+            border-bottom: 1px solid var(--border-color);
+            font-size: 0.9rem;
+        }}
+        
+        .movers-list .drop {{
+            color: var(--secondary-color);
+            white-space: nowrap;
+        }}
+        
+        .movers-list .rise {{
+            color: var(--accent-color);
+            white-space: nowrap;
+        }}
+        
+        .trend-btn {{
+            background: none;
+            border: 2px solid var(--primary-color);
+            color: var(--primary-color);
+            padding: 6px 14px;
+            border-radius: 25px;
+            cursor: pointer;
+            font-size: 0.85rem;
+        }}
+        
+        .trend-overlay {{
+            position: absolute;
+            top: 15px;
+            left: 15px;
+            background: rgba(255,255,255,0.9);
+        }}
+        
+        .trend-modal {{
+            display: none;
+            position: fixed;
+            inset: 0;
+            background: rgba(0,0,0,0.5);
+            z-index: 900;
+            align-items: center;
+            justify-content: center;
+        }}
+        
+        .trend-modal.open {{
+            display: flex;
+        }}
+        
+        .trend-dialog {{
+            background: var(--card-bg);
+            border-radius: 15px;
+            padding: 25px;
+            width: min(720px, 92vw);
+        }}
+        
+        .trend-header {{
+            display: flex;
+            justify-content: space-between;
+            align-items: flex-start;
+            gap: 10px;
+        }}
+        
+        .trend-close {{
+            background: none;
+            border: none;
+            font-size: 1.8rem;
+            line-height: 1;
+            color: var(--text-light);
+            cursor: pointer;
+        }}
+        
+        .trend-tabs {{
+            display: flex;
+            gap: 10px;
+            margin-bottom: 15px;
+        }}
+        
         .search-input {{
             padding: 10px 20px;
             border: 2px solid var(--border-color);
@@ -438,18 +589,6 @@ def generate_github_pages_html():
             border-color: var(--primary-color);
         }}
         
-        .pagination {{
-            margin: 2rem 0;
-            text-align: center;
-        }}
-        
-        .pagination-controls {{
-            display: flex;
-            justify-content: center;
-            gap: 10px;
-            flex-wrap: wrap;
-        }}
-        
         .pagination-btn {{
             padding: 8px 16px;
             border: 2px solid var(--border-color);
@@ -472,11 +611,6 @@ def generate_github_pages_html():
             border-color: var(--primary-color);
         }}
         
-        .pagination-ellipsis {{
-            padding: 8px 5px;
-            color: var(--text-light);
-        }}
-        
         .notification {{
             position: fixed;
             top: 20px;
@@ -540,10 +674,6 @@ def generate_github_pages_html():
                 justify-content: center;
             }}
             
-            .products-grid {{
-                grid-template-columns: 1fr;
-            }}
-            
             .filters {{
                 justify-content: center;
             }}
@@ -582,7 +712,7 @@ def generate_github_pages_html():
                     <i class="fas fa-snowboarding"></i>
                 </div>
                 <div class="stat-content">
-                    <h3 id="total-products">{total_products}</h3>
+                    <h3 id="total-products">{stats['total_products']}</h3>
                     <p>总产品数量</p>
                 </div>
             </div>
@@ -591,7 +721,7 @@ def generate_github_pages_html():
                     <i class="fas fa-tags"></i>
                 </div>
                 <div class="stat-content">
-                    <h3 id="brands-count">{len(brands)}</h3>
+                    <h3 id="brands-count">{stats['brand_count']}</h3>
                     <p>品牌数量</p>
                 </div>
             </div>
@@ -600,7 +730,7 @@ def generate_github_pages_html():
                     <i class="fas fa-filter"></i>
                 </div>
                 <div class="stat-content">
-                    <h3 id="categories-count">{len(categories)}</h3>
+                    <h3 id="categories-count">{stats['category_count']}</h3>
                     <p>类别数量</p>
                 </div>
             </div>
@@ -624,6 +754,22 @@ def generate_github_pages_html():
                 <div class="chart-title">价格分布</div>
                 <canvas id="priceChart" height="200"></canvas>
             </div>
+            <div class="chart-container">
+                <div class="chart-title">折扣分布</div>
+                <canvas id="discountChart" height="200"></canvas>
+            </div>
+            <div class="chart-container">
+                <div class="chart-title">品牌价格区间 (最低/中位/最高)</div>
+                <canvas id="brandPriceChart" height="200"></canvas>
+            </div>
+            <div class="chart-container">
+                <div class="chart-title">每日价格变动</div>
+                <canvas id="dailyChart" height="200"></canvas>
+            </div>
+            <div class="chart-container">
+                <div class="chart-title">今日价格变动最大</div>
+                <ul id="movers-list" class="movers-list"></ul>
+            </div>
         </div>
         
         <div class="filters">
@@ -636,23 +782,36 @@ def generate_github_pages_html():
             </select>
             <select class="filter-select" id="price-filter" onchange="filterProducts()">
                 <option value="">所有价格</option>
-                <option value="under_500">$500以下</option>
-                <option value="500_1000">$500-$1000</option>
-                <option value="over_1000">$1000以上</option>
+                {price_options}
             </select>
+            <button class="trend-btn" id="brand-trend-btn" onclick="showBrandTrend()" style="display: none;">品牌价格走势</button>
+            <button class="trend-btn" id="best-deals-btn" onclick="showBestDeals()"{'' if assets.get('deals.json') else ' style="display: none;"'}>🔥 最佳优惠</button>
             <select class="filter-select" id="sort-by" onchange="sortProducts()">
                 <option value="name">按名称排序</option>
                 <option value="price_low">价格从低到高</option>
                 <option value="price_high">价格从高到低</option>
                 <option value="brand">按品牌排序</option>
+                <option value="deal">优惠分数从高到低</option>
             </select>
         </div>
         
-        <div id="products-container" class="products-grid">
-            {''.join(product_cards)}
-        </div>
+        <div id="grid-message" class="grid-message">正在加载产品...</div>
+        <div id="products-container" class="products-grid"></div>
+        <div id="grid-sentinel"></div>
         
-        <div id="pagination" class="pagination">
+        <div id="trend-modal" class="trend-modal" onclick="if (event.target === this) closeTrend()">
+            <div class="trend-dialog">
+                <div class="trend-header">
+                    <div class="chart-title" id="trend-title">价格走势</div>
+                    <button class="trend-close" onclick="closeTrend()">&times;</button>
+                </div>
+                <div class="trend-tabs">
+                    <button class="pagination-btn active" data-gran="day" onclick="renderTrend('day')">日</button>
+                    <button class="pagination-btn" data-gran="week" onclick="renderTrend('week')">周</button>
+                    <button class="pagination-btn" data-gran="month" onclick="renderTrend('month')">月</button>
+                </div>
+                <canvas id="trendChart" height="220"></canvas>
+            </div>
         </div>
     </main>
     
@@ -669,10 +828,26 @@ def generate_github_pages_html():
     </footer>
     
     <script>
-        let allProducts = {json.dumps(products, ensure_ascii=False)};
-        let currentProducts = [...allProducts];
-        let currentPage = 1;
-        const productsPerPage = 12;
+        const PRODUCTS_URL = '{assets['products.json']}';
+        const ASSET_VERSION = '{asset_manifest['version']}';
+        let assetVersion = ASSET_VERSION;
+        let dealsUrl = {json.dumps(assets.get('deals.json'))};
+        let dealsData = null;
+        let productsByKey = null;
+        const dashboardStats = {json.dumps(stats, ensure_ascii=False)};
+        const CARD_HEIGHT = {CARD_HEIGHT};
+        const GRID_GAP = {GRID_GAP};
+        const MIN_CARD_WIDTH = 320;
+        const BATCH_SIZE = 24;      // 滚动到底部时每次追加的产品数
+        const OVERSCAN_ROWS = 2;    // 可视区域上下额外渲染的行数
+        let allProducts = [];
+        let currentProducts = [];
+        let loadedCount = 0;
+        let gridColumns = 1;
+        let cardWidth = MIN_CARD_WIDTH;
+        let renderScheduled = false;
+        // 只有可视区域附近的卡片在DOM中: 产品下标 -> 卡片节点
+        const renderedCards = new Map();
         
         function toggleTheme() {{
             const currentTheme = document.documentElement.getAttribute('data-theme');
@@ -688,9 +863,33 @@ def generate_github_pages_html():
             const btn = document.querySelector('.refresh-btn i');
             btn.className = 'fas fa-spinner fa-spin';
             
-            setTimeout(() => {{
-                location.reload();
-            }}, 1000);
+            checkForUpdate(true).catch(error => {{
+                console.error('检查更新失败:', error);
+                showNotification('刷新失败, 请稍后重试', 'error');
+            }}).finally(() => {{
+                btn.className = 'fas fa-sync-alt';
+            }});
+        }}
+        
+        // 只下载很小的资源清单判断数据是否变化; 有新版本时按清单里带哈希的地址加载产品并重新渲染,
+        // 页面本身由service worker在后台更新, 下次打开时生效
+        async function checkForUpdate(notify) {{
+            const response = await fetch('asset-manifest.json', {{ cache: 'no-store' }});
+            if (!response.ok) throw new Error(`HTTP ${{response.status}}`);
+            const manifest = await response.json();
+            if (manifest.version === assetVersion) {{
+                if (notify) showNotification('数据已是最新', 'success');
+                return false;
+            }}
+            allProducts = await loadProducts(manifest.assets['products.json']);
+            assetVersion = manifest.version;
+            dealsUrl = manifest.assets['deals.json'] || null;
+            dealsData = null;
+            productsByKey = null;
+            initFilters();
+            filterProducts();
+            showNotification(`数据已更新 (${{manifest.updated}})`, 'success');
+            return true;
         }}
         
         function handleSearch() {{
@@ -706,6 +905,10 @@ def generate_github_pages_html():
             
             const brandFilter = document.getElementById('brand-filter');
             const categoryFilter = document.getElementById('category-filter');
+            // 重新加载数据时重建选项, 保留当前选择
+            const selected = [brandFilter.value, categoryFilter.value];
+            brandFilter.length = 1;
+            categoryFilter.length = 1;
             
             brands.forEach(brand => {{
                 const option = document.createElement('option');
@@ -720,10 +923,12 @@ def generate_github_pages_html():
                 option.textContent = category;
                 categoryFilter.appendChild(option);
             }});
+            [brandFilter.value, categoryFilter.value] = selected;
         }}
         
         function filterProducts() {{
             const brandFilter = document.getElementById('brand-filter').value;
+            document.getElementById('brand-trend-btn').style.display = brandFilter ? '' : 'none';
             const categoryFilter = document.getElementById('category-filter').value;
             const priceFilter = document.getElementById('price-filter').value;
             const searchTerm = document.getElementById('search-input').value.toLowerCase();
@@ -739,27 +944,17 @@ def generate_github_pages_html():
                 }}
                 
                 if (priceFilter) {{
-                    const priceStr = String(product.current_price || '0').replace('$', '').replace(',', '');
-                    const price = parseFloat(priceStr) || 0;
-                    
-                    switch(priceFilter) {{
-                        case 'under_500':
-                            if (price >= 500) return false;
-                            break;
-                        case '500_1000':
-                            if (price < 500 || price > 1000) return false;
-                            break;
-                        case 'over_1000':
-                            if (price <= 1000) return false;
-                            break;
-                    }}
+                    // 选项值为 "最低-最高" 美分, 最后一档没有上限
+                    const [low, high] = priceFilter.split('-');
+                    const cents = product.price_cents || 0;
+                    if (cents < Number(low)) return false;
+                    if (high && cents >= Number(high)) return false;
                 }}
                 
                 return true;
             }});
             
-            currentPage = 1;
-            displayProducts(currentProducts);
+            resetGrid();
         }}
         
         function sortProducts() {{
@@ -768,140 +963,230 @@ def generate_github_pages_html():
             currentProducts.sort((a, b) => {{
                 switch(sortBy) {{
                     case 'price_low':
-                        const priceA = parseFloat(String(a.current_price || '0').replace('$', '').replace(',', '')) || 0;
-                        const priceB = parseFloat(String(b.current_price || '0').replace('$', '').replace(',', '')) || 0;
-                        return priceA - priceB;
+                        return (a.price_cents || 0) - (b.price_cents || 0);
                         
                     case 'price_high':
-                        const priceA2 = parseFloat(String(a.current_price || '0').replace('$', '').replace(',', '')) || 0;
-                        const priceB2 = parseFloat(String(b.current_price || '0').replace('$', '').replace(',', '')) || 0;
-                        return priceB2 - priceA2;
+                        return (b.price_cents || 0) - (a.price_cents || 0);
                         
                     case 'brand':
                         return (a.brand || '').localeCompare(b.brand || '');
                         
+                    case 'deal':
+                        return (b.deal_score || 0) - (a.deal_score || 0);
+                        
                     default:
                         return (a.name || '').localeCompare(b.name || '');
                 }}
             }});
             
-            displayProducts(currentProducts);
+            resetGrid();
         }}
         
-        function displayProducts(products) {{
-            const container = document.getElementById('products-container');
-            
-            if (products.length === 0) {{
-                container.innerHTML = `
-                    <div style="grid-column: 1 / -1; text-align: center; padding: 3rem; color: var(--text-light);">
-                        <i class="fas fa-search" style="font-size: 3rem; margin-bottom: 1rem;"></i>
-                        <h3>没有找到匹配的产品</h3>
-                        <p>尝试调整筛选条件</p>
-                    </div>
-                `;
-                updatePagination(0);
+        // 最佳优惠: 各品牌/类别的前K名已由流水线预先计算, 这里只读取一个榜单
+        async function showBestDeals() {{
+            try {{
+                if (!dealsData) {{
+                    const response = await fetch(dealsUrl);
+                    if (!response.ok) throw new Error(`HTTP ${{response.status}}`);
+                    dealsData = await response.json();
+                }}
+            }} catch (error) {{
+                showNotification('暂无优惠排行数据', 'error');
                 return;
             }}
+            if (!productsByKey) productsByKey = new Map(allProducts.map(p => [p.key, p]));
+            const brand = document.getElementById('brand-filter').value;
+            const category = document.getElementById('category-filter').value;
+            const ranking = (brand ? dealsData.brands[brand] : category ? dealsData.categories[category] : dealsData.all) || [];
+            currentProducts = ranking.map(([key]) => productsByKey.get(key))
+                .filter(p => p && (!category || p.category === category));
+            resetGrid();
+            showNotification(`最佳优惠: 前 ${{currentProducts.length}} 个产品`, 'success');
+        }}
+        
+        function escapeHtml(value) {{
+            return String(value == null ? '' : value).replace(/[&<>"']/g, c => ({{
+                '&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;'
+            }})[c]);
+        }}
+        
+        // 图片进入可视区域附近时才设置src/srcset
+        const imageObserver = 'IntersectionObserver' in window ? new IntersectionObserver(entries => {{
+            entries.forEach(entry => {{
+                if (entry.isIntersecting) {{
+                    imageObserver.unobserve(entry.target);
+                    loadImage(entry.target);
+                }}
+            }});
+        }}, {{ rootMargin: '300px 0px' }}) : null;
+        
+        function loadImage(img) {{
+            img.parentElement.querySelectorAll('[data-srcset]').forEach(el => {{
+                el.srcset = el.dataset.srcset;
+            }});
+            img.src = img.dataset.src;
+        }}
+        
+        // 哨兵元素接近可视区域时追加下一批产品
+        const sentinelObserver = 'IntersectionObserver' in window ? new IntersectionObserver(entries => {{
+            if (!entries[0].isIntersecting || loadedCount >= currentProducts.length) return;
+            loadedCount = Math.min(loadedCount + BATCH_SIZE, currentProducts.length);
+            layoutGrid();
+            // 追加后哨兵可能仍在可视区域内, 重新观察以再次触发
+            sentinelObserver.unobserve(entries[0].target);
+            sentinelObserver.observe(entries[0].target);
+        }}, {{ rootMargin: '600px 0px' }}) : null;
+        
+        function createCard(product) {{
+            const imageUrl = product.thumbnail ? `images/${{product.thumbnail}}` :
+                            product.local_image ? `images/${{product.local_image}}` : 
+                            product.image_url || 'https://via.placeholder.com/300x200?text=No+Image';
+            const webpSource = product.srcset_webp ?
+                `<source type="image/webp" data-srcset="${{product.srcset_webp}}" sizes="{IMAGE_SIZES}">` : '';
+            const jpgSrcset = product.srcset_jpg ? `data-srcset="${{product.srcset_jpg}}" sizes="{IMAGE_SIZES}"` : '';
             
-            const startIndex = (currentPage - 1) * productsPerPage;
-            const endIndex = startIndex + productsPerPage;
-            const pageProducts = products.slice(startIndex, endIndex);
-            const totalPages = Math.ceil(products.length / productsPerPage);
+            const priceHtml = product.current_price ? 
+                `<div class="current-price">${{escapeHtml(product.current_price)}}</div>` : 
+                `<div class="current-price">价格待定</div>`;
             
-            let html = '';
-            pageProducts.forEach(product => {{
-                const imageUrl = product.local_image ? `images/${{product.local_image}}` : 
-                                product.image_url || 'https://via.placeholder.com/300x200?text=No+Image';
-                
-                const priceHtml = product.current_price ? 
-                    `<div class="current-price">${{product.current_price}}</div>` : 
-                    `<div class="current-price">价格待定</div>`;
-                
-                const originalPriceHtml = product.original_price ? 
-                    `<div class="original-price">${{product.original_price}}</div>` : '';
-                
-                const discountBadge = product.discount ? 
-                    `<span class="product-badge">${{product.discount}}</span>` : '';
-                
-                const categoryBadge = product.category ? 
-                    `<div class="product-category">${{product.category}}</div>` : '';
-                
-                const viewButton = product.product_url ? 
-                    `<a href="${{product.product_url}}" class="view-btn" target="_blank">
-                        <i class="fas fa-external-link-alt"></i> 查看详情
-                    </a>` : 
-                    `<button class="view-btn" disabled>
-                        <i class="fas fa-ban"></i> 无链接
-                    </button>`;
-                
-                html += `
-                <div class="product-card">
-                    <div class="product-image">
-                        <img src="${{imageUrl}}" alt="${{product.name}}" 
-                             onerror="this.src='https://via.placeholder.com/300x200?text=图片加载失败'">
-                        ${{discountBadge}}
+            const originalPriceHtml = product.original_price ? 
+                `<div class="original-price">${{escapeHtml(product.original_price)}}</div>` : '';
+            
+            const discountBadge = product.discount ? 
+                `<span class="product-badge">${{escapeHtml(product.discount)}}</span>` : '';
+            
+            const categoryBadge = product.category ? 
+                `<div class="product-category">${{escapeHtml(product.category)}}</div>` : '';
+            
+            const viewButton = product.product_url ? 
+                `<a href="${{escapeHtml(product.product_url)}}" class="view-btn" target="_blank">
+                    <i class="fas fa-external-link-alt"></i> 查看详情
+                </a>` : 
+                `<button class="view-btn" disabled>
+                    <i class="fas fa-ban"></i> 无链接
+                </button>`;
+            
+            const card = document.createElement('div');
+            card.className = 'product-card';
+            card.innerHTML = `
+                <div class="product-image">
+                    <picture>
+                        ${{webpSource}}
+                        <img data-src="${{escapeHtml(imageUrl)}}" ${{jpgSrcset}} alt="${{escapeHtml(product.name)}}"
+                             onerror="this.onerror=null; this.src='https://via.placeholder.com/300x200?text=图片加载失败'">
+                    </picture>
+                    ${{discountBadge}}
+                    ${{product.key ? `<button class="trend-btn trend-overlay" onclick="showTrend('${{product.key}}')">价格走势</button>` : ''}}
+                </div>
+                <div class="product-content">
+                    <div class="product-brand">${{escapeHtml(product.brand || '未知品牌')}}</div>
+                    <h3 class="product-title">${{escapeHtml(product.name || '未命名产品')}}</h3>
+                    ${{categoryBadge}}
+                    <div class="product-price">
+                        ${{originalPriceHtml}}
+                        ${{priceHtml}}
                     </div>
-                    <div class="product-content">
-                        <div class="product-brand">${{product.brand || '未知品牌'}}</div>
-                        <h3 class="product-title">${{product.name || '未命名产品'}}</h3>
-                        ${{categoryBadge}}
-                        <div class="product-price">
-                            ${{originalPriceHtml}}
-                            ${{priceHtml}}
-                        </div>
-                        <div class="product-footer">
-                            ${{viewButton}}
-                            <small>${{product.scraped_at ? new Date(product.scraped_at).toLocaleDateString('zh-CN') : ''}}</small>
-                        </div>
+                    <div class="product-footer">
+                        ${{viewButton}}
+                        <small>${{product.scraped_at ? new Date(product.scraped_at).toLocaleDateString('zh-CN') : ''}}</small>
                     </div>
                 </div>
-                `;
-            }});
-            
-            container.innerHTML = html;
-            updatePagination(totalPages);
+            `;
+            const img = card.querySelector('img');
+            if (imageObserver) {{
+                imageObserver.observe(img);
+            }} else {{
+                loadImage(img);
+            }}
+            return card;
         }}
         
-        function updatePagination(totalPages) {{
-            const pagination = document.getElementById('pagination');
-            
-            if (totalPages <= 1) {{
-                pagination.innerHTML = '';
-                return;
-            }}
+        function positionCard(card, index) {{
+            const row = Math.floor(index / gridColumns);
+            const column = index % gridColumns;
+            card.style.width = `${{cardWidth}}px`;
+            card.style.left = `${{column * (cardWidth + GRID_GAP)}}px`;
+            card.style.top = `${{row * (CARD_HEIGHT + GRID_GAP)}}px`;
+        }}
+        
+        function removeCard(index) {{
+            const card = renderedCards.get(index);
+            if (imageObserver) imageObserver.unobserve(card.querySelector('img'));
+            card.remove();
+            renderedCards.delete(index);
+        }}
+        
+        // 筛选或排序后从头开始
+        function resetGrid() {{
+            [...renderedCards.keys()].forEach(removeCard);
+            loadedCount = Math.min(BATCH_SIZE, currentProducts.length);
             
-            let html = '<div class="pagination-controls">';
+            const message = document.getElementById('grid-message');
+            message.style.display = currentProducts.length ? 'none' : '';
+            message.innerHTML = `
+                <i class="fas fa-search" style="font-size: 3rem; margin-bottom: 1rem;"></i>
+                <h3>没有找到匹配的产品</h3>
+                <p>尝试调整筛选条件</p>
+            `;
             
-            if (currentPage > 1) {{
-                html += `<button onclick="changePage(${{currentPage - 1}})" class="pagination-btn">
-                    <i class="fas fa-chevron-left"></i> 上一页
-                </button>`;
+            layoutGrid();
+            if (!sentinelObserver) {{
+                // 不支持IntersectionObserver时一次性放入全部产品, 仍然只渲染可见行
+                loadedCount = currentProducts.length;
+                layoutGrid();
             }}
+        }}
+        
+        // 按容器宽度计算列数和卡片宽度, 容器高度撑开到已加载的全部行
+        function layoutGrid() {{
+            const container = document.getElementById('products-container');
+            const width = container.clientWidth;
+            gridColumns = Math.max(1, Math.floor((width + GRID_GAP) / (MIN_CARD_WIDTH + GRID_GAP)));
+            cardWidth = (width - GRID_GAP * (gridColumns - 1)) / gridColumns;
+            const rows = Math.ceil(loadedCount / gridColumns);
+            container.style.height = rows ? `${{rows * (CARD_HEIGHT + GRID_GAP) - GRID_GAP}}px` : '0';
+            renderedCards.forEach((card, index) => positionCard(card, index));
+            renderVisible();
+        }}
+        
+        // 只保留可视区域 (加上下缓冲行) 内的卡片节点
+        function renderVisible() {{
+            renderScheduled = false;
+            const container = document.getElementById('products-container');
+            const rowHeight = CARD_HEIGHT + GRID_GAP;
+            const offset = -container.getBoundingClientRect().top;
+            const firstRow = Math.max(0, Math.floor(offset / rowHeight) - OVERSCAN_ROWS);
+            const lastRow = Math.floor((offset + window.innerHeight) / rowHeight) + OVERSCAN_ROWS;
+            const start = firstRow * gridColumns;
+            const end = Math.min(loadedCount, (lastRow + 1) * gridColumns);
             
-            for (let i = 1; i <= totalPages; i++) {{
-                if (i === 1 || i === totalPages || (i >= currentPage - 2 && i <= currentPage + 2)) {{
-                    html += `<button onclick="changePage(${{i}})" class="pagination-btn ${{i === currentPage ? 'active' : ''}}">
-                        ${{i}}
-                    </button>`;
-                }} else if (i === currentPage - 3 || i === currentPage + 3) {{
-                    html += '<span class="pagination-ellipsis">...</span>';
-                }}
-            }}
+            [...renderedCards.keys()].forEach(index => {{
+                if (index < start || index >= end) removeCard(index);
+            }});
             
-            if (currentPage < totalPages) {{
-                html += `<button onclick="changePage(${{currentPage + 1}})" class="pagination-btn">
-                    下一页 <i class="fas fa-chevron-right"></i>
-                </button>`;
+            const fragment = document.createDocumentFragment();
+            for (let index = start; index < end; index++) {{
+                if (renderedCards.has(index)) continue;
+                const card = createCard(currentProducts[index]);
+                positionCard(card, index);
+                renderedCards.set(index, card);
+                fragment.appendChild(card);
             }}
-            
-            html += '</div>';
-            pagination.innerHTML = html;
+            container.appendChild(fragment);
         }}
         
-        function changePage(page) {{
-            currentPage = page;
-            displayProducts(currentProducts);
-            window.scrollTo({{ top: 0, behavior: 'smooth' }});
+        function scheduleRender() {{
+            if (!renderScheduled) {{
+                renderScheduled = true;
+                requestAnimationFrame(renderVisible);
+            }}
+        }}
+        
+        function loadProducts(url = PRODUCTS_URL) {{
+            return fetch(url).then(response => {{
+                if (!response.ok) throw new Error(`HTTP ${{response.status}}`);
+                return response.json();
+            }});
         }}
         
         function showNotification(message, type = 'info') {{
@@ -926,16 +1211,16 @@ def generate_github_pages_html():
         }}
         
         function initCharts() {{
-            const brandsData = [{brands_data_js}];
+            const brandsData = dashboardStats.top_brands;
             
             const brandsCtx = document.getElementById('brandsChart').getContext('2d');
             new Chart(brandsCtx, {{
                 type: 'bar',
                 data: {{
-                    labels: brandsData.map(item => item.brand),
+                    labels: brandsData.map(item => item[0]),
                     datasets: [{{
                         label: '产品数量',
-                        data: brandsData.map(item => item.count),
+                        data: brandsData.map(item => item[1]),
                         backgroundColor: 'rgba(102, 126, 234, 0.7)',
                         borderColor: 'rgba(102, 126, 234, 1)',
                         borderWidth: 1
@@ -959,18 +1244,16 @@ def generate_github_pages_html():
             new Chart(priceCtx, {{
                 type: 'pie',
                 data: {{
-                    labels: ['< $500', '$500-$1000', '> $1000'],
+                    labels: dashboardStats.price_labels,
                     datasets: [{{
-                        data: [{price_stats['under_500']}, {price_stats['500_1000']}, {price_stats['over_1000']}],
+                        data: dashboardStats.price_histogram,
                         backgroundColor: [
                             'rgba(52, 152, 219, 0.7)',
                             'rgba(46, 204, 113, 0.7)',
-                            'rgba(155, 89, 182, 0.7)'
-                        ],
-                        borderColor: [
-                            'rgba(52, 152, 219, 1)',
-                            'rgba(46, 204, 113, 1)',
-                            'rgba(155, 89, 182, 1)'
+                            'rgba(155, 89, 182, 0.7)',
+                            'rgba(241, 196, 15, 0.7)',
+                            'rgba(231, 76, 60, 0.7)',
+                            'rgba(149, 165, 166, 0.7)'
                         ],
                         borderWidth: 1
                     }}]
@@ -984,6 +1267,172 @@ def generate_github_pages_html():
                     }}
                 }}
             }});
+            
+            new Chart(document.getElementById('discountChart').getContext('2d'), {{
+                type: 'bar',
+                data: {{
+                    labels: dashboardStats.discount_labels,
+                    datasets: [{{
+                        label: '产品数量',
+                        data: dashboardStats.discount_histogram,
+                        backgroundColor: 'rgba(231, 76, 60, 0.7)'
+                    }}]
+                }},
+                options: {{
+                    responsive: true,
+                    plugins: {{ legend: {{ display: false }} }},
+                    scales: {{ y: {{ beginAtZero: true, ticks: {{ stepSize: 1 }} }} }}
+                }}
+            }});
+            
+            // 品牌价格区间: 浮动柱表示最低到最高, 点表示中位数
+            const brandPrices = [...dashboardStats.brand_prices].sort((a, b) => b.count - a.count).slice(0, 10);
+            new Chart(document.getElementById('brandPriceChart').getContext('2d'), {{
+                type: 'bar',
+                data: {{
+                    labels: brandPrices.map(item => item.label),
+                    datasets: [{{
+                        type: 'line',
+                        label: '中位价',
+                        data: brandPrices.map(item => item.median),
+                        showLine: false,
+                        borderColor: 'rgba(231, 76, 60, 1)',
+                        backgroundColor: 'rgba(231, 76, 60, 1)'
+                    }}, {{
+                        label: '价格区间',
+                        data: brandPrices.map(item => [item.min, item.max]),
+                        backgroundColor: 'rgba(52, 152, 219, 0.5)'
+                    }}]
+                }},
+                options: {{
+                    responsive: true,
+                    plugins: {{ legend: {{ position: 'bottom' }} }}
+                }}
+            }});
+            
+            const daily = dashboardStats.daily || [];
+            new Chart(document.getElementById('dailyChart').getContext('2d'), {{
+                type: 'bar',
+                data: {{
+                    labels: daily.map(item => item.date),
+                    datasets: [{{
+                        label: '降价',
+                        data: daily.map(item => item.drops),
+                        backgroundColor: 'rgba(46, 204, 113, 0.7)'
+                    }}, {{
+                        label: '涨价',
+                        data: daily.map(item => item.rises),
+                        backgroundColor: 'rgba(231, 76, 60, 0.7)'
+                    }}]
+                }},
+                options: {{
+                    responsive: true,
+                    plugins: {{ legend: {{ position: 'bottom' }} }},
+                    scales: {{ y: {{ beginAtZero: true, ticks: {{ stepSize: 1 }} }} }}
+                }}
+            }});
+            
+            const movers = dashboardStats.movers || {{ drops: [], rises: [] }};
+            const moverItems = [...movers.drops, ...movers.rises].map(item => `
+                <li>
+                    <span>${{escapeHtml(item.name)}}</span>
+                    <span class="${{item.change_pct < 0 ? 'drop' : 'rise'}}">
+                        $${{item.previous.toFixed(2)}} → $${{item.price.toFixed(2)}} (${{item.change_pct}}%)
+                    </span>
+                </li>`);
+            document.getElementById('movers-list').innerHTML = moverItems.length ?
+                moverItems.join('') : '<li>今日没有价格变动</li>';
+        }}
+        
+        // 价格走势: 序列文件只在打开时下载, 已下载的按文件名缓存
+        const seriesCache = {{}};
+        let trendChart = null;
+        let trendSeries = null;
+        
+        function loadSeries(file) {{
+            if (!seriesCache[file]) {{
+                seriesCache[file] = fetch(`series/${{file}}`).then(response => {{
+                    if (!response.ok) throw new Error(`HTTP ${{response.status}}`);
+                    return response.json();
+                }}).catch(error => {{
+                    delete seriesCache[file];
+                    throw error;
+                }});
+            }}
+            return seriesCache[file];
+        }}
+        
+        async function openTrend(file) {{
+            try {{
+                trendSeries = await loadSeries(file);
+            }} catch (error) {{
+                showNotification('暂无价格走势数据', 'error');
+                return;
+            }}
+            document.getElementById('trend-title').textContent = trendSeries.name;
+            document.getElementById('trend-modal').classList.add('open');
+            renderTrend('day');
+        }}
+        
+        function showTrend(key) {{
+            openTrend(`${{key}}.json`);
+        }}
+        
+        async function showBrandTrend() {{
+            const brand = document.getElementById('brand-filter').value;
+            try {{
+                const index = await loadSeries('index.json');
+                if (index.brands[brand]) {{
+                    openTrend(index.brands[brand]);
+                    return;
+                }}
+            }} catch (error) {{}}
+            showNotification('暂无价格走势数据', 'error');
+        }}
+        
+        function renderTrend(gran) {{
+            document.querySelectorAll('.trend-tabs button').forEach(btn => {{
+                btn.classList.toggle('active', btn.dataset.gran === gran);
+            }});
+            // 每行为 [周期开始日期, 最低价, 最高价, 收盘价] (美分)
+            const rows = trendSeries[gran] || [];
+            const dollars = index => rows.map(row => row[index] / 100);
+            if (trendChart) trendChart.destroy();
+            trendChart = new Chart(document.getElementById('trendChart').getContext('2d'), {{
+                type: 'line',
+                data: {{
+                    labels: rows.map(row => row[0]),
+                    datasets: [{{
+                        label: '收盘价',
+                        data: dollars(3),
+                        borderColor: 'rgba(52, 152, 219, 1)',
+                        backgroundColor: 'rgba(52, 152, 219, 0.2)',
+                        tension: 0.2
+                    }}, {{
+                        label: '最低价',
+                        data: dollars(1),
+                        borderColor: 'rgba(46, 204, 113, 0.8)',
+                        borderDash: [4, 4],
+                        pointRadius: 0
+                    }}, {{
+                        label: '最高价',
+                        data: dollars(2),
+                        borderColor: 'rgba(231, 76, 60, 0.8)',
+                        borderDash: [4, 4],
+                        pointRadius: 0
+                    }}]
+                }},
+                options: {{
+                    responsive: true,
+                    animation: false,
+                    plugins: {{ legend: {{ position: 'bottom' }} }},
+                    scales: {{ y: {{ ticks: {{ callback: value => `$${{value}}` }} }} }}
+                }}
+            }});
+        }}
+        
+        function closeTrend() {{
+            document.getElementById('trend-modal').classList.remove('open');
         }}
         
         document.addEventListener('DOMContentLoaded', function() {{
@@ -993,9 +1442,32 @@ def generate_github_pages_html():
             const themeIcon = document.querySelector('.theme-toggle i');
             themeIcon.className = savedTheme === 'dark' ? 'fas fa-sun' : 'fas fa-moon';
             
-            initFilters();
             initCharts();
             
+            window.addEventListener('scroll', scheduleRender, {{ passive: true }});
+            window.addEventListener('resize', () => requestAnimationFrame(layoutGrid));
+            if (sentinelObserver) sentinelObserver.observe(document.getElementById('grid-sentinel'));
+            
+            loadProducts().then(products => {{
+                allProducts = products;
+                currentProducts = [...allProducts];
+                initFilters();
+                resetGrid();
+                // 页面可能来自service worker缓存, 后台检查一次是否有新数据
+                if (navigator.serviceWorker && navigator.serviceWorker.controller) {{
+                    checkForUpdate(false).catch(() => {{}});
+                }}
+            }}).catch(error => {{
+                console.error('加载产品数据失败:', error);
+                document.getElementById('grid-message').textContent = '产品数据加载失败, 请稍后刷新';
+            }});
+            
+            if ('serviceWorker' in navigator) {{
+                navigator.serviceWorker.register('sw.js').catch(error => {{
+                    console.warn('service worker注册失败:', error);
+                }});
+            }}
+            
             const fontAwesome = document.createElement('link');
             fontAwesome.rel = 'stylesheet';
             fontAwesome.href = 'https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.4.0/css/all.min.css';
@@ -1008,6 +1480,9 @@ def generate_github_pages_html():
     with open('web/index.html', 'w', encoding='utf-8') as f:
         f.write(html_content)
     
+    with open('web/sw.js', 'w', encoding='utf-8') as f:
+        f.write(SERVICE_WORKER_JS)
+    
     with open('web/.nojekyll', 'w') as f:
         f.write('')
     
@@ -1024,10 +1499,12 @@ def main():
         if html_file:
             print(f"成功生成HTML文件: {html_file}")
             print("\n生成的文件:")
-            print(f"  index.html - 主页面")
-            print(f"  data.json - 数据文件")
-            print(f"  images/ - 图片目录")
-            print(f"  .nojekyll - GitHub Pages配置")
+            print("  index.html - 主页面")
+            print("  data.json - 数据文件")
+            print("  sw.js - 离线缓存 (service worker)")
+            print("  asset-manifest.json - 资源清单 (带哈希的数据文件名)")
+            print("  images/ - 图片目录")
+            print("  .nojekyll - GitHub Pages配置")
         else:
             print("生成HTML失败")
             return 1
@@ -0,0 +1,350 @@
+import argparse
+import hashlib
+import json
+import logging
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import quote
+
+logger = logging.getLogger(__name__)
+
+# 卡片缩略图宽度 (px), 用作srcset的宽度描述符
+DERIVATIVE_WIDTHS = (160, 320, 640)
+DERIVATIVES_DIR = 'derivatives'
+MANIFEST_FILE = 'manifest.json'
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif', '.webp')
+PHASH_FILE = 'phash_index.json'
+# 感知哈希边长 (16x16=256位): 产品图都是白底上两块竖直的雪板, 8x8的哈希会把不同的板子判为同一张
+PHASH_SIZE = 16
+# aHash和dHash的汉明距离都不超过此值、且4x4颜色缩略图每个通道相差不超过COLOR_THRESHOLD时视为同一张图
+PHASH_THRESHOLD = 8
+COLOR_THRESHOLD = 48
+# 灰度高于 255 - BACKGROUND_TOLERANCE 的像素视为白色背景, 哈希前裁掉
+BACKGROUND_TOLERANCE = 10
+
+
+def file_digest(path):
+    """图片内容的sha1, 用于判断是否需要重新生成"""
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 16), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def derivative_stem(filename):
+    """衍生图文件名前缀: 保留原图扩展名, foo.jpg 和 foo.png 的衍生图不会互相覆盖"""
+    stem, ext = os.path.splitext(os.path.basename(filename))
+    return f'{stem}_{ext[1:]}'
+
+
+def build_derivative(source_path, output_dir, widths=DERIVATIVE_WIDTHS, quality=80):
+    """为一张原图生成各宽度的JPEG缩略图和WebP (在进程池中运行)"""
+    # 只有生成衍生图时才需要Pillow, 读取清单/生成srcset不依赖它
+    from PIL import Image
+
+    stem = derivative_stem(source_path)
+    variants = []
+    with Image.open(source_path) as image:
+        image = image.convert('RGB')
+        original_width = image.width
+        for width in widths:
+            # 不放大; 原图比最小宽度还窄时只保留原尺寸的一份
+            if width > original_width and variants:
+                break
+            target_width = min(width, original_width)
+            height = max(1, round(image.height * target_width / original_width))
+            resized = image.resize((target_width, height), Image.LANCZOS)
+            variant = {'width': target_width}
+            for fmt, ext in (('JPEG', 'jpg'), ('WEBP', 'webp')):
+                filename = f'{stem}_{target_width}.{ext}'
+                resized.save(os.path.join(output_dir, filename), fmt, quality=quality, optimize=fmt == 'JPEG')
+                variant[ext] = f'{DERIVATIVES_DIR}/{filename}'
+                variant[f'{ext}_bytes'] = os.path.getsize(os.path.join(output_dir, filename))
+            variants.append(variant)
+    return variants
+
+
+def load_manifest(images_dir):
+    """读取衍生图清单"""
+    path = os.path.join(images_dir, DERIVATIVES_DIR, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_manifest(images_dir, manifest):
+    """写出衍生图清单"""
+    path = os.path.join(images_dir, DERIVATIVES_DIR, MANIFEST_FILE)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2, sort_keys=True)
+    return path
+
+
+def remove_variants(images_dir, entry):
+    """删除一条清单记录对应的衍生图文件"""
+    for variant in entry.get('variants', []):
+        for ext in ('jpg', 'webp'):
+            path = os.path.join(images_dir, variant.get(ext, ''))
+            if variant.get(ext) and os.path.exists(path):
+                os.remove(path)
+
+
+def current_naming(filename, entry):
+    """清单记录的衍生图是否使用当前的文件名规则"""
+    prefix = f'{DERIVATIVES_DIR}/{derivative_stem(filename)}_'
+    return all(variant.get('jpg', '').startswith(prefix) for variant in entry.get('variants', []))
+
+
+def build_derivatives(images_dir, filenames=None, workers=None, widths=DERIVATIVE_WIDTHS):
+    """只为新增或内容变化的原图生成衍生图, 返回清单
+
+    清单按原图文件名索引, 记录内容sha1和各宽度的文件路径; 原图被删除时
+    对应的衍生图一并清理。
+    """
+    output_dir = os.path.join(images_dir, DERIVATIVES_DIR)
+    os.makedirs(output_dir, exist_ok=True)
+    manifest = load_manifest(images_dir)
+
+    if filenames is None:
+        filenames = [name for name in os.listdir(images_dir)
+                     if name.lower().endswith(IMAGE_EXTENSIONS)]
+    # 旧版本按 "原图名_宽度" 命名的衍生图 (同名不同扩展名的原图会共用) 全部按新命名重新生成
+    legacy = [name for name, entry in manifest.items() if not current_naming(name, entry)]
+    filenames = list(dict.fromkeys(list(filenames) + legacy))
+
+    pending = {}
+    for filename in filenames:
+        path = os.path.join(images_dir, filename)
+        if not os.path.isfile(path):
+            continue
+        digest = file_digest(path)
+        entry = manifest.get(filename)
+        if entry and entry.get('sha1') == digest and entry.get('widths') == list(widths) \
+                and current_naming(filename, entry):
+            continue
+        if entry:
+            remove_variants(images_dir, entry)
+        pending[filename] = digest
+
+    # 清理原图已不存在的记录
+    for filename in [name for name in manifest if not os.path.exists(os.path.join(images_dir, name))]:
+        remove_variants(images_dir, manifest.pop(filename))
+
+    if pending:
+        logger.info(f'🖼️ 生成衍生图: {len(pending)} 张新图片')
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                filename: executor.submit(build_derivative, os.path.join(images_dir, filename), output_dir, widths)
+                for filename in pending
+            }
+            for filename, future in futures.items():
+                try:
+                    manifest[filename] = {
+                        'sha1': pending[filename],
+                        'widths': list(widths),
+                        'variants': future.result()
+                    }
+                except Exception as e:
+                    logger.error(f'❌ 生成衍生图失败 {filename}: {e}')
+                    manifest.pop(filename, None)
+    else:
+        logger.info('🖼️ 没有新图片需要生成衍生图')
+
+    save_manifest(images_dir, manifest)
+    return manifest
+
+
+def perceptual_hashes(path, size=PHASH_SIZE):
+    """一张图片的aHash、dHash和4x4颜色缩略图 (十六进制, 在进程池中运行)
+
+    先裁掉白色背景, 哈希只描述产品本身, 不受留白和重新编码的影响。
+    """
+    from PIL import Image
+
+    with Image.open(path) as image:
+        image = image.convert('RGB')
+        gray = image.convert('L')
+        box = gray.point(lambda p: 255 if p < 255 - BACKGROUND_TOLERANCE else 0).getbbox()
+        if box:
+            image, gray = image.crop(box), gray.crop(box)
+        pixels = gray.resize((size, size), Image.BILINEAR).tobytes()
+        mean = sum(pixels) / len(pixels)
+        ahash = sum(1 << i for i, p in enumerate(pixels) if p > mean)
+        rows = gray.resize((size + 1, size), Image.BILINEAR).tobytes()
+        dhash = sum(1 << (r * size + c) for r in range(size) for c in range(size)
+                    if rows[r * (size + 1) + c] > rows[r * (size + 1) + c + 1])
+        color = image.resize((4, 4), Image.BILINEAR).tobytes()
+    digits = size * size // 4
+    return {'ahash': f'{ahash:0{digits}x}', 'dhash': f'{dhash:0{digits}x}', 'color': color.hex()}
+
+
+def hash_image(path):
+    """进程池任务: 内容sha1和感知哈希"""
+    return {'sha1': file_digest(path), **perceptual_hashes(path)}
+
+
+def load_phash_index(path):
+    """读取感知哈希索引 (文件名 -> sha1/size/mtime/ahash/dhash/color; 重复图片另有canonical, 已删除的只有canonical)"""
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_phash_index(path, index):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(index, f, ensure_ascii=False, separators=(',', ':'), sort_keys=True)
+    return path
+
+
+def image_aliases(index):
+    """重复图片文件名 -> 规范图片文件名"""
+    return {name: entry['canonical'] for name, entry in index.items() if entry.get('canonical')}
+
+
+def assign_canonical(index, images_dir, threshold=PHASH_THRESHOLD, color_threshold=COLOR_THRESHOLD):
+    """把近似重复的图片映射到同一张规范图片, 删除无法映射且文件已不存在的记录
+
+    原来的规范图片先参与比较, 保证规范文件名在多次运行间不变 (浏览器缓存持续命中);
+    只有文件仍存在的图片能成为规范图片。
+    """
+    def key(name):
+        exists = os.path.exists(os.path.join(images_dir, name))
+        return (not exists, bool(index[name].get('canonical')), name)
+
+    # 已删除的重复图片只保留映射, 不参与比较
+    pruned = [name for name in index if 'dhash' not in index[name]]
+    canonical = []
+    for name in sorted(set(index) - set(pruned), key=key):
+        entry = index[name]
+        ahash, dhash = int(entry['ahash'], 16), int(entry['dhash'], 16)
+        color = bytes.fromhex(entry['color'])
+        match = None
+        for other, other_ahash, other_dhash, other_color in canonical:
+            if (bin(dhash ^ other_dhash).count('1') <= threshold
+                    and bin(ahash ^ other_ahash).count('1') <= threshold
+                    and max(abs(a - b) for a, b in zip(color, other_color)) <= color_threshold):
+                match = other
+                break
+        if match:
+            entry['canonical'] = match
+        elif os.path.exists(os.path.join(images_dir, name)):
+            entry.pop('canonical', None)
+            canonical.append((name, ahash, dhash, color))
+        else:
+            del index[name]
+    for name in pruned:
+        target = index.get(index[name]['canonical'], {}).get('canonical', index[name]['canonical'])
+        if target in index and not index[target].get('canonical'):
+            index[name]['canonical'] = target
+        else:
+            del index[name]
+    return index
+
+
+def build_phash_index(images_dir, index_file, workers=None, prune=False, threshold=PHASH_THRESHOLD):
+    """增量更新感知哈希索引, 返回索引
+
+    只有新增或内容变化的图片在进程池中计算哈希; prune为True时删除重复图片文件,
+    索引保留其映射, 之后的运行遇到同一文件名时直接使用规范图片而不再下载。
+    索引不放在网页目录里, 不随网站发布。
+    """
+    index = load_phash_index(index_file)
+    filenames = sorted(name for name in os.listdir(images_dir) if name.lower().endswith(IMAGE_EXTENSIONS))
+
+    pending = []
+    for filename in filenames:
+        entry = index.get(filename)
+        path = os.path.join(images_dir, filename)
+        stat = os.stat(path)
+        if entry and entry.get('sha1') and entry.get('size') == stat.st_size:
+            # 大小和修改时间都不变时认为内容未变, 避免每次运行读取全部图片;
+            # 修改时间变了再比较sha1, 同样大小的重新编码图片不会沿用旧的感知哈希
+            if entry.get('mtime') == stat.st_mtime_ns:
+                continue
+            if entry['sha1'] == file_digest(path):
+                entry['mtime'] = stat.st_mtime_ns
+                continue
+        pending.append(filename)
+
+    if pending:
+        logger.info(f'🔍 计算感知哈希: {len(pending)} 张新图片')
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {filename: executor.submit(hash_image, os.path.join(images_dir, filename))
+                       for filename in pending}
+            for filename, future in futures.items():
+                try:
+                    stat = os.stat(os.path.join(images_dir, filename))
+                    index[filename] = {**future.result(), 'size': stat.st_size, 'mtime': stat.st_mtime_ns}
+                except Exception as e:
+                    logger.error(f'❌ 计算感知哈希失败 {filename}: {e}')
+                    index.pop(filename, None)
+
+    assign_canonical(index, images_dir, threshold)
+    aliases = image_aliases(index)
+    removed = 0
+    if prune:
+        for filename in aliases:
+            path = os.path.join(images_dir, filename)
+            if os.path.exists(path):
+                os.remove(path)
+                removed += 1
+            index[filename] = {'canonical': aliases[filename]}
+    logger.info(f'🔍 图片去重: {len(index) - len(aliases)} 张规范图片, {len(aliases)} 张重复'
+                + (f', 删除 {removed} 个重复文件' if prune else ''))
+    save_phash_index(index_file, index)
+    return index
+
+
+def srcset(entry, ext='webp'):
+    """由清单记录生成srcset属性值"""
+    if not entry:
+        return ''
+    # 文件名可能含空格 (例如 "Lib Tech"), srcset里必须转义
+    return ', '.join(f"images/{quote(variant[ext])} {variant['width']}w"
+                     for variant in entry['variants'] if variant.get(ext))
+
+
+def thumbnail(entry, width=320, ext='jpg'):
+    """取不小于指定宽度的最小衍生图, 用作src回退和小程序卡片图"""
+    if not entry or not entry.get('variants'):
+        return None
+    variants = sorted(entry['variants'], key=lambda v: v['width'])
+    for variant in variants:
+        if variant['width'] >= width:
+            return variant[ext]
+    return variants[-1][ext]
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description='生成图片衍生图, 或按感知哈希合并重复图片')
+    parser.add_argument('images_dir', nargs='?', default='web/images')
+    parser.add_argument('--dedupe', action='store_true', help='更新感知哈希索引并删除重复图片文件')
+    parser.add_argument('--index', default=os.path.join('data', PHASH_FILE), help='感知哈希索引文件')
+    return parser
+
+
+def main(argv=None):
+    options = build_parser().parse_args(argv)
+    images_dir = options.images_dir
+    if options.dedupe:
+        before = sum(entry.stat().st_size for entry in os.scandir(images_dir) if entry.is_file())
+        index = build_phash_index(images_dir, options.index, prune=True)
+        after = sum(entry.stat().st_size for entry in os.scandir(images_dir) if entry.is_file())
+        print(f"{len(index)} 张图片合并为 {len(index) - len(image_aliases(index))} 张规范图片: "
+              f"{before / 1024 / 1024:.1f} MB -> {after / 1024 / 1024:.1f} MB")
+        return 0
+    manifest = build_derivatives(images_dir)
+    original = sum(os.path.getsize(os.path.join(images_dir, name)) for name in manifest)
+    thumbs = sum(os.path.getsize(os.path.join(images_dir, thumbnail(entry, ext='webp')))
+                 for entry in manifest.values())
+    print(f"{len(manifest)} 张图片: 原图 {original / 1024 / 1024:.1f} MB, 320px WebP {thumbs / 1024 / 1024:.1f} MB")
+    return 0
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    sys.exit(main())
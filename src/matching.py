@@ -0,0 +1,271 @@
+import json
+import logging
+import os
+import random
+import re
+import sys
+import zlib
+
+logger = logging.getLogger(__name__)
+
+# 名称中不区分产品的词
+STOPWORDS = {
+    'snowboard', 'snowboards', 'board', 'the', 'and', 'with', 'new', 'sale', 'edition'
+}
+
+GENDER_WORDS = {
+    "men's": 'men', 'mens': 'men', 'men': 'men',
+    "women's": 'women', 'womens': 'women', 'women': 'women', 'ladies': 'women',
+    "kid's": 'kids', "kids'": 'kids', 'kids': 'kids', 'youth': 'kids', 'junior': 'kids', 'boys': 'kids', 'girls': 'kids',
+    'unisex': 'unisex'
+}
+
+# 产品形态, 不同形态即使型号相同也不是同一商品
+KIND_WORDS = {
+    'split': 'splitboard', 'splitboard': 'splitboard',
+    'package': 'package', 'bundle': 'package', 'combo': 'package'
+}
+
+SIZE_PATTERN = re.compile(r'^(1[0-9]{2})(w|cm|mw|uw)?$')
+YEAR_PATTERN = re.compile(r'^(?:20)?(2[0-9])$|^(?:fw|w)(2[0-9])$')
+SEASON_PATTERN = re.compile(r'\b20(2[0-9])\s*/\s*(?:20)?(2[0-9])\b')
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+
+MERSENNE_PRIME = (1 << 61) - 1
+
+
+def normalize_name(name, brand=None):
+    """把产品名称规范化为 品牌/型号词/尺寸/年份/性别/形态"""
+    text = (name or '').lower().replace('’', "'")
+    year = None
+    season = SEASON_PATTERN.search(text)
+    if season:
+        year = 2000 + int(season.group(2))
+        text = SEASON_PATTERN.sub(' ', text)
+
+    brand_tokens = set(TOKEN_PATTERN.findall((brand or '').lower()))
+    size = None
+    gender = None
+    kind = 'board'
+    model = []
+    for token in TOKEN_PATTERN.findall(text):
+        if token in GENDER_WORDS:
+            gender = gender or GENDER_WORDS[token]
+            continue
+        if token in KIND_WORDS:
+            kind = KIND_WORDS[token]
+        if token in brand_tokens or token in STOPWORDS:
+            continue
+        size_match = SIZE_PATTERN.match(token)
+        if size_match:
+            size = size or token
+            continue
+        year_match = YEAR_PATTERN.match(token)
+        if year_match:
+            year = year or 2000 + int(year_match.group(1) or year_match.group(2))
+            continue
+        model.append(token)
+
+    return {
+        'brand': (brand or '').strip().lower(),
+        'model': model,
+        'size': size,
+        'year': year,
+        'gender': gender,
+        'kind': kind
+    }
+
+
+def shingles(tokens):
+    """型号词及相邻词对, 作为MinHash的特征集合"""
+    features = set(tokens)
+    features.update(f'{a} {b}' for a, b in zip(tokens, tokens[1:]))
+    return features
+
+
+def parse_price(value):
+    """把 "$1,234.00" 转换为数值"""
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(str(value).replace('$', '').replace(',', ''))
+    except ValueError:
+        return None
+
+
+def product_price(product):
+    """产品现价 (优先使用数值字段)"""
+    if product.get('price_cents') is not None:
+        return product['price_cents'] / 100
+    return parse_price(product.get('current_price'))
+
+
+class MinHasher:
+    """MinHash签名, 同一实例内哈希函数固定"""
+
+    def __init__(self, num_perm=32, seed=1):
+        rng = random.Random(seed)
+        self.num_perm = num_perm
+        self.params = [(rng.randrange(1, MERSENNE_PRIME), rng.randrange(0, MERSENNE_PRIME))
+                       for _ in range(num_perm)]
+
+    def signature(self, features):
+        """计算特征集合的MinHash签名"""
+        hashes = [zlib.crc32(feature.encode('utf-8')) for feature in features]
+        if not hashes:
+            return (0,) * self.num_perm
+        return tuple(min((a * h + b) % MERSENNE_PRIME for h in hashes) for a, b in self.params)
+
+
+class UnionFind:
+    """并查集, 用于把匹配对合并成簇"""
+
+    def __init__(self, size):
+        self.parent = list(range(size))
+
+    def find(self, x):
+        while self.parent[x] != x:
+            self.parent[x] = self.parent[self.parent[x]]
+            x = self.parent[x]
+        return x
+
+    def union(self, a, b):
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a != root_b:
+            self.parent[max(root_a, root_b)] = min(root_a, root_b)
+
+
+class ProductMatcher:
+    """跨零售商产品匹配: 按品牌分块, 块内用MinHash LSH找候选对, 再用Jaccard确认
+
+    只比较同品牌且LSH分桶相同的候选对, 复杂度接近线性, 而不是两两比较。
+    """
+
+    def __init__(self, threshold=0.7, bands=8, rows=4):
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = rows
+        self.hasher = MinHasher(num_perm=bands * rows)
+
+    def compatible(self, a, b):
+        """形态必须一致, 尺寸/年份/性别都已知时也必须一致"""
+        if a['kind'] != b['kind']:
+            return False
+        for field in ('size', 'year', 'gender'):
+            if a[field] and b[field] and a[field] != b[field]:
+                return False
+        return True
+
+    def cluster(self, products, keys=None):
+        """返回簇列表, 每个簇为产品下标列表"""
+        if keys is None:
+            keys = [normalize_name(p.get('name'), p.get('brand')) for p in products]
+        features = [shingles(key['model']) for key in keys]
+        union = UnionFind(len(products))
+
+        # 规范名完全相同的直接合并, 每组只保留一个代表参与LSH
+        representatives = {}
+        for index, key in enumerate(keys):
+            head = representatives.setdefault(canonical_key(key), index)
+            if head != index:
+                union.union(head, index)
+
+        blocks = {}
+        for index in representatives.values():
+            blocks.setdefault(keys[index]['brand'], []).append(index)
+
+        comparisons = 0
+        for members in blocks.values():
+            if len(members) < 2:
+                continue
+            buckets = {}
+            for index in members:
+                signature = self.hasher.signature(features[index])
+                for band in range(self.bands):
+                    start = band * self.rows
+                    buckets.setdefault((band, signature[start:start + self.rows]), []).append(index)
+
+            checked = set()
+            for bucket in buckets.values():
+                for i, a in enumerate(bucket):
+                    for b in bucket[i + 1:]:
+                        if (a, b) in checked:
+                            continue
+                        checked.add((a, b))
+                        comparisons += 1
+                        if not self.compatible(keys[a], keys[b]):
+                            continue
+                        union_size = len(features[a] | features[b])
+                        if union_size and len(features[a] & features[b]) / union_size >= self.threshold:
+                            union.union(a, b)
+
+        clusters = {}
+        for index in range(len(products)):
+            clusters.setdefault(union.find(index), []).append(index)
+        logger.info(f'🔗 匹配完成: {len(products)} 个产品, {len(clusters)} 个簇, 比较 {comparisons} 对')
+        return list(clusters.values())
+
+
+def canonical_key(key):
+    """规范化名称的字符串形式"""
+    return '|'.join([key['brand'], ' '.join(key['model']), key['size'] or '',
+                     str(key['year'] or ''), key['gender'] or '', key['kind']])
+
+
+def match_products(products, matcher=None):
+    """为每个产品标注match_id, 返回带最低价的簇摘要"""
+    matcher = matcher or ProductMatcher()
+    keys = [normalize_name(p.get('name'), p.get('brand')) for p in products]
+    summaries = []
+    for members in matcher.cluster(products, keys):
+        first = products[members[0]]
+        # 取簇内最小的规范名作为ID来源, 跨运行保持稳定
+        canonical = min(canonical_key(keys[i]) for i in members)
+        match_id = f"m_{zlib.crc32(canonical.encode('utf-8')):08x}"
+        priced = [(product_price(products[i]), i) for i in members]
+        priced = [(price, i) for price, i in priced if price is not None]
+        best_price, best_index = min(priced) if priced else (None, members[0])
+        for index in members:
+            products[index]['match_id'] = match_id
+        summaries.append({
+            'match_id': match_id,
+            'brand': first.get('brand'),
+            'name': products[best_index].get('name'),
+            'offers': len(members),
+            'sources': sorted({products[i].get('source') or '' for i in members}),
+            'best_price': f'${best_price:.2f}' if best_price is not None else None,
+            'best_product_id': products[best_index].get('id'),
+            'best_product_url': products[best_index].get('product_url'),
+            'product_ids': [products[i].get('id') for i in members]
+        })
+    summaries.sort(key=lambda s: (-s['offers'], s['brand'] or '', s['name'] or ''))
+    return summaries
+
+
+def save_price_comparison(summaries, web_dir='web'):
+    """写出比价文件"""
+    path = os.path.join(web_dir, 'price_comparison.json')
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'clusters': summaries}, f, ensure_ascii=False, indent=2)
+    logger.info(f'💾 保存比价数据: {path}')
+    return path
+
+
+def main():
+    data_file = sys.argv[1] if len(sys.argv) > 1 else 'web/data.json'
+    with open(data_file, 'r', encoding='utf-8') as f:
+        products = json.load(f).get('products', [])
+
+    summaries = match_products(products)
+    path = save_price_comparison(summaries, os.path.dirname(data_file) or '.')
+    multi = [s for s in summaries if s['offers'] > 1]
+    print(f"{len(products)} 个产品 -> {len(summaries)} 个簇, 其中 {len(multi)} 个有多个报价")
+    print(f"比价文件: {path}")
+    return 0
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    sys.exit(main())
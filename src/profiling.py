@@ -0,0 +1,207 @@
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+
+def timed(func, *args):
+    """调用func并返回 (结果, 耗时秒数); 用于在线程池或进程池中测量一次调用本身的耗时"""
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def _frame_label(func):
+    """把pstats函数键转换为火焰图帧名"""
+    filename, lineno, name = func
+    if filename == '~':
+        # 内置函数, 例如 <built-in method re.findall>
+        label = name
+    else:
+        label = f'{name} ({os.path.basename(filename)}:{lineno})'
+    return label.replace(';', ',')
+
+
+def collapse_stats(stats, max_depth=64, max_paths=32):
+    """把cProfile统计转换为折叠栈格式 (flamegraph.pl / speedscope可直接读取)
+
+    cProfile只记录调用边, 不记录完整调用栈。这里按调用者拓扑顺序为每个函数
+    计算一次它的调用路径及各路径所占比例 (由调用边耗时在调用者路径间分摊),
+    每条调用边只处理一次; 每个函数最多保留 max_paths 条最重的路径, 其余比例
+    归入 "<其他路径>" 帧, 总耗时不丢失。数值单位为微秒。
+    """
+    raw = stats.stats
+
+    # 按调用者在前的顺序排列函数 (迭代DFS后序), 递归调用形成的回边忽略
+    order, state = [], {}
+    for start in raw:
+        if start in state:
+            continue
+        state[start] = 1
+        pending = [(start, iter(raw[start][4]))]
+        while pending:
+            func, callers = pending[-1]
+            for caller in callers:
+                if caller in raw and caller not in state:
+                    state[caller] = 1
+                    pending.append((caller, iter(raw[caller][4])))
+                    break
+            else:
+                pending.pop()
+                state[func] = 2
+                order.append(func)
+
+    position = {func: i for i, func in enumerate(order)}
+    paths = {}
+    for func in order:
+        label = _frame_label(func)
+        edges = [(caller, edge) for caller, edge in raw[func][4].items()
+                 if caller in paths and position[caller] < position[func]]
+        # 按调用边累计耗时分摊, 耗时都为0时按调用次数
+        column = 3 if any(edge[3] > 0 for _, edge in edges) else 0
+        total = sum(edge[column] for _, edge in edges)
+        if total <= 0:
+            paths[func] = {(label,): 1.0}
+            continue
+        merged = {}
+        for caller, edge in edges:
+            share = edge[column] / total
+            for path, fraction in paths[caller].items():
+                key = (path + (label,))[-max_depth:]
+                merged[key] = merged.get(key, 0.0) + fraction * share
+        if len(merged) > max_paths:
+            kept = sorted(merged.items(), key=lambda item: item[1], reverse=True)[:max_paths - 1]
+            other = 1.0 - sum(fraction for _, fraction in kept)
+            merged = dict(kept)
+            merged[('<其他路径>', label)] = merged.get(('<其他路径>', label), 0.0) + other
+        paths[func] = merged
+
+    folded = {}
+    for func, value in raw.items():
+        self_time = value[2]
+        if self_time <= 0:
+            continue
+        for path, fraction in paths[func].items():
+            key = ';'.join(path)
+            folded[key] = folded.get(key, 0) + self_time * fraction
+
+    lines = []
+    for stack, seconds in sorted(folded.items()):
+        micros = int(seconds * 1_000_000)
+        if micros > 0:
+            lines.append(f'{stack} {micros}')
+    return lines
+
+
+class ScrapeProfiler:
+    """按阶段采集cProfile调用统计和tracemalloc内存分配"""
+
+    def __init__(self, output_dir='profile', top_n=25, trace_memory=True):
+        self.output_dir = output_dir
+        self.top_n = top_n
+        self.trace_memory = trace_memory
+        self.profiles = {}
+        self.memory = {}
+        self.timings = {}
+        self.calls = {}
+        self._active = None
+
+    @contextmanager
+    def stage(self, name):
+        """采集一个阶段, 同名阶段的多次调用会累加"""
+        if self._active:
+            # cProfile不支持嵌套, 内层阶段计入外层
+            yield
+            return
+
+        profile = self.profiles.setdefault(name, cProfile.Profile())
+        before = None
+        if self.trace_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(16)
+            before = tracemalloc.take_snapshot()
+
+        self._active = name
+        start = time.perf_counter()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            elapsed = time.perf_counter() - start
+            self._active = None
+            self.timings[name] = self.timings.get(name, 0.0) + elapsed
+            self.calls[name] = self.calls.get(name, 0) + 1
+            if before is not None:
+                after = tracemalloc.take_snapshot()
+                self._record_memory(name, after.compare_to(before, 'lineno'))
+
+    def record(self, name, seconds):
+        """记录在其他线程或进程中测得的一次耗时 (没有调用统计和内存数据)"""
+        self.timings[name] = self.timings.get(name, 0.0) + seconds
+        self.calls[name] = self.calls.get(name, 0) + 1
+
+    def _record_memory(self, name, diffs):
+        """累加一个阶段的内存分配差异"""
+        totals = self.memory.setdefault(name, {})
+        for diff in diffs:
+            if diff.size_diff <= 0:
+                continue
+            frame = diff.traceback[0]
+            key = f'{frame.filename}:{frame.lineno}'
+            size, count = totals.get(key, (0, 0))
+            totals[key] = (size + diff.size_diff, count + diff.count_diff)
+
+    def write_reports(self):
+        """写出 .prof / .txt / .folded / 内存报告和汇总"""
+        # 各阶段的内存差异已记录, 先停止跟踪, 免得写报告本身被tracemalloc拖慢
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+        os.makedirs(self.output_dir, exist_ok=True)
+        summary = {'stages': {}}
+
+        for name, profile in self.profiles.items():
+            base = os.path.join(self.output_dir, name)
+            profile.dump_stats(f'{base}.prof')
+
+            stats = pstats.Stats(profile)
+            buffer = io.StringIO()
+            pstats.Stats(profile, stream=buffer).sort_stats('cumulative').print_stats(self.top_n)
+            with open(f'{base}.txt', 'w', encoding='utf-8') as f:
+                f.write(buffer.getvalue())
+
+            with open(f'{base}.folded', 'w', encoding='utf-8') as f:
+                f.write('\n'.join(collapse_stats(stats)) + '\n')
+
+            top_memory = sorted(self.memory.get(name, {}).items(), key=lambda x: x[1][0], reverse=True)[:self.top_n]
+            with open(f'{base}_memory.txt', 'w', encoding='utf-8') as f:
+                for location, (size, count) in top_memory:
+                    f.write(f'{size / 1024:10.1f} KiB {count:8d} blocks  {location}\n')
+
+            summary['stages'][name] = {
+                'calls': self.calls.get(name, 0),
+                'seconds': round(self.timings.get(name, 0.0), 4),
+                'allocated_kib': round(sum(size for size, _ in self.memory.get(name, {}).values()) / 1024, 1),
+                'top_allocations': [
+                    {'location': location, 'kib': round(size / 1024, 1), 'blocks': count}
+                    for location, (size, count) in top_memory[:5]
+                ]
+            }
+
+        # 只有耗时记录的阶段 (在线程池或进程池中执行, 见 record)
+        for name in self.timings.keys() - self.profiles.keys():
+            summary['stages'][name] = {'calls': self.calls[name], 'seconds': round(self.timings[name], 4)}
+
+        summary_file = os.path.join(self.output_dir, 'summary.json')
+        with open(summary_file, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+
+        logger.info(f'📈 性能分析报告已写入: {self.output_dir}')
+        return summary_file
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+import argparse
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import sys
+from datetime import datetime
+
+from delta import read_json, write_json
+from images import file_digest
+
+logger = logging.getLogger(__name__)
+
+ASSET_MANIFEST = 'asset-manifest.json'
+HASH_LENGTH = 10
+# 以带内容哈希的文件名发布的数据资源; 原名文件保留, 供脚本和旧客户端读取。
+# 图片 (文件名由图片地址决定, 已存在不再下载)、feed增量 (按版本号命名) 和价格序列
+# (只在价格变化时重写, 小程序按产品key访问) 本身已是增量的, 不改名。
+HASHED_ASSETS = ('products.json', 'data.json', 'catalog.bin', 'price_comparison.json', 'deals.json')
+HASHED_NAME_PATTERN = re.compile(r'^(.+)\.[0-9a-f]{%d}(\.[^.]+)$' % HASH_LENGTH)
+# 保留最近几次构建引用的带哈希副本, 仍打开着旧页面的浏览器可以继续加载
+KEEP_BUILDS = 3
+
+
+def hashed_name(path, digest):
+    """products.json -> products.<哈希>.json"""
+    stem, ext = os.path.splitext(path)
+    return f'{stem}.{digest[:HASH_LENGTH]}{ext}'
+
+
+def is_hashed_copy(name):
+    match = HASHED_NAME_PATTERN.match(name)
+    return bool(match) and match.group(1) + match.group(2) in HASHED_ASSETS
+
+
+def build_assets(web_dir='web', keep_builds=KEEP_BUILDS):
+    """写出数据资源的带哈希副本并更新资源清单, 返回清单
+
+    asset-manifest.json  version (资源集合的哈希)、assets (原名 -> 带哈希的文件名)、
+                         builds (最近几次构建引用的副本, 更早的副本被删除)
+
+    带哈希的文件内容永不改变, 浏览器和小程序可以一直缓存; 内容没有变化的资源
+    文件名不变, 部署时只有真正变化的文件需要上传。
+    """
+    manifest_file = os.path.join(web_dir, ASSET_MANIFEST)
+    previous = read_json(manifest_file, {})
+    previous_assets = previous.get('assets', {})
+
+    assets, changed = {}, []
+    for logical in HASHED_ASSETS:
+        path = os.path.join(web_dir, logical)
+        if not os.path.exists(path):
+            continue
+        target = hashed_name(logical, file_digest(path))
+        if not os.path.exists(os.path.join(web_dir, target)):
+            shutil.copyfile(path, os.path.join(web_dir, target))
+        if previous_assets.get(logical) != target:
+            changed.append(target)
+        assets[logical] = target
+
+    version = hashlib.sha1(json.dumps(assets, sort_keys=True).encode('utf-8')).hexdigest()[:HASH_LENGTH]
+    builds = previous.get('builds', [])
+    if not builds or builds[0]['version'] != version:
+        builds = [{'version': version, 'files': sorted(assets.values())}] + builds
+    builds = builds[:keep_builds]
+
+    keep = {name for build in builds for name in build['files']}
+    removed = 0
+    for name in os.listdir(web_dir):
+        if is_hashed_copy(name) and name not in keep:
+            os.remove(os.path.join(web_dir, name))
+            removed += 1
+
+    manifest = {
+        'version': version,
+        'updated': previous.get('updated') if version == previous.get('version') else
+        datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'assets': assets,
+        'builds': builds
+    }
+    write_json(manifest_file, manifest)
+    changed_bytes = sum(os.path.getsize(os.path.join(web_dir, name)) for name in changed)
+    logger.info(f'📦 资源清单版本 {version}: 变化 {len(changed)} 个 ({changed_bytes / 1024:.0f} KB), '
+                f'删除过期副本 {removed} 个')
+    return manifest
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description='为网站数据资源生成带内容哈希的文件名和资源清单')
+    parser.add_argument('--web-dir', default='web')
+    parser.add_argument('--keep-builds', type=int, default=KEEP_BUILDS, help='保留副本的最近构建数')
+    return parser
+
+
+def main(argv=None):
+    options = build_parser().parse_args(argv)
+    manifest = build_assets(options.web_dir, options.keep_builds)
+    print(f"资源清单版本 {manifest['version']}")
+    for logical, target in manifest['assets'].items():
+        print(f"  {logical} -> {target}")
+    return 0
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    sys.exit(main())
@@ -0,0 +1,189 @@
+import hashlib
+import logging
+import os
+import sys
+
+import numpy as np
+
+from delta import read_json, write_json
+from stats import load_history
+
+logger = logging.getLogger(__name__)
+
+ROLLUPS_FILE = 'rollups.npz'
+SERIES_DIR = 'series'
+INDEX_FILE = 'index.json'
+GRANULARITIES = ('day', 'week', 'month')
+# 序列文件中每个粒度保留的最近周期数, 让单个文件保持在几KB
+SERIES_LIMITS = {'day': 90, 'week': 52, 'month': 36}
+PRODUCT, BRAND = 0, 1
+COLUMNS = ('level', 'entity', 'gran', 'period', 'min', 'max', 'last')
+
+
+def period_start(days, gran):
+    """日期 (距1970的天数) 所在周期的第一天; 周从周一开始"""
+    if gran == 'day':
+        return days
+    if gran == 'week':
+        # 1970-01-01 是周四
+        return days - (days + 3) % 7
+    return days.astype('datetime64[D]').astype('datetime64[M]').astype('datetime64[D]').astype(np.int32)
+
+
+def reduce_groups(entity, period, day, low, high, last):
+    """按 (实体, 周期) 聚合: 最低取min, 最高取max, 收盘取周期内最后一天的值"""
+    if not len(entity):
+        return {name: np.empty(0, dtype=np.int32) for name in ('entity', 'period', 'min', 'max', 'last')}
+    order = np.lexsort((day, period, entity))
+    entity, period, low, high, last = entity[order], period[order], low[order], high[order], last[order]
+    boundary = np.ones(len(entity), dtype=bool)
+    boundary[1:] = (entity[1:] != entity[:-1]) | (period[1:] != period[:-1])
+    starts = np.flatnonzero(boundary)
+    ends = np.append(starts[1:], len(entity)) - 1
+    return {
+        'entity': entity[starts],
+        'period': period[starts],
+        'min': np.minimum.reduceat(low, starts),
+        'max': np.maximum.reduceat(high, starts),
+        'last': last[ends]
+    }
+
+
+def build_rollups(history, since=None):
+    """由价格历史计算各粒度的产品和品牌聚合 (since之后的日期)
+
+    品牌的日数据为当天该品牌产品的最低/最高/平均价, 周和月在日数据上继续聚合。
+    """
+    day, product, brand = history['day'], history['product'], history['brand']
+    price = history['price_cents'].astype(np.int64)
+    if since is not None:
+        keep = day >= since
+        day, product, brand, price = day[keep], product[keep], brand[keep], price[keep]
+
+    # 品牌日数据
+    brand_day = reduce_groups(brand, day, day, price, price, price)
+    if len(brand):
+        order = np.lexsort((day, brand))
+        boundary = np.ones(len(order), dtype=bool)
+        boundary[1:] = (brand[order][1:] != brand[order][:-1]) | (day[order][1:] != day[order][:-1])
+        group = np.cumsum(boundary) - 1
+        brand_day['last'] = (np.bincount(group, weights=price[order]) / np.bincount(group)).round().astype(np.int64)
+
+    parts = []
+    for level, rows in ((PRODUCT, {'entity': product, 'period': day, 'min': price, 'max': price, 'last': price}),
+                        (BRAND, brand_day)):
+        for gran_id, gran in enumerate(GRANULARITIES):
+            periods = period_start(rows['period'], gran)
+            reduced = reduce_groups(rows['entity'], periods, rows['period'], rows['min'], rows['max'], rows['last'])
+            n = len(reduced['entity'])
+            parts.append({
+                'level': np.full(n, level, dtype=np.int8),
+                'entity': reduced['entity'].astype(np.int32),
+                'gran': np.full(n, gran_id, dtype=np.int8),
+                'period': reduced['period'].astype(np.int32),
+                'min': reduced['min'].astype(np.int32),
+                'max': reduced['max'].astype(np.int32),
+                'last': reduced['last'].astype(np.int32)
+            })
+    return {name: np.concatenate([part[name] for part in parts]) for name in COLUMNS}
+
+
+def update_rollups(data_dir='data', web_dir='web'):
+    """增量维护聚合并写出变化实体的序列文件
+
+    上次处理到的日期所在的周和月可能还会变化, 只重算从两者较早的开始日起的
+    历史行, 更早的聚合原样保留。只有这些行涉及的产品和品牌会重写序列文件。
+    """
+    history = load_history(data_dir)
+    if not len(history['day']):
+        logger.info('📈 没有价格历史, 跳过聚合')
+        return None
+
+    rollups_file = os.path.join(data_dir, ROLLUPS_FILE)
+    previous, through = None, None
+    if os.path.exists(rollups_file):
+        with np.load(rollups_file) as saved:
+            previous = {name: saved[name] for name in COLUMNS}
+            through = int(saved['through'])
+
+    cutoff = None
+    if previous is not None:
+        watermark = np.array([through], dtype=np.int32)
+        cutoff = int(min(period_start(watermark, 'week')[0], period_start(watermark, 'month')[0]))
+    fresh = build_rollups(history, since=cutoff)
+    if previous is not None:
+        old = previous['period'] < cutoff
+        rollups = {name: np.concatenate([previous[name][old], fresh[name]]) for name in COLUMNS}
+    else:
+        rollups = fresh
+
+    tmp_file = f'{rollups_file}.tmp.npz'
+    np.savez_compressed(tmp_file, through=int(history['day'].max()), **rollups)
+    os.replace(tmp_file, rollups_file)
+
+    dirty = {(int(level), int(entity)) for level, entity in zip(fresh['level'], fresh['entity'])}
+    written = write_series(rollups, history, web_dir, dirty)
+    logger.info(f'📈 更新聚合: {len(rollups["level"])} 行, 重写 {written} 个序列文件')
+    return rollups
+
+
+def series_filename(level, name):
+    """产品序列按产品key命名; 品牌名可能含空格和斜杠, 用哈希命名"""
+    if level == PRODUCT:
+        return f'{name}.json'
+    return f"brand_{hashlib.sha1(name.encode('utf-8')).hexdigest()[:10]}.json"
+
+
+def write_series(rollups, history, web_dir, entities):
+    """为指定的 (层级, 实体) 写出紧凑的序列文件: 每个粒度为 [日期, 最低, 最高, 收盘] 列表"""
+    series_dir = os.path.join(web_dir, SERIES_DIR)
+    os.makedirs(series_dir, exist_ok=True)
+    index_file = os.path.join(series_dir, INDEX_FILE)
+    index = read_json(index_file, {'products': {}, 'brands': {}})
+
+    order = np.lexsort((rollups['period'], rollups['gran'], rollups['entity'], rollups['level']))
+    level, entity = rollups['level'][order], rollups['entity'][order]
+    boundary = np.ones(len(order), dtype=bool)
+    boundary[1:] = (level[1:] != level[:-1]) | (entity[1:] != entity[:-1])
+    starts = np.flatnonzero(boundary)
+    ends = np.append(starts[1:], len(order))
+
+    written = 0
+    for start, end in zip(starts, ends):
+        key = (int(level[start]), int(entity[start]))
+        if key not in entities:
+            continue
+        rows = order[start:end]
+        if key[0] == PRODUCT:
+            name = str(history['keys'][key[1]])
+            label = str(history['names'][key[1]])
+        else:
+            name = label = str(history['brands'][key[1]])
+        series = {'name': label}
+        for gran_id, gran in enumerate(GRANULARITIES):
+            selected = rows[rollups['gran'][rows] == gran_id][-SERIES_LIMITS[gran]:]
+            series[gran] = [[str(np.datetime64(int(p), 'D')), int(lo), int(hi), int(last)] for p, lo, hi, last in zip(
+                rollups['period'][selected], rollups['min'][selected],
+                rollups['max'][selected], rollups['last'][selected])]
+        filename = series_filename(key[0], name)
+        write_json(os.path.join(series_dir, filename), series)
+        index['products' if key[0] == PRODUCT else 'brands'][name] = filename
+        written += 1
+
+    write_json(index_file, index)
+    return written
+
+
+def main():
+    data_dir = sys.argv[1] if len(sys.argv) > 1 else 'data'
+    web_dir = sys.argv[2] if len(sys.argv) > 2 else 'web'
+    rollups = update_rollups(data_dir, web_dir)
+    if rollups is None:
+        return 1
+    print(f"聚合 {len(rollups['level'])} 行, 序列文件位于 {os.path.join(web_dir, SERIES_DIR)}")
+    return 0
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    sys.exit(main())
@@ -8,34 +8,225 @@ import re
 import os
 import sys
 import logging
+import argparse
+import glob
+import hashlib
+import gzip
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
 from datetime import datetime
+from itertools import chain
+from logging.handlers import RotatingFileHandler
 from urllib.parse import urljoin
+from requests.adapters import HTTPAdapter
+
+from downloads import CHUNK_SIZE, MAX_IMAGE_BYTES, PLACEHOLDERS_FILE, DownloadStats, ImageDownload, \
+    ImageRejected, PlaceholderDetector
+from images import PHASH_FILE, image_aliases, load_phash_index
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BASE_URL = 'https://snowboards.com'
+OUTPUT_FORMATS = ('json', 'csv', 'feed', 'bin', 'series', 'deals', 'watch')
+# 数据结构版本: 2 起同时提供数值字段 (价格分、折扣基点、时间戳、品牌/类别ID)
+SCHEMA_VERSION = 2
+PRICE_PATTERN = r'\$(\d{1,3}(?:,\d{3})*(?:\.\d{2})?)'
+JSONLD_PATTERN = re.compile(r'<script[^>]*type=["\']application/ld\+json["\'][^>]*>(.*?)</script>', re.S | re.I)
+# 分页信息: <span class="paging"> 中的 "N / M" 和 lnkNext 链接 (最后一页时为 aspNetDisabled 且没有href)
+PAGING_PATTERN = re.compile(r'<span class="paging">(.*?)</span>', re.S)
+PAGE_NUMBER_PATTERN = re.compile(r'(\d+)\s*/\s*(\d+)')
+NEXT_LINK_PATTERN = re.compile(r'<a\b[^>]*lnkNext"[^>]*>')
+PRODUCT_HREF_PATTERN = re.compile(r'href="([^"#?]*/product/[^"#?]+)"')
+# 日志轮转: 单个文件上限和保留的压缩旧日志份数
+LOG_MAX_BYTES = 1024 * 1024
+LOG_BACKUPS = 5
+# 从页面解析出的字段; 解析进程以这些字段的元组返回产品, 比完整字典和soup对象小得多
+RECORD_FIELDS = ('brand', 'name', 'current_price', 'original_price', 'discount', 'price_cents',
+                 'original_price_cents', 'discount_bp', 'image_url', 'product_url', 'category')
+PRICE_FIELDS = ('current_price', 'original_price', 'discount', 'price_cents', 'original_price_cents', 'discount_bp')
+# JSON-LD产品都有这些字段时才跳过启发式解析
+STRUCTURED_REQUIRED = ('price_cents', 'image_url', 'product_url')
+
+def product_key(product):
+    """跨运行稳定的产品标识 (id每次运行都会变化)"""
+    identity = product.get('product_url') or f"{product.get('brand')}|{product.get('name')}"
+    return hashlib.sha1(f"{product.get('source', '')}|{identity}".encode('utf-8')).hexdigest()[:12]
+
+def price_value(value):
+    """把结构化数据中的价格 (数字或 "1,234.50" 字符串) 转换为浮点数, 无法解析时返回None"""
+    if value is None or value == '':
+        return None
+    try:
+        return float(str(value).replace('$', '').replace(',', ''))
+    except ValueError:
+        return None
+
+def price_to_cents(value):
+    """把 "$1,234.50" 转换为整数分, 无法解析时返回None"""
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return int(round(value * 100))
+    try:
+        return int(round(float(str(value).replace('$', '').replace(',', '')) * 100))
+    except ValueError:
+        return None
+
+def pagination(html):
+    """解析分页信息, 返回 (当前页, 总页数, 是否有下一页), 无法判断的项为None"""
+    current = total = has_next = None
+    paging = PAGING_PATTERN.search(html)
+    if paging:
+        numbers = PAGE_NUMBER_PATTERN.search(re.sub(r'<[^>]+>', ' ', paging.group(1)))
+        if numbers:
+            current, total = int(numbers.group(1)), int(numbers.group(2))
+        link = NEXT_LINK_PATTERN.search(paging.group(1))
+        if link:
+            has_next = 'aspNetDisabled' not in link.group(0) and 'href=' in link.group(0)
+    return current, total, has_next
+
+def page_fingerprint(html):
+    """页面指纹: 页面上产品链接集合的哈希 (与广告位、ViewState等变化无关), 没有产品链接时返回None"""
+    hrefs = set(PRODUCT_HREF_PATTERN.findall(html))
+    if not hrefs:
+        return None
+    return hashlib.sha1('\n'.join(sorted(hrefs)).encode('utf-8')).hexdigest()
+
+def iter_jsonld(html):
+    """逐个产出页面JSON-LD中的节点 (展开列表、@graph和ItemList), 只用正则扫描, 不构建DOM"""
+    if isinstance(html, bytes):
+        html = html.decode('utf-8', errors='replace')
+    stack = []
+    for match in JSONLD_PATTERN.finditer(html):
+        try:
+            stack.append(json.loads(match.group(1).strip()))
+        except ValueError:
+            continue
+        while stack:
+            node = stack.pop()
+            if isinstance(node, list):
+                stack.extend(reversed(node))
+                continue
+            if not isinstance(node, dict):
+                continue
+            if '@graph' in node:
+                stack.append(node['@graph'])
+            if is_schema_type(node, 'ItemList'):
+                stack.append([item.get('item', item) if isinstance(item, dict) else item
+                              for item in node.get('itemListElement') or []])
+            yield node
+
+def is_schema_type(node, name):
+    """节点的@type是否为 (或包含) 指定的schema.org类型"""
+    types = node.get('@type')
+    types = types if isinstance(types, list) else [types]
+    return any(str(t).rsplit('/', 1)[-1] == name for t in types if t)
+
+def upgrade_product(product):
+    """为旧版本数据补齐数值字段 (读取历史快照时使用)"""
+    # 多数据源之前的快照都来自snowboards.com, 补上来源使 product_key 与新数据一致
+    product.setdefault('source', 'snowboards')
+    if 'price_cents' not in product:
+        product['price_cents'] = price_to_cents(product.get('current_price'))
+        product['original_price_cents'] = price_to_cents(product.get('original_price'))
+        current, original = product['price_cents'], product['original_price_cents']
+        product['discount_bp'] = (original - current) * 10000 // original if current and original else None
+    if 'scraped_ts' not in product and product.get('scraped_at'):
+        try:
+            product['scraped_ts'] = int(datetime.fromisoformat(product['scraped_at']).timestamp())
+        except ValueError:
+            product['scraped_ts'] = None
+    return product
+
+def intern_ids(products, tables_file):
+    """为品牌/类别分配整数ID
+
+    ID表只追加不重排并持久化到tables_file, 同一品牌在不同运行中ID不变,
+    增量数据和客户端缓存里的ID始终有效。
+    """
+    tables = {'brands': [], 'categories': []}
+    if os.path.exists(tables_file):
+        with open(tables_file, 'r', encoding='utf-8') as f:
+            tables.update(json.load(f))
+    
+    for table, field in (('brands', 'brand'), ('categories', 'category')):
+        index = {value: i for i, value in enumerate(tables[table])}
+        for product in products:
+            value = product.get(field)
+            if value not in index:
+                index[value] = len(tables[table])
+                tables[table].append(value)
+            product[f'{field}_id'] = index[value]
+    
+    with open(tables_file, 'w', encoding='utf-8') as f:
+        json.dump(tables, f, ensure_ascii=False, indent=2)
+    return tables
 
 # 确保必要的目录存在
-def setup_directories():
+def setup_directories(directories=('logs', 'data', 'web/images')):
     """创建必要的目录"""
-    directories = ['logs', 'data', 'web/images']
     for directory in directories:
         os.makedirs(directory, exist_ok=True)
-        print(f"✅ 创建目录: {directory}")
-
-# 初始化目录
-setup_directories()
-
-# 配置日志
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('logs/scraper.log', encoding='utf-8'),
-        logging.StreamHandler(sys.stdout)
-    ]
-)
-logger = logging.getLogger(__name__)
+
+def gzip_rotator(source, dest):
+    """日志轮转时把旧日志压缩为 .gz"""
+    with open(source, 'rb') as f_in, gzip.open(dest, 'wb') as f_out:
+        shutil.copyfileobj(f_in, f_out)
+    os.remove(source)
+
+def configure_logging(log_file='logs/scraper.log', level='INFO', max_bytes=LOG_MAX_BYTES, backups=LOG_BACKUPS):
+    """配置日志 (只在入口调用, 导入模块时不产生副作用)
+
+    日志文件超过max_bytes时轮转, 旧日志压缩为 scraper.log.1.gz ... 最多保留backups份。
+    """
+    handlers = [logging.StreamHandler(sys.stdout)]
+    if log_file:
+        os.makedirs(os.path.dirname(log_file) or '.', exist_ok=True)
+        file_handler = RotatingFileHandler(log_file, maxBytes=max_bytes, backupCount=backups, encoding='utf-8')
+        file_handler.namer = lambda name: f'{name}.gz'
+        file_handler.rotator = gzip_rotator
+        handlers.insert(0, file_handler)
+    logging.basicConfig(
+        level=getattr(logging, str(level).upper(), logging.INFO),
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=handlers,
+        force=True
+    )
+
+class RateLimiter:
+    """线程安全的请求限速器 (每秒最多rate个请求, rate<=0表示不限速)"""
+
+    def __init__(self, rate=0):
+        self.interval = 1.0 / rate if rate and rate > 0 else 0
+        self.lock = threading.Lock()
+        self.next_time = 0.0
+
+    def reserve(self):
+        """预约下一个请求时段, 返回需要等待的秒数 (异步调用方自行await sleep)"""
+        if not self.interval:
+            return 0
+        with self.lock:
+            now = time.monotonic()
+            wait_time = self.next_time - now
+            self.next_time = max(now, self.next_time) + self.interval
+        return max(0, wait_time)
+
+    def wait(self):
+        """阻塞直到允许发出下一个请求"""
+        wait_time = self.reserve()
+        if wait_time > 0:
+            time.sleep(wait_time)
 
 class SnowboardsScraper:
-    def __init__(self, base_url='https://snowboards.com'):
+    def __init__(self, base_url=DEFAULT_BASE_URL, web_dir='web', data_dir='data',
+                 replay_files=None, profiler=None, workers=4, rate_limit=0,
+                 page_delay=(2, 4), cache_dir=None, cache_ttl=3600,
+                 formats=OUTPUT_FORMATS, download_images=True, derivatives=True,
+                 parse_workers=1, bloom_capacity=0, max_image_bytes=MAX_IMAGE_BYTES, dedupe_images=True):
         self.base_url = base_url
+        self.source_name = 'snowboards'
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
@@ -43,13 +234,51 @@ class SnowboardsScraper:
             'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
         })
         
+        # 并发与限速: 连接池大小与图片下载线程数一致
+        self.workers = max(1, workers)
+        adapter = HTTPAdapter(pool_connections=self.workers, pool_maxsize=self.workers)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.rate_limiter = RateLimiter(rate_limit)
+        self.page_delay = page_delay
+        # 解析是CPU密集的, 多于1个时在进程池中解析页面, 与获取和图片下载重叠
+        self.parse_workers = max(1, parse_workers or 1)
+        # 去重: 0为精确的哈希键集合, 否则为按此容量创建的布隆过滤器 (超大规模抓取时内存固定)
+        self.bloom_capacity = bloom_capacity
+        self.dedup = None
+        
+        # 页面缓存: 在有效期内重复运行不再请求同一页面
+        self.cache_dir = cache_dir
+        self.cache_ttl = cache_ttl
+        self.formats = set(formats)
+        
+        # 离线回放: 按页码顺序读取已保存的HTML, 不访问网络
+        self.replay_files = list(replay_files) if replay_files else None
+        self.offline = self.replay_files is not None
+        self.download_images = download_images and not self.offline
+        self.derivatives = derivatives and self.download_images
+        # 按感知哈希把近似重复的图片合并到一张规范图片, 只保存和发布一份
+        self.dedupe_images = dedupe_images and self.download_images
+        self.max_image_bytes = max_image_bytes
+        self.image_stats = DownloadStats()
+        self.profiler = profiler
+        
         # 创建目录
-        self.web_dir = 'web'
-        self.data_dir = 'data'
+        self.web_dir = web_dir
+        self.data_dir = data_dir
         self.images_dir = os.path.join(self.web_dir, 'images')
         os.makedirs(self.web_dir, exist_ok=True)
         os.makedirs(self.data_dir, exist_ok=True)
         os.makedirs(self.images_dir, exist_ok=True)
+        if self.cache_dir:
+            os.makedirs(self.cache_dir, exist_ok=True)
+        self.placeholders = PlaceholderDetector(os.path.join(self.data_dir, PLACEHOLDERS_FILE))
+        # 多数据源并发抓取时各适配器不自行保存, 由 scrape_sources 合并后统一保存
+        self.save_placeholders = True
+        self.phash_index_file = os.path.join(self.data_dir, PHASH_FILE)
+        self.image_aliases = {}
+        if self.dedupe_images:
+            self.image_aliases = image_aliases(load_phash_index(self.phash_index_file))
         
         # 预定义品牌列表
         self.brands = [
@@ -59,15 +288,31 @@ class SnowboardsScraper:
             'Nidecker', 'Jones', 'DC', 'Switchback', 'Slash', 'Telos', 'Weston'
         ]
 
+    def stage(self, name):
+        """性能分析阶段, 未开启分析时为空操作"""
+        if self.profiler:
+            return self.profiler.stage(name)
+        return nullcontext()
+
+    def record_stage(self, name, seconds):
+        """记录在线程池或进程池中测得的阶段耗时, 未开启分析时忽略"""
+        if self.profiler:
+            self.profiler.record(name, seconds)
+
     def get_page(self, page_num=1):
         """获取页面内容"""
+        if self.offline:
+            return self.read_replay_page(page_num)
+        
         try:
-            if page_num == 1:
-                url = f'{self.base_url}/products/2672/equipment-snowboards?view=all'
-            else:
-                url = f'{self.base_url}/products/2672/equipment-snowboards?page={page_num}&view=all'
+            url = self.page_url(page_num)
+            cached = self.read_cache(url)
+            if cached:
+                logger.info(f'📦 使用缓存页面 {page_num}')
+                return cached
             
             logger.info(f'📄 获取页面 {page_num}')
+            self.rate_limiter.wait()
             response = self.session.get(url, timeout=20)
             response.raise_for_status()
             
@@ -76,25 +321,206 @@ class SnowboardsScraper:
                 return None
                 
             logger.info(f'✅ 成功获取页面 {page_num}')
+            self.write_cache(url, response.text)
             return response.text
             
         except Exception as e:
             logger.error(f'❌ 获取页面失败: {e}')
             return None
 
+    def page_url(self, page_num):
+        """列表页地址"""
+        if page_num == 1:
+            return f'{self.base_url}/products/2672/equipment-snowboards?view=all'
+        return f'{self.base_url}/products/2672/equipment-snowboards?page={page_num}&view=all'
+
+    def cache_path(self, url):
+        """页面缓存文件路径"""
+        digest = hashlib.sha1(url.encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, f'{digest}.html')
+
+    def read_cache(self, url):
+        """读取未过期的缓存页面"""
+        if not self.cache_dir:
+            return None
+        
+        path = self.cache_path(url)
+        try:
+            if time.time() - os.path.getmtime(path) > self.cache_ttl:
+                return None
+            with open(path, 'r', encoding='utf-8') as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def write_cache(self, url, html):
+        """写入页面缓存"""
+        if not self.cache_dir:
+            return
+        
+        with open(self.cache_path(url), 'w', encoding='utf-8') as f:
+            f.write(html)
+
+    def read_replay_page(self, page_num):
+        """从回放文件读取页面"""
+        if page_num > len(self.replay_files):
+            return None
+        
+        path = self.replay_files[page_num - 1]
+        logger.info(f'📼 回放页面 {page_num}: {path}')
+        with open(path, 'r', encoding='utf-8') as f:
+            return f.read()
+
     def parse_products(self, html_content):
         """解析产品信息"""
         if not html_content:
             return []
-            
-        soup = BeautifulSoup(html_content, 'html.parser')
-        products = []
         
-        # 保存HTML用于调试
+        # 保存HTML用于调试 (回放时页面本身就是调试文件)
+        if not self.offline:
+            self.save_debug_html(html_content)
+        
+        return self.extract_products(html_content)
+
+    def save_debug_html(self, html_content):
+        """保存页面HTML用于调试和离线回放"""
         debug_file = os.path.join(self.data_dir, f'debug_{datetime.now().strftime("%Y%m%d_%H%M%S")}.html')
         with open(debug_file, 'w', encoding='utf-8') as f:
             f.write(html_content)
         logger.info(f'💾 保存调试HTML到: {debug_file}')
+
+    def extract_products(self, html_content):
+        """从页面HTML提取产品, 不写任何文件 (解析进程池中也调用它)
+
+        先用正则扫描JSON-LD结构化数据。结构化数据是完整的列表 (ItemList的每一项都映射为
+        产品) 且价格、图片和链接齐全时直接返回, 不构建DOM; 否则走选择器启发式, 用同页的
+        启发式结果补齐缺失的字段, 并补上结构化数据里没有的产品 (例如只标注了一个推荐产品)。
+        """
+        products, listed = self.extract_structured_products(html_content)
+        if products and len(products) >= listed > 0 and all(
+                product[field] for product in products for field in STRUCTURED_REQUIRED):
+            return products
+        heuristic = self.extract_heuristic_products(html_content)
+        if not products:
+            return heuristic
+        return self.fill_structured_products(products, heuristic)
+
+    def extract_structured_products(self, html_content):
+        """从JSON-LD的schema.org Product/Offer提取产品, 返回 (产品列表, ItemList列出的项数)"""
+        products, listed = [], 0
+        for node in iter_jsonld(html_content):
+            if is_schema_type(node, 'ItemList'):
+                listed += len(node.get('itemListElement') or [])
+            if not is_schema_type(node, 'Product'):
+                continue
+            try:
+                product = self.map_structured_product(node)
+            except (TypeError, ValueError, AttributeError) as e:
+                logger.debug(f'跳过无法识别的JSON-LD产品: {e}')
+                continue
+            if product:
+                products.append(product)
+        if products:
+            logger.info(f'🔍 JSON-LD 结构化数据找到 {len(products)} 个产品 (ItemList列出 {listed} 项)')
+        return products, listed
+
+    def fill_structured_products(self, products, heuristic):
+        """按链接 (没有时按名称) 用启发式结果补齐结构化产品缺失的价格、图片和链接, 并追加未标注的产品"""
+        by_url = {candidate['product_url']: candidate for candidate in heuristic if candidate['product_url']}
+        by_name = {candidate['name'].lower(): candidate for candidate in heuristic}
+        
+        matched = set()
+        for product in products:
+            candidate = by_url.get(product['product_url']) or by_name.get(product['name'].lower())
+            if candidate is None:
+                continue
+            matched.add(id(candidate))
+            # 价格字段成组补齐: 结构化数据没有现价, 或现价相同但没有原价
+            if product['price_cents'] is None or (
+                    product['original_price_cents'] is None and candidate['original_price_cents']
+                    and candidate['price_cents'] == product['price_cents']):
+                for field in PRICE_FIELDS:
+                    product[field] = candidate[field]
+            for field in ('image_url', 'product_url'):
+                product[field] = product[field] or candidate[field]
+        
+        extra = [candidate for candidate in heuristic if id(candidate) not in matched]
+        if extra:
+            logger.info(f'🔍 启发式补充 {len(extra)} 个结构化数据未列出的产品')
+        return products + extra
+
+    def map_structured_product(self, node):
+        """schema.org Product -> 产品字段; 品牌、类别缺失时用名称文本规则补齐
+
+        价格、原价、图片和链接缺失时留空, 由 extract_products 用同页的启发式结果补齐。
+        """
+        name = str(node.get('name') or '').strip()
+        if len(name) <= 3:
+            return None
+        
+        brand = node.get('brand')
+        if isinstance(brand, list):
+            brand = brand[0] if brand else None
+        if isinstance(brand, dict):
+            brand = brand.get('name')
+        brand = str(brand).strip() if brand else self.extract_brand(name, name)
+        
+        prices, product_url = [], node.get('url')
+        offers = node.get('offers') or []
+        for offer in offers if isinstance(offers, list) else [offers]:
+            if not isinstance(offer, dict):
+                continue
+            product_url = product_url or offer.get('url')
+            for field in ('price', 'lowPrice'):
+                value = price_value(offer.get(field))
+                if value is not None:
+                    prices.append(value)
+                    break
+            # 划线价/标价 (schema.org 没有单独的原价字段)
+            specs = offer.get('priceSpecification') or []
+            for spec in specs if isinstance(specs, list) else [specs]:
+                if isinstance(spec, dict) and any(kind in str(spec.get('priceType', ''))
+                                                  for kind in ('ListPrice', 'StrikethroughPrice')):
+                    prices.append(price_value(spec.get('price')))
+        price_data = self.format_prices([p for p in prices if p is not None])
+        
+        image = node.get('image')
+        if isinstance(image, list):
+            image = image[0] if image else None
+        if isinstance(image, dict):
+            image = image.get('url') or image.get('contentUrl')
+        
+        return self.new_product({
+            'brand': brand,
+            'name': name[:200],
+            'current_price': price_data.get('current'),
+            'original_price': price_data.get('original'),
+            'discount': price_data.get('discount'),
+            'price_cents': price_data.get('current_cents'),
+            'original_price_cents': price_data.get('original_cents'),
+            'discount_bp': price_data.get('discount_bp'),
+            'image_url': self.absolute_url(image),
+            'product_url': self.absolute_url(product_url),
+            'category': self.detect_category(name, brand)
+        })
+
+    def absolute_url(self, url):
+        """把相对/协议相对地址补全为绝对地址"""
+        if not url or not isinstance(url, str):
+            return None
+        url = url.strip()
+        if url.startswith('//'):
+            return 'https:' + url
+        if url.startswith('/'):
+            return urljoin(self.base_url, url)
+        if url.startswith(('data:', 'javascript:', '#')):
+            return None
+        return url
+
+    def extract_heuristic_products(self, html_content):
+        """用容器/字段选择器启发式提取产品"""
+        soup = BeautifulSoup(html_content, 'html.parser')
+        products = []
         
         # 尝试多种选择器定位产品
         product_selectors = [
@@ -150,30 +576,47 @@ class SnowboardsScraper:
             # 获取链接
             product_url = self.extract_url(container)
             
-            # 下载图片
-            image_filename = self.download_image(image_url, brand, name) if image_url else None
-            
-            product = {
-                'id': f'prod_{int(time.time())}_{random.randint(1000, 9999)}',
+            return self.new_product({
                 'brand': brand,
                 'name': name[:200],
                 'current_price': price_data.get('current'),
                 'original_price': price_data.get('original'),
                 'discount': price_data.get('discount'),
+                'price_cents': price_data.get('current_cents'),
+                'original_price_cents': price_data.get('original_cents'),
+                'discount_bp': price_data.get('discount_bp'),
                 'image_url': image_url,
-                'local_image': image_filename,
                 'product_url': product_url,
-                'category': self.detect_category(name, brand),
-                'scraped_at': datetime.now().isoformat(),
-                'updated_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            }
-            
-            return product
+                'category': self.detect_category(name, brand)
+            })
             
         except Exception as e:
             logger.error(f'提取产品失败: {e}')
             return None
 
+    def new_product(self, fields):
+        """由页面字段 (RECORD_FIELDS) 生成完整产品, 补上本次运行的id、来源和时间"""
+        now = datetime.now()
+        return {
+            'id': f'prod_{int(time.time())}_{random.randint(1000, 9999)}',
+            'brand': fields['brand'],
+            'name': fields['name'],
+            'current_price': fields['current_price'],
+            'original_price': fields['original_price'],
+            'discount': fields['discount'],
+            'price_cents': fields['price_cents'],
+            'original_price_cents': fields['original_price_cents'],
+            'discount_bp': fields['discount_bp'],
+            'image_url': fields['image_url'],
+            'local_image': None,
+            'product_url': fields['product_url'],
+            'category': fields['category'],
+            'source': self.source_name,
+            'scraped_at': now.isoformat(),
+            'scraped_ts': int(now.timestamp()),
+            'updated_at': now.strftime('%Y-%m-%d %H:%M:%S')
+        }
+
     def extract_name(self, container):
         """提取产品名称"""
         # 尝试多种选择器
@@ -248,8 +691,7 @@ class SnowboardsScraper:
         text = container.get_text()
         
         # 查找所有价格
-        price_pattern = r'\$(\d{1,3}(?:,\d{3})*(?:\.\d{2})?)'
-        prices = re.findall(price_pattern, text)
+        prices = re.findall(PRICE_PATTERN, text)
         
         # 清理价格
         price_values = []
@@ -261,6 +703,19 @@ class SnowboardsScraper:
             except ValueError:
                 continue
         
+        return self.format_prices(price_values)
+
+    def extract_price_text(self, text):
+        """从一段文本中提取第一个价格数值"""
+        if not text:
+            return None
+        match = re.search(PRICE_PATTERN, text)
+        if not match:
+            return None
+        return float(match.group(1).replace(',', ''))
+
+    def format_prices(self, price_values):
+        """由价格数值生成现价/原价/折扣 (最低为现价, 次低为原价)"""
         price_values = sorted(set(price_values))
         price_data = {}
         
@@ -279,6 +734,13 @@ class SnowboardsScraper:
             price_data['original'] = None
             price_data['discount'] = None
         
+        # 数值字段, 消费端排序/筛选不必再解析字符串
+        price_data['current_cents'] = price_to_cents(price_values[0]) if price_values else None
+        price_data['original_cents'] = price_to_cents(price_values[1]) if len(price_values) >= 2 else None
+        price_data['discount_bp'] = None
+        if price_data['original_cents']:
+            price_data['discount_bp'] = (price_data['original_cents'] - price_data['current_cents']) * 10000 // price_data['original_cents']
+        
         return price_data
 
     def extract_image(self, container):
@@ -351,57 +813,149 @@ class SnowboardsScraper:
         
         return '雪板'
 
+    def image_filename(self, image_url, brand, name):
+        """图片文件名: 品牌_名称_地址哈希.扩展名"""
+        safe_brand = re.sub(r'[<>:"/\\|?*]', '', brand)[:20]
+        safe_name = re.sub(r'[<>:"/\\|?*]', '', name)[:30]
+        safe_name = re.sub(r'\s+', '_', safe_name)
+        
+        ext = 'jpg'
+        if '.' in image_url:
+            url_ext = image_url.split('.')[-1].lower().split('?')[0]
+            if url_ext in ['jpg', 'jpeg', 'png', 'gif', 'webp']:
+                ext = url_ext
+        
+        # 文件名由图片地址决定, 同一张图片每天运行都命中已有文件
+        url_hash = hashlib.sha1(image_url.encode('utf-8')).hexdigest()[:8]
+        return f"{safe_brand}_{safe_name}_{url_hash}.{ext}"
+
     def download_image(self, image_url, brand, name):
         """下载产品图片"""
         if not image_url:
             return None
         
+        filename = self.image_filename(image_url, brand, name)
+        filepath = os.path.join(self.images_dir, filename)
+        existing = self.existing_image(filename)
+        if existing:
+            return existing
+        
+        # 流式写入临时文件, 边写边检查大小和文件头, 不把整个响应体读入内存
+        download = self.image_download(image_url, filepath)
         try:
-            safe_brand = re.sub(r'[<>:"/\\|?*]', '', brand)[:20]
-            safe_name = re.sub(r'[<>:"/\\|?*]', '', name)[:30]
-            safe_name = re.sub(r'\s+', '_', safe_name)
-            
-            ext = 'jpg'
-            if '.' in image_url:
-                url_ext = image_url.split('.')[-1].lower().split('?')[0]
-                if url_ext in ['jpg', 'jpeg', 'png', 'gif', 'webp']:
-                    ext = url_ext
-            
-            filename = f"{safe_brand}_{safe_name}_{int(time.time())%10000}.{ext}"
-            filepath = os.path.join(self.images_dir, filename)
-            
-            if os.path.exists(filepath):
-                return filename
-            
             logger.info(f'⬇️ 下载图片: {image_url[:50]}...')
-            response = self.session.get(image_url, timeout=15)
-            response.raise_for_status()
-            
-            with open(filepath, 'wb') as f:
-                f.write(response.content)
-            
+            self.rate_limiter.wait()
+            with self.session.get(image_url, timeout=15, stream=True) as response:
+                response.raise_for_status()
+                download.check_headers(response.headers)
+                for chunk in response.iter_content(CHUNK_SIZE):
+                    download.write(chunk)
+            download.commit()
             logger.info(f'✅ 图片保存: {filename}')
             return filename
-            
+        
+        except ImageRejected as e:
+            download.abort(e.reason)
+            logger.warning(f'🚫 丢弃图片 {image_url[:50]}: {e}')
+            return None
         except Exception as e:
+            download.abort('error')
             logger.error(f'❌ 下载图片失败: {e}')
             return None
 
-    def save_data(self, products):
-        """保存数据到JSON和CSV"""
+    def existing_image(self, filename):
+        """已下载过的图片文件名; 已合并为重复图片时返回其规范图片, 都没有时返回None"""
+        for candidate in (filename, self.image_aliases.get(filename)):
+            if candidate and os.path.exists(os.path.join(self.images_dir, candidate)):
+                self.image_stats.record_existing()
+                return candidate
+        return None
+
+    def image_download(self, image_url, filepath):
+        """创建一次带校验的流式图片下载"""
+        return ImageDownload(image_url, filepath, self.image_stats, self.placeholders, self.max_image_bytes)
+
+    def finish_images(self, products=()):
+        """删除识别前已保存的占位图并清空对应产品的local_image, 保存新识别的占位图, 记录下载统计"""
+        removed = self.placeholders.purge(self.image_stats)
+        if removed:
+            for product in products:
+                if product.get('local_image') in removed:
+                    product['local_image'] = None
+        if self.save_placeholders:
+            self.placeholders.save()
+        summary = self.image_stats.summary(self.images_dir)
+        if summary['saved'] or summary['rejected']:
+            logger.info(f'🖼️ 图片: 新保存 {summary["saved"]} 张 ({summary["saved_bytes"] / 1024 / 1024:.1f} MB), '
+                        f'已存在 {summary["existing"]} 张, 丢弃 {sum(summary["rejected"].values())} 张 '
+                        f'{summary["rejected"]} 浪费 {summary["wasted_bytes"] / 1024:.0f} KB')
+        return summary
+
+    def download_product_images(self, products):
+        """并发下载产品图片并回填local_image"""
+        if not self.download_images:
+            return
+        
+        pending = [p for p in products if p.get('image_url') and not p.get('local_image')]
+        if not pending:
+            return
+        
+        def fetch(product):
+            return self.download_image(product['image_url'], product['brand'], product['name'])
+        
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            for product, filename in zip(pending, executor.map(fetch, pending)):
+                product['local_image'] = filename
+
+    def dedupe_product_images(self, products):
+        """更新感知哈希索引, 删除近似重复的图片文件, 产品改用规范图片"""
+        import images
+        index = images.build_phash_index(self.images_dir, self.phash_index_file, prune=True)
+        self.image_aliases = image_aliases(index)
+        for product in products:
+            if product.get('local_image') in self.image_aliases:
+                product['local_image'] = self.image_aliases[product['local_image']]
+
+    def build_image_derivatives(self, products):
+        """为本次产品图片生成缩略图/WebP衍生图, 并回填thumbnail字段"""
+        filenames = sorted({p['local_image'] for p in products if p.get('local_image')})
+        if not filenames:
+            return
+        
+        import images
+        manifest = images.build_derivatives(self.images_dir, filenames)
+        for product in products:
+            product['thumbnail'] = images.thumbnail(manifest.get(product.get('local_image')))
+
+    def save_data(self, products, sources=None):
+        """保存数据到JSON和CSV (sources为多数据源合并时的来源列表)"""
         if not products:
             logger.warning('⚠️ 没有数据可保存')
             return None
         
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        for product in products:
+            product.setdefault('key', product_key(product))
+            upgrade_product(product)
+        tables = intern_ids(products, os.path.join(self.data_dir, 'id_tables.json'))
+        
+        # 优惠排行: 由折扣深度、历史低价和最近降价计算deal_score, 预先输出各品牌/类别的前K名
+        if 'deals' in self.formats:
+            from deals import write_deals
+            write_deals(products, self.web_dir, self.data_dir)
         
         # 保存JSON数据
         json_data = {
             'metadata': {
+                'schema_version': SCHEMA_VERSION,
                 'total_products': len(products),
                 'unique_brands': len(set(p['brand'] for p in products)),
                 'last_updated': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                'source': self.base_url
+                'updated_ts': int(time.time()),
+                'source': self.base_url,
+                'sources': sources or [self.source_name],
+                'brands': tables['brands'],
+                'categories': tables['categories']
             },
             'products': products
         }
@@ -412,22 +966,46 @@ class SnowboardsScraper:
             json.dump(json_data, f, ensure_ascii=False, indent=2)
         
         # 同时保存到data目录备份
-        json_file_backup = os.path.join(self.data_dir, f'snowboards_{timestamp}.json')
-        with open(json_file_backup, 'w', encoding='utf-8') as f:
-            json.dump(json_data, f, ensure_ascii=False, indent=2)
+        if 'json' in self.formats:
+            json_file_backup = os.path.join(self.data_dir, f'snowboards_{timestamp}.json')
+            with open(json_file_backup, 'w', encoding='utf-8') as f:
+                json.dump(json_data, f, ensure_ascii=False, indent=2)
         
         logger.info(f'💾 保存JSON数据: {json_file}')
         
         # 保存CSV备份
-        csv_file_backup = os.path.join(self.data_dir, f'snowboards_{timestamp}.csv')
-        with open(csv_file_backup, 'w', newline='', encoding='utf-8-sig') as f:
-            if products:
-                fieldnames = products[0].keys()
-                writer = csv.DictWriter(f, fieldnames=fieldnames)
-                writer.writeheader()
-                writer.writerows(products)
+        csv_file_backup = None
+        if 'csv' in self.formats:
+            csv_file_backup = os.path.join(self.data_dir, f'snowboards_{timestamp}.csv')
+            with open(csv_file_backup, 'w', newline='', encoding='utf-8-sig') as f:
+                if products:
+                    # 各产品字段可能不完全相同 (例如缩略图), 取并集
+                    fieldnames = list(dict.fromkeys(key for product in products for key in product))
+                    writer = csv.DictWriter(f, fieldnames=fieldnames)
+                    writer.writeheader()
+                    writer.writerows(products)
+            
+            logger.info(f'💾 保存CSV数据: {csv_file_backup}')
+        
+        # 列式二进制目录, 分析脚本和API可以mmap直接读取数值列
+        if 'bin' in self.formats:
+            from catalog_bin import write_catalog
+            write_catalog(products, os.path.join(self.web_dir, 'catalog.bin'), json_data['metadata'])
+        
+        # 发布小程序用的增量数据
+        if 'feed' in self.formats:
+            from delta import publish_feed
+            publish_feed(products, self.web_dir, json_data['metadata'])
         
-        logger.info(f'💾 保存CSV数据: {csv_file_backup}')
+        # 价格走势: 由每日JSON快照增量维护日/周/月聚合, 页面按需加载单个产品的序列
+        if 'series' in self.formats and 'json' in self.formats:
+            from rollups import update_rollups
+            update_rollups(self.data_dir, self.web_dir)
+        
+        # 关注列表: 只用新增或降价的产品匹配相关规则 (没有 data/watchlists.json 时跳过)
+        if 'watch' in self.formats:
+            from watchlist import run_watchlists
+            run_watchlists(products, self.data_dir, self.web_dir)
         
         return {
             'json': json_file,
@@ -435,52 +1013,132 @@ class SnowboardsScraper:
             'count': len(products)
         }
 
-    def scrape_all_pages(self, max_pages=2):
-        """爬取所有页面"""
-        logger.info('🚀 开始爬取雪板数据...')
-        logger.info(f'📁 数据目录: {self.data_dir}')
-        logger.info(f'🖼️ 图片目录: {self.images_dir}')
-        
-        all_products = []
-        
+    def iter_pages(self, max_pages=2):
+        """依次获取列表页, 产出 (页码, HTML)
+
+        以下情况停止翻页: 第一页获取失败; 页面的产品链接与已获取的某页完全相同
+        (超出末页时站点会重复返回最后一页); 分页信息表明已是最后一页。max_pages 只是安全上限。
+        """
+        seen = {}
         for page in range(1, max_pages + 1):
             logger.info(f'📄 正在处理第 {page}/{max_pages} 页')
             
             # 获取页面
-            html = self.get_page(page)
-            if not html:
-                logger.warning(f'⚠️ 第 {page} 页获取失败')
-                if page == 1:
-                    logger.error('❌ 第一页获取失败')
-                    break
+            with self.stage('fetch'):
+                html = self.get_page(page)
+            status = self.check_page(page, html, seen)
+            if status == 'stop':
+                break
+            if status == 'skip':
                 continue
             
-            # 解析产品
-            products = self.parse_products(html)
-            logger.info(f'✅ 第 {page} 页找到 {len(products)} 个产品')
+            yield page, html
             
-            all_products.extend(products)
+            if self.is_last_page(page, html):
+                break
             
             # 页间延迟
-            if page < max_pages and products:
-                delay = random.uniform(2, 4)
-                logger.info(f'⏳ 等待 {delay:.1f} 秒后继续...')
+            delay = self.next_page_delay(page, max_pages)
+            if delay:
                 time.sleep(delay)
+
+    def check_page(self, page, html, seen):
+        """获取后检查页面: 'skip' 跳过, 'stop' 停止翻页, None 继续处理; seen 为 {指纹: 页码}"""
+        if not html:
+            logger.warning(f'⚠️ 第 {page} 页获取失败')
+            if page == 1:
+                logger.error('❌ 第一页获取失败')
+                return 'stop'
+            return 'skip'
+        
+        fingerprint = page_fingerprint(html)
+        if fingerprint in seen:
+            logger.info(f'🔁 第 {page} 页与第 {seen[fingerprint]} 页的产品完全相同, 停止翻页')
+            return 'stop'
+        if fingerprint:
+            seen[fingerprint] = page
+        return None
+
+    def is_last_page(self, page, html):
+        """分页信息表明这是最后一页"""
+        current, total, has_next = pagination(html)
+        if has_next is False or (total and current and current >= total):
+            logger.info(f'🏁 已到最后一页 ({current or page} / {total or "?"})')
+            return True
+        return False
+
+    def next_page_delay(self, page, max_pages):
+        """翻到下一页前的随机等待秒数 (离线回放或未设置时为0)"""
+        if page < max_pages and not self.offline and self.page_delay:
+            delay = random.uniform(*self.page_delay)
+            logger.info(f'⏳ 等待 {delay:.1f} 秒后继续...')
+            return delay
+        return 0
+
+    def iter_page_products(self, max_pages=2):
+        """按页码顺序产出 (页码, 产品列表)
+
+        第一页在本进程解析; 确实取到第二页且parse_workers > 1时才启动进程池
+        解析其余页面, 进程数不超过剩余页数, 只有一页时不付出进程启动的开销。
+        """
+        workers = min(self.parse_workers, max_pages - 1)
+        pages = self.iter_pages(max_pages)
+        for page, html in pages:
+            # 在阶段之外产出, 下游的去重和图片下载不计入parse
+            with self.stage('parse'):
+                products = self.parse_products(html)
+            yield page, products
+            if workers > 1:
+                break
         
-        # 去重
-        seen = set()
+        following = next(pages, None) if workers > 1 else None
+        if following is None:
+            return
+        from parse_pool import ParsePool
+        with ParsePool(self, workers) as pool:
+            yield from pool.parse_pages(chain([following], pages))
+
+    def collect_page(self, page, products):
+        """处理一页解析结果: 去重后只为新产品下载图片, 返回要加入目录的产品"""
+        with self.stage('dedup'):
+            unique = self.dedup.filter(products)
+        logger.info(f'✅ 第 {page} 页找到 {len(products)} 个产品, 其中新产品 {len(unique)} 个')
+        with self.stage('images'):
+            self.download_product_images(unique)
+        return unique
+
+    def crawl_pages(self, max_pages=2):
+        """抓取并解析所有页面, 返回去重后的产品列表 (不保存)"""
+        from dedup import StreamingDedup
+        self.dedup = StreamingDedup(self.bloom_capacity)
         unique_products = []
-        for product in all_products:
-            product_key = f"{product.get('brand')}_{product.get('name')}_{product.get('current_price')}"
-            if product_key not in seen:
-                seen.add(product_key)
-                unique_products.append(product)
+        for page, products in self.iter_page_products(max_pages):
+            unique_products.extend(self.collect_page(page, products))
+        self.finish_images(unique_products)
+        
+        logger.info(f'📊 去重后剩余 {len(unique_products)} 个产品 (丢弃重复 {self.dedup.duplicates} 个)')
+        return unique_products
+
+    def scrape_all_pages(self, max_pages=2):
+        """爬取所有页面"""
+        logger.info('🚀 开始爬取雪板数据...')
+        logger.info(f'📁 数据目录: {self.data_dir}')
+        logger.info(f'🖼️ 图片目录: {self.images_dir}')
+        
+        unique_products = self.crawl_pages(max_pages)
         
-        logger.info(f'📊 去重后剩余 {len(unique_products)} 个产品')
+        if unique_products and self.dedupe_images:
+            with self.stage('image_dedup'):
+                self.dedupe_product_images(unique_products)
+        
+        if unique_products and self.derivatives:
+            with self.stage('derivatives'):
+                self.build_image_derivatives(unique_products)
         
         if unique_products:
             # 保存数据
-            saved_files = self.save_data(unique_products)
+            with self.stage('save'):
+                saved_files = self.save_data(unique_products)
             
             # 统计信息
             brands = set(p['brand'] for p in unique_products)
@@ -495,6 +1153,7 @@ class SnowboardsScraper:
             
             return {
                 'products': unique_products,
+                'images': self.image_stats.summary(self.images_dir),
                 'files': {
                     'json': saved_files["json"] if saved_files else None,
                     'csv': saved_files["csv"] if saved_files else None
@@ -504,18 +1163,167 @@ class SnowboardsScraper:
             logger.error('❌ 没有获取到任何产品数据')
             return None
 
-def main():
+def find_replay_files(source):
+    """解析回放来源: 目录(取其中的debug_*.html)、通配符或单个文件"""
+    if os.path.isdir(source):
+        return sorted(glob.glob(os.path.join(source, 'debug_*.html')))
+    return sorted(glob.glob(source))
+
+def parse_delay(value):
+    """解析页间延迟: "2-4" 表示随机2到4秒, "0" 表示不等待"""
+    low, _, high = str(value).partition('-')
+    low = float(low)
+    high = float(high) if high else low
+    if low <= 0 and high <= 0:
+        return None
+    return (low, high)
+
+def parse_formats(value):
+    """解析输出格式列表, 例如 json,csv"""
+    formats = tuple(f.strip() for f in value.split(',') if f.strip())
+    unknown = [f for f in formats if f not in OUTPUT_FORMATS]
+    if unknown:
+        raise argparse.ArgumentTypeError(f'未知的输出格式: {", ".join(unknown)}')
+    return formats
+
+def build_parser():
+    """构建命令行参数解析器"""
+    parser = argparse.ArgumentParser(description='雪板数据爬虫')
+    parser.add_argument('--base-url', default=DEFAULT_BASE_URL, help='站点地址')
+    parser.add_argument('--max-pages', type=int, default=50,
+                        help='最多爬取的页数 (安全上限, 通常由分页信息或重复页提前结束)')
+    parser.add_argument('--workers', type=int, default=4, help='图片下载线程数 (同时决定连接池大小)')
+    parser.add_argument('--parse-workers', type=int, default=0,
+                        help='页面解析进程数, 0表示按CPU核数, 1表示在主进程解析')
+    parser.add_argument('--rate-limit', type=float, default=0,
+                        help='每秒最多请求数, 0表示不限速')
+    parser.add_argument('--bloom-capacity', type=int, default=0, metavar='N',
+                        help='用容量为N的布隆过滤器去重 (误判率0.1%%), 0表示精确去重')
+    parser.add_argument('--async-http', action='store_true',
+                        help='使用基于httpx的异步抓取 (单线程并发下载图片, 安装h2时启用HTTP/2)')
+    parser.add_argument('--max-connections', type=int, default=100,
+                        help='异步抓取的连接池大小和图片并发数')
+    parser.add_argument('--page-delay', type=parse_delay, default=(2, 4), metavar='MIN-MAX',
+                        help='页间随机延迟秒数, 例如 2-4, 0表示不等待')
+    parser.add_argument('--web-dir', help='网页输出目录 (默认 web/)')
+    parser.add_argument('--data-dir', help='数据备份目录 (默认 data/)')
+    parser.add_argument('--cache-dir', help='页面缓存目录, 不指定则不缓存')
+    parser.add_argument('--cache-ttl', type=int, default=3600, help='页面缓存有效期(秒)')
+    parser.add_argument('--formats', type=parse_formats, default=OUTPUT_FORMATS,
+                        help='输出格式, 逗号分隔: json/csv为data目录备份, feed为web/feed增量数据, '
+                             'bin为web/catalog.bin列式二进制目录, series为web/series价格走势, '
+                             'deals为web/deals.json优惠排行, watch为web/watch关注提醒 (默认全部)')
+    parser.add_argument('--no-images', dest='download_images', action='store_false',
+                        help='不下载产品图片')
+    parser.add_argument('--max-image-mb', type=float, default=MAX_IMAGE_BYTES / 1024 / 1024,
+                        help='单张图片的大小上限(MB), 超出的下载会被中止')
+    parser.add_argument('--no-derivatives', dest='derivatives', action='store_false',
+                        help='不生成缩略图和WebP衍生图')
+    parser.add_argument('--no-image-dedup', dest='dedupe_images', action='store_false',
+                        help='不按感知哈希合并近似重复的产品图片')
+    parser.add_argument('--log-file', default='logs/scraper.log', help='日志文件, 空字符串表示只输出到终端')
+    parser.add_argument('--log-level', default='INFO', help='日志级别')
+    parser.add_argument('--sources', type=lambda v: [n.strip() for n in v.split(',') if n.strip()],
+                        default=['snowboards'], help='逗号分隔的数据源, 多个数据源并发抓取后合并')
+    parser.add_argument('--sources-config', metavar='FILE',
+                        help='选择器数据源配置 (JSON列表), 见 sources.SelectorSource')
+    parser.add_argument('--replay', metavar='PATH',
+                        help='离线回放已保存的HTML (目录/通配符/文件), 不访问网络')
+    parser.add_argument('--profile', nargs='?', const='profile', metavar='DIR',
+                        help='按阶段采集cProfile和tracemalloc数据并写入DIR (默认 profile/)')
+    return parser
+
+def parse_args(argv=None):
+    """解析命令行参数"""
+    return build_parser().parse_args(argv)
+
+def run(options=None, **overrides):
+    """程序化入口: 按选项执行一次完整的爬取流程
+
+    options为parse_args()的结果, 关键字参数覆盖其中的同名选项,
+    例如 run(max_pages=1, workers=8, download_images=False)。
+    """
+    if options is None:
+        options = parse_args([])
+    options = argparse.Namespace(**{**vars(options), **overrides})
+    
+    replay_files = None
+    web_dir = options.web_dir or 'web'
+    data_dir = options.data_dir or 'data'
+    if options.replay:
+        replay_files = find_replay_files(options.replay)
+        if not replay_files:
+            raise FileNotFoundError(f'没有找到回放文件: {options.replay}')
+        # 回放输出默认写到单独目录, 不覆盖线上数据
+        output_root = os.path.join(options.profile or 'replay', 'output')
+        web_dir = options.web_dir or os.path.join(output_root, 'web')
+        data_dir = options.data_dir or os.path.join(output_root, 'data')
+    
+    profiler = None
+    if options.profile:
+        from profiling import ScrapeProfiler
+        profiler = ScrapeProfiler(options.profile)
+    
+    scraper_options = dict(
+        base_url=options.base_url,
+        web_dir=web_dir,
+        data_dir=data_dir,
+        workers=options.workers,
+        rate_limit=options.rate_limit,
+        page_delay=options.page_delay,
+        cache_dir=options.cache_dir,
+        cache_ttl=options.cache_ttl,
+        formats=options.formats,
+        download_images=options.download_images,
+        derivatives=options.derivatives,
+        parse_workers=options.parse_workers or os.cpu_count() or 1,
+        bloom_capacity=options.bloom_capacity,
+        max_image_bytes=int(options.max_image_mb * 1024 * 1024),
+        dedupe_images=options.dedupe_images
+    )
+    
+    # 多数据源: 并发抓取后合并为一个目录
+    if not replay_files and (options.sources_config or options.sources != ['snowboards']):
+        from sources import scrape_sources
+        return scrape_sources(options.sources, options.max_pages, options.sources_config,
+                              **scraper_options)
+    
+    scraper_class = SnowboardsScraper
+    if options.async_http:
+        from async_scraper import AsyncSnowboardsScraper
+        scraper_class = AsyncSnowboardsScraper
+        scraper_options['max_connections'] = options.max_connections
+    scraper = scraper_class(
+        replay_files=replay_files,
+        profiler=profiler,
+        **scraper_options
+    )
+    
+    max_pages = options.max_pages
+    if replay_files:
+        max_pages = min(max_pages, len(replay_files))
+    result = scraper.scrape_all_pages(max_pages=max_pages)
+    
+    if profiler:
+        summary_file = profiler.write_reports()
+        print(f"\n📈 性能分析汇总: {summary_file}")
+    
+    if result:
+        result['images_dir'] = scraper.images_dir
+    return result
+
+def main(argv=None):
     """主函数"""
+    args = parse_args(argv)
+    configure_logging(args.log_file, args.log_level)
+    
     print("=" * 60)
     print("🏂 雪板数据爬虫")
     print("=" * 60)
     
     try:
-        # 创建爬虫实例
-        scraper = SnowboardsScraper()
-        
         # 爬取数据
-        result = scraper.scrape_all_pages(max_pages=2)
+        result = run(args)
         
         if result:
             products = result['products']
@@ -524,8 +1332,13 @@ def main():
             print(f"\n✅ 爬取完成！共获取 {len(products)} 个产品")
             print(f"\n📁 生成的文件:")
             print(f"  📄 JSON文件: {files.get('json', '无')}")
-            print(f"  📊 CSV文件: {files.get('csv', '无')}")
-            print(f"  🖼️ 图片目录: {scraper.images_dir}/")
+            print(f"  📊 CSV文件: {files.get('csv') or '无'}")
+            print(f"  🖼️ 图片目录: {result['images_dir']}/")
+            images = result.get('images')
+            if images:
+                print(f"  🖼️ 新图片 {images['saved']} 张, 丢弃 {sum(images['rejected'].values())} 张 "
+                      f"(浪费 {images['wasted_bytes'] / 1024:.0f} KB), 图片目录共 "
+                      f"{images.get('storage_bytes', 0) / 1024 / 1024:.1f} MB")
             
             # 显示统计信息
             brands = {}
@@ -0,0 +1,280 @@
+import hashlib
+import json
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urljoin
+
+from bs4 import BeautifulSoup
+
+from matching import match_products, save_price_comparison
+from scraper import SnowboardsScraper
+
+logger = logging.getLogger(__name__)
+
+
+class SourceAdapter:
+    """数据源适配器基类
+
+    子类实现三个扩展点: page_urls() 枚举列表页, parse() 把页面解析为原始记录,
+    map_fields() 把原始记录映射为统一的产品字段。crawl() 把它们串成一次抓取。
+    """
+
+    name = 'base'
+
+    def __init__(self, rate_limit=0, **scraper_options):
+        # 复用SnowboardsScraper的会话、品牌/类别识别和图片下载
+        self.scraper = SnowboardsScraper(rate_limit=rate_limit, **scraper_options)
+        self.scraper.source_name = self.name
+        self.scraper.save_placeholders = False
+        self.rate_limiter = self.scraper.rate_limiter
+
+    def page_urls(self, max_pages):
+        """枚举列表页地址"""
+        raise NotImplementedError
+
+    def parse(self, html):
+        """把页面解析为原始记录列表"""
+        raise NotImplementedError
+
+    def map_fields(self, record):
+        """把原始记录映射为统一产品字段"""
+        record['source'] = self.name
+        return record
+
+    def fetch(self, url):
+        """按本数据源的限速获取页面"""
+        try:
+            self.rate_limiter.wait()
+            response = self.scraper.session.get(url, timeout=20)
+            response.raise_for_status()
+            return response.text
+        except Exception as e:
+            logger.error(f'❌ [{self.name}] 获取页面失败: {e}')
+            return None
+
+    def crawl(self, max_pages):
+        """抓取本数据源的全部产品"""
+        products = []
+        for page, url in enumerate(self.page_urls(max_pages), 1):
+            html = self.fetch(url)
+            if not html:
+                break
+            records = self.parse(html)
+            logger.info(f'✅ [{self.name}] 第 {page} 页找到 {len(records)} 个产品')
+            if not records:
+                break
+            page_products = [self.map_fields(record) for record in records]
+            self.scraper.download_product_images(page_products)
+            products.extend(page_products)
+        self.scraper.finish_images(products)
+        return products
+
+
+class SnowboardsSource(SourceAdapter):
+    """snowboards.com 适配器, 直接委托给SnowboardsScraper"""
+
+    name = 'snowboards'
+
+    def page_urls(self, max_pages):
+        return [self.scraper.page_url(page) for page in range(1, max_pages + 1)]
+
+    def parse(self, html):
+        return self.scraper.parse_products(html)
+
+    def crawl(self, max_pages):
+        return self.scraper.crawl_pages(max_pages)
+
+
+class SelectorSource(SourceAdapter):
+    """按配置的CSS选择器抓取的通用适配器, 新增零售商无需写代码
+
+    配置示例:
+        {
+            "name": "example",
+            "base_url": "https://shop.example.com",
+            "page_url": "{base_url}/snowboards?page={page}",
+            "rate_limit": 1,
+            "item_selector": ".product-tile",
+            "fields": {
+                "name": ".tile-name",
+                "current_price": ".price-sale",
+                "original_price": ".price-list",
+                "image_url": "img@src",
+                "product_url": "a@href"
+            }
+        }
+    """
+
+    def __init__(self, config, **scraper_options):
+        self.name = config['name']
+        self.config = config
+        scraper_options['base_url'] = config['base_url']
+        if 'rate_limit' in config:
+            scraper_options['rate_limit'] = config['rate_limit']
+        super().__init__(**scraper_options)
+
+    def page_urls(self, max_pages):
+        template = self.config.get('page_url', '{base_url}?page={page}')
+        return [template.format(base_url=self.config['base_url'], page=page)
+                for page in range(1, max_pages + 1)]
+
+    def select_field(self, container, selector):
+        """按 "css" 或 "css@attr" 取文本/属性"""
+        css, _, attr = selector.partition('@')
+        element = container.select_one(css) if css else container
+        if not element:
+            return None
+        value = element.get(attr) if attr else element.get_text(strip=True)
+        return value.strip() if value else None
+
+    def parse(self, html):
+        soup = BeautifulSoup(html, 'html.parser')
+        records = []
+        for container in soup.select(self.config['item_selector']):
+            record = {field: self.select_field(container, selector)
+                      for field, selector in self.config.get('fields', {}).items()}
+            if record.get('name'):
+                records.append(record)
+        return records
+
+    def map_fields(self, record):
+        scraper = self.scraper
+        name = record['name']
+        base_url = self.config['base_url']
+        current = scraper.extract_price_text(record.get('current_price'))
+        original = scraper.extract_price_text(record.get('original_price'))
+        prices = {}
+        if current is not None:
+            prices = scraper.format_prices([current] + ([original] if original is not None else []))
+
+        image_url = record.get('image_url')
+        product_url = record.get('product_url')
+        brand = record.get('brand') or scraper.extract_brand(name, name)
+        product = scraper.new_product({
+            'brand': brand,
+            'name': name[:200],
+            'current_price': prices.get('current'),
+            'original_price': prices.get('original'),
+            'discount': prices.get('discount'),
+            'price_cents': prices.get('current_cents'),
+            'original_price_cents': prices.get('original_cents'),
+            'discount_bp': prices.get('discount_bp'),
+            'image_url': urljoin(base_url, image_url) if image_url else None,
+            'product_url': urljoin(base_url, product_url) if product_url else None,
+            'category': scraper.detect_category(name, brand)
+        })
+        # 按链接 (没有时按名称) 生成稳定id
+        digest = hashlib.sha1((product_url or name).encode('utf-8')).hexdigest()[:10]
+        product['id'] = f'{self.name}_{digest}'
+        return product
+
+
+SOURCES = {
+    'snowboards': SnowboardsSource,
+}
+
+
+def load_sources(names, config_file=None, **scraper_options):
+    """按名称和配置文件创建数据源适配器"""
+    configs = {}
+    if config_file:
+        with open(config_file, 'r', encoding='utf-8') as f:
+            configs = {config['name']: config for config in json.load(f)}
+
+    sources = []
+    for name in names:
+        if name in configs:
+            sources.append(SelectorSource(configs[name], **scraper_options))
+        elif name in SOURCES:
+            sources.append(SOURCES[name](**scraper_options))
+        else:
+            raise ValueError(f'未知的数据源: {name}')
+    return sources
+
+
+def merge_catalogs(results):
+    """合并各数据源的产品为一个目录, 同一来源内按链接/名称去重"""
+    seen = set()
+    catalog = []
+    for source_name, products in results:
+        for product in products:
+            product['source'] = source_name
+            key = (source_name, product.get('product_url') or f"{product.get('brand')}_{product.get('name')}")
+            if key in seen:
+                continue
+            seen.add(key)
+            catalog.append(product)
+    return catalog
+
+
+class SourceScheduler:
+    """并发运行多个数据源, 每个数据源各自限速, 总耗时约等于最慢的数据源"""
+
+    def __init__(self, sources, max_workers=None):
+        self.sources = sources
+        self.max_workers = max_workers or len(sources)
+        self.timings = {}
+
+    def crawl_source(self, source, max_pages):
+        """抓取单个数据源并记录耗时"""
+        start = time.perf_counter()
+        products = source.crawl(max_pages)
+        self.timings[source.name] = time.perf_counter() - start
+        logger.info(f'🏁 [{source.name}] 完成: {len(products)} 个产品, 耗时 {self.timings[source.name]:.1f} 秒')
+        return products
+
+    def run(self, max_pages=2):
+        """抓取全部数据源并合并"""
+        results = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {executor.submit(self.crawl_source, source, max_pages): source for source in self.sources}
+            for future in as_completed(futures):
+                source = futures[future]
+                try:
+                    results[source.name] = future.result()
+                except Exception as e:
+                    logger.error(f'❌ [{source.name}] 抓取失败: {e}', exc_info=True)
+                    results[source.name] = []
+
+        # 按配置顺序合并, 保证输出稳定
+        ordered = [(source.name, results.get(source.name, [])) for source in self.sources]
+        return merge_catalogs(ordered)
+
+
+def scrape_sources(names, max_pages=2, config_file=None, **scraper_options):
+    """抓取多个数据源并保存合并后的目录"""
+    sources = load_sources(names, config_file, **scraper_options)
+    scheduler = SourceScheduler(sources)
+    catalog = scheduler.run(max_pages)
+
+    # 各数据源共用同一个占位图列表文件, 合并后只写一次
+    placeholders = sources[0].scraper.placeholders
+    for source in sources[1:]:
+        placeholders.merge(source.scraper.placeholders)
+    placeholders.save()
+
+    logger.info(f'📊 合并后共 {len(catalog)} 个产品, 来自 {len(sources)} 个数据源')
+    if not catalog:
+        logger.error('❌ 没有获取到任何产品数据')
+        return None
+
+    # 跨零售商匹配同一款产品, 标注match_id并输出每簇最低价
+    comparison = match_products(catalog)
+    save_price_comparison(comparison, sources[0].scraper.web_dir)
+
+    if sources[0].scraper.dedupe_images:
+        sources[0].scraper.dedupe_product_images(catalog)
+    if sources[0].scraper.derivatives:
+        sources[0].scraper.build_image_derivatives(catalog)
+
+    saved_files = sources[0].scraper.save_data(catalog, sources=[source.name for source in sources])
+    return {
+        'products': catalog,
+        'files': {
+            'json': saved_files['json'] if saved_files else None,
+            'csv': saved_files['csv'] if saved_files else None
+        },
+        'timings': scheduler.timings,
+        'images_dir': sources[0].scraper.images_dir
+    }
@@ -0,0 +1,278 @@
+import glob
+import json
+import logging
+import os
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+
+from scraper import product_key, upgrade_product
+
+logger = logging.getLogger(__name__)
+
+# 价格直方图边界 (美元), 最后一档没有上限
+PRICE_EDGES = (0, 300, 500, 700, 1000)
+# 折扣分布边界 (百分比)
+DISCOUNT_EDGES = (0, 10, 20, 30, 40, 50)
+HISTORY_FILE = 'history.npz'
+NULL = -1
+
+
+def catalog_columns(products):
+    """把产品列表转成列数组: 价格/折扣为int64 (缺失记为-1), 品牌/类别为编码"""
+    for product in products:
+        upgrade_product(product)
+    price = np.array([p.get('price_cents') or NULL for p in products], dtype=np.int64)
+    discount = np.array([NULL if p.get('discount_bp') is None else p['discount_bp'] for p in products], dtype=np.int64)
+    brands, brand = np.unique([p.get('brand') or '未知品牌' for p in products], return_inverse=True)
+    categories, category = np.unique([p.get('category') or '其他' for p in products], return_inverse=True)
+    return {
+        'price_cents': price,
+        'discount_bp': discount,
+        'brand': brand.astype(np.int32),
+        'brands': brands,
+        'category': category.astype(np.int32),
+        'categories': categories
+    }
+
+
+def bucket_labels(edges, unit='$', suffix=''):
+    """直方图各档的标签, 例如 $300-$500, $1000+"""
+    labels = [f'{unit}{lo}{suffix}-{unit}{hi}{suffix}' for lo, hi in zip(edges[:-1], edges[1:])]
+    return labels + [f'{unit}{edges[-1]}{suffix}+']
+
+
+def histogram(values, edges, scale=1):
+    """按边界统计数量, 边界为左闭右开, 最后一档没有上限; 忽略缺失值"""
+    values = values[values != NULL]
+    bins = np.asarray(edges, dtype=np.int64) * scale
+    counts = np.bincount(np.searchsorted(bins, values, side='right'), minlength=len(bins) + 1)
+    # 第0档是低于最小边界的值 (例如负数), 并入第一档
+    counts[1] += counts[0]
+    return counts[1:].tolist()
+
+
+def group_counts(codes, labels, top=None):
+    """按编码计数, 返回 [(标签, 数量)] 按数量降序"""
+    counts = np.bincount(codes, minlength=len(labels))
+    order = np.argsort(-counts, kind='stable')[:top]
+    return [(str(labels[i]), int(counts[i])) for i in order if counts[i]]
+
+
+def group_price_stats(codes, labels, price_cents):
+    """每组价格的最低/中位/最高 (美元), 一次排序完成所有分组"""
+    valid = price_cents != NULL
+    codes, price = codes[valid], price_cents[valid]
+    if not len(price):
+        return []
+    # 组编码放高位、价格放低位, 一次整数排序即按 (组, 价格) 有序
+    order = np.argsort((codes.astype(np.int64) << 32) | price)
+    codes, price = codes[order], price[order]
+    groups, start, count = np.unique(codes, return_index=True, return_counts=True)
+    end = start + count - 1
+    median = (price[start + (count - 1) // 2] + price[start + count // 2]) / 2
+    return [{
+        'label': str(labels[g]),
+        'count': int(n),
+        'min': int(price[s]) / 100,
+        'median': round(float(m) / 100, 2),
+        'max': int(price[e]) / 100
+    } for g, n, s, e, m in zip(groups, count, start, end, median)]
+
+
+def load_history(data_dir='data', history_file=None):
+    """读取价格历史, 只解析上次之后新增的每日快照
+
+    历史以 (产品, 日期) 为行保存为列数组: day (距1970的天数), product, brand,
+    price_cents; 同一天多次抓取只保留最后一次。产品键、品牌和名称表随列一起
+    保存在 history.npz 中。
+    """
+    history_file = history_file or os.path.join(data_dir, HISTORY_FILE)
+    columns = {'day': [], 'product': [], 'brand': [], 'price_cents': []}
+    keys, names, brands, files = [], [], [], []
+    if os.path.exists(history_file):
+        with np.load(history_file, allow_pickle=False) as saved:
+            for name in columns:
+                columns[name].append(saved[name])
+            keys, names, brands, files = (saved[t].tolist() for t in ('keys', 'names', 'brands', 'files'))
+
+    snapshots = sorted(glob.glob(os.path.join(data_dir, 'snowboards_*_*.json')))
+    ingested = set(files)
+    pending = [path for path in snapshots if os.path.basename(path) not in ingested]
+    if not pending:
+        return _history(columns, keys, names, brands)
+
+    key_index = {key: i for i, key in enumerate(keys)}
+    brand_index = {brand: i for i, brand in enumerate(brands)}
+    for path in pending:
+        try:
+            products = _read_snapshot(path)
+        except (OSError, ValueError) as e:
+            logger.warning(f'⚠️ 跳过无法读取的快照 {path}: {e}')
+            continue
+        stamp = os.path.basename(path)[len('snowboards_'):len('snowboards_') + 8]
+        day = (datetime.strptime(stamp, '%Y%m%d') - datetime(1970, 1, 1)).days
+        rows = []
+        for product in products:
+            upgrade_product(product)
+            if not product.get('price_cents'):
+                continue
+            key = product.get('key') or product_key(product)
+            if key not in key_index:
+                key_index[key] = len(keys)
+                keys.append(key)
+                names.append('')
+            names[key_index[key]] = f"{product.get('brand', '')} {product.get('name', '')}".strip()
+            brand = product.get('brand') or '未知品牌'
+            if brand not in brand_index:
+                brand_index[brand] = len(brands)
+                brands.append(brand)
+            rows.append((key_index[key], brand_index[brand], product['price_cents']))
+        if rows:
+            product_ids, brand_ids, prices = np.array(rows, dtype=np.int64).T
+            columns['day'].append(np.full(len(rows), day, dtype=np.int32))
+            columns['product'].append(product_ids.astype(np.int32))
+            columns['brand'].append(brand_ids.astype(np.int32))
+            columns['price_cents'].append(prices.astype(np.int32))
+        files.append(os.path.basename(path))
+
+    history = _history(columns, keys, names, brands)
+    # 同一 (产品, 日期) 只保留最后写入的一行, 并按 (产品, 日期) 排序
+    order = np.lexsort((np.arange(len(history['day'])), history['day'], history['product']))
+    for name in columns:
+        history[name] = history[name][order]
+    last = np.ones(len(order), dtype=bool)
+    last[:-1] = (history['product'][1:] != history['product'][:-1]) | (history['day'][1:] != history['day'][:-1])
+    for name in columns:
+        history[name] = history[name][last]
+
+    tmp_file = f'{history_file}.tmp.npz'
+    np.savez_compressed(tmp_file, files=np.array(files, dtype=str), **{
+        name: history[name] for name in ('day', 'product', 'brand', 'price_cents', 'keys', 'names', 'brands')
+    })
+    os.replace(tmp_file, history_file)
+    logger.info(f'📈 价格历史: 新增 {len(pending)} 个快照, 共 {len(history["day"])} 行')
+    return history
+
+
+def _read_snapshot(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    return data.get('products', []) if isinstance(data, dict) else data
+
+
+def _history(columns, keys, names, brands):
+    dtypes = {'day': np.int32, 'product': np.int32, 'brand': np.int32, 'price_cents': np.int32}
+    history = {name: np.concatenate(parts) if parts else np.empty(0, dtype=dtypes[name])
+               for name, parts in columns.items()}
+    history['keys'] = np.array(keys, dtype=str)
+    history['names'] = np.array(names, dtype=str)
+    history['brands'] = np.array(brands, dtype=str)
+    return history
+
+
+def price_changes(history):
+    """每行相对该产品上一次记录的价格变化 (美分), 首次出现记为0
+
+    要求历史按 (产品, 日期) 排序 (load_history 的输出满足)。
+    """
+    product, price = history['product'], history['price_cents'].astype(np.int64)
+    change = np.zeros(len(price), dtype=np.int64)
+    if len(price) > 1:
+        same = product[1:] == product[:-1]
+        change[1:] = np.where(same, price[1:] - price[:-1], 0)
+    return change
+
+
+def daily_summary(history, days=30):
+    """最近若干天每天的降价/涨价产品数和平均价格"""
+    if not len(history['day']):
+        return []
+    change = price_changes(history)
+    # 日期是连续的小整数, 直接按偏移计数, 不需要排序
+    first = int(history['day'].min())
+    day_index = history['day'] - first
+    count = np.bincount(day_index)
+    drops = np.bincount(day_index, weights=change < 0, minlength=len(count))
+    rises = np.bincount(day_index, weights=change > 0, minlength=len(count))
+    total = np.bincount(day_index, weights=history['price_cents'], minlength=len(count))
+    seen = np.flatnonzero(count)[-days:]
+    days_seen, count, drops, rises, total = seen + first, count[seen], drops[seen], rises[seen], total[seen]
+    return [{
+        'date': str(np.datetime64(int(d), 'D')),
+        'products': int(c),
+        'drops': int(dr),
+        'rises': int(r),
+        'avg_price': round(float(t) / int(c) / 100, 2)
+    } for d, c, dr, r, t in zip(days_seen, count, drops, rises, total)]
+
+
+def movers(history, top=10):
+    """最新一天相对各产品上一次记录价格变化最大的产品 (降价和涨价各top个)"""
+    if not len(history['day']):
+        return {'date': None, 'drops': [], 'rises': []}
+    change = price_changes(history)
+    latest = history['day'].max()
+    rows = np.flatnonzero((history['day'] == latest) & (change != 0))
+    rows = rows[np.argsort(change[rows], kind='stable')]
+
+    def describe(row):
+        price = int(history['price_cents'][row])
+        previous = price - int(change[row])
+        return {
+            'key': str(history['keys'][history['product'][row]]),
+            'name': str(history['names'][history['product'][row]]),
+            'price': price / 100,
+            'previous': previous / 100,
+            'change_pct': round((price - previous) * 100 / previous, 1)
+        }
+
+    return {
+        'date': str(np.datetime64(int(latest), 'D')),
+        'drops': [describe(r) for r in rows[:top] if change[r] < 0],
+        'rises': [describe(r) for r in rows[::-1][:top] if change[r] > 0]
+    }
+
+
+def dashboard_stats(products, history=None, price_edges=PRICE_EDGES, discount_edges=DISCOUNT_EDGES, top=10):
+    """看板用的全部聚合结果 (可直接序列化为JSON嵌入页面)"""
+    columns = catalog_columns(products)
+    stats = {
+        'total_products': len(products),
+        'brand_count': len(columns['brands']),
+        'category_count': len(columns['categories']),
+        'top_brands': group_counts(columns['brand'], columns['brands'], top),
+        'categories': group_counts(columns['category'], columns['categories']),
+        'price_edges': list(price_edges),
+        'price_labels': bucket_labels(price_edges),
+        'price_histogram': histogram(columns['price_cents'], price_edges, scale=100),
+        'discount_labels': bucket_labels(discount_edges, unit='', suffix='%'),
+        'discount_histogram': histogram(columns['discount_bp'][columns['discount_bp'] > 0], discount_edges, scale=100),
+        'brand_prices': group_price_stats(columns['brand'], columns['brands'], columns['price_cents'])
+    }
+    if history is not None:
+        stats['daily'] = daily_summary(history)
+        stats['movers'] = movers(history, top)
+    return stats
+
+
+def main():
+    data_dir = sys.argv[1] if len(sys.argv) > 1 else 'data'
+    start = time.perf_counter()
+    history = load_history(data_dir)
+    loaded = time.perf_counter()
+    summary = daily_summary(history)
+    moved = movers(history)
+    done = time.perf_counter()
+    print(f"价格历史: {len(history['day'])} 行, {len(history['keys'])} 个产品, {len(summary)} 天")
+    print(f"读取 {loaded - start:.3f}s, 聚合 {done - loaded:.3f}s")
+    for item in moved['drops']:
+        print(f"  ↓ {item['name']}: ${item['previous']:.2f} -> ${item['price']:.2f} ({item['change_pct']}%)")
+    return 0
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    sys.exit(main())
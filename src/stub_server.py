@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+import argparse
+import hashlib
+import io
+import logging
+import random
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from scraper import find_replay_files, page_fingerprint
+
+logger = logging.getLogger(__name__)
+
+LISTING_PATH = '/products/2672/equipment-snowboards'
+PAGING_PATTERN = re.compile(r'(<span class="paging">.*?)\d+ / \d+(.*?</span>)', re.S)
+NEXT_LINK_PATTERN = re.compile(r'<a id="([^"]*lnkNext)" class="aspNetDisabled"')
+BAD_IMAGE_PAGE = b'<!DOCTYPE html><html><head><title>Image not found</title></head><body>' + b' ' * 2000 + b'</body></html>'
+PRODUCT_ID_PATTERN = re.compile(r'(href="[^"]*/product/[^"/]+/\d+)/')
+
+
+def synthetic_image(path, size=(400, 300)):
+    """按路径生成确定的JPEG (同一路径每次内容相同); 没有Pillow时返回带JPEG头的填充字节"""
+    digest = hashlib.sha1(path.encode('utf-8')).digest()
+    try:
+        from PIL import Image, ImageDraw
+    except ImportError:
+        return b'\xff\xd8\xff\xe0' + digest * 1000 + b'\xff\xd9'
+    image = Image.new('RGB', size, tuple(digest[:3]))
+    draw = ImageDraw.Draw(image)
+    for i in range(8):
+        x, y = digest[3 + i] * size[0] // 256, digest[11 + i] * size[1] // 256
+        draw.rectangle((x, y, x + size[0] // 4, y + size[1] // 4), fill=tuple(digest[i:i + 3]))
+    buffer = io.BytesIO()
+    image.save(buffer, 'JPEG', quality=85)
+    return buffer.getvalue()
+
+
+class StubRetailer:
+    """模拟零售商站点, 用存档的列表页代替 snowboards.com (CI没有外网)
+
+    pages        存档的列表页HTML列表, 第N页返回 pages[(N-1) % len(pages)];
+                 循环到第二轮起产品链接的ID加上轮次后缀, 每一页的产品链接都不相同
+    page_count   声明的总页数 (写入 "N / M" 分页文本, 超出后重复返回最后一页, 与真实站点一致)
+    latency      每个请求的固定延迟(秒), jitter 为额外的随机延迟上限
+    error_rate   随机返回503的比例
+    rate_limit   每秒允许的请求数, 超出返回429 (0为不限)
+    placeholder_rate  图片地址返回同一张占位图的比例 (按地址确定)
+    bad_image_rate    图片地址返回200状态的HTML错误页的比例 (按地址确定)
+    """
+
+    def __init__(self, pages, host='127.0.0.1', port=0, page_count=None, latency=0.0, jitter=0.0,
+                 error_rate=0.0, rate_limit=0, placeholder_rate=0.0, bad_image_rate=0.0, seed=0):
+        if not pages:
+            raise ValueError('至少需要一个列表页')
+        self.pages = pages
+        self.page_count = page_count or len(pages)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+        self.placeholder_rate = placeholder_rate
+        self.bad_image_rate = bad_image_rate
+        self.random = random.Random(seed)
+        self.images = {}
+        self.lock = threading.Lock()
+        self.stats = {'requests': 0, 'pages': 0, 'images': 0, 'errors': 0, 'throttled': 0, 'bytes': 0}
+        self._window = (0.0, 0)
+        self.server = ThreadingHTTPServer((host, port), self._handler())
+        self.server.daemon_threads = True
+        self.thread = None
+
+    @classmethod
+    def from_replay(cls, source='data', **options):
+        """从存档目录/通配符/文件加载列表页 (产品链接完全相同的存档页只保留一份)"""
+        pages, seen = [], set()
+        for path in find_replay_files(source):
+            with open(path, 'r', encoding='utf-8') as f:
+                html = f.read()
+            fingerprint = page_fingerprint(html)
+            if fingerprint in seen:
+                continue
+            seen.add(fingerprint)
+            pages.append(html)
+        return cls(pages, **options)
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        logger.info(f'🧪 模拟零售商已启动: {self.base_url} ({len(self.pages)} 个存档页面, 共 {self.page_count} 页)')
+        return self.base_url
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def listing_page(self, page_num):
+        """第N页内容, 分页文本和"下一页"链接与声明的总页数一致"""
+        current = min(page_num, self.page_count)
+        cycle, index = divmod(current - 1, len(self.pages))
+        html = self.pages[index]
+        if cycle:
+            html = PRODUCT_ID_PATTERN.sub(rf'\g<1>{cycle}/', html)
+        html = PAGING_PATTERN.sub(rf'\g<1>{current} / {self.page_count}\g<2>', html, count=1)
+        if current < self.page_count:
+            html = NEXT_LINK_PATTERN.sub(
+                rf'<a id="\1" href="{LISTING_PATH}?page={current + 1}&amp;view=all"', html)
+        return html.encode('utf-8')
+
+    def image(self, path):
+        """图片内容和类型; 按地址哈希确定是否返回占位图或HTML错误页"""
+        bucket = int(hashlib.sha1(path.encode('utf-8')).hexdigest()[:8], 16) / 0xFFFFFFFF
+        if bucket < self.bad_image_rate:
+            return BAD_IMAGE_PAGE, 'text/html; charset=utf-8'
+        if bucket < self.bad_image_rate + self.placeholder_rate:
+            path = '/placeholder.jpg'
+        return self.image_bytes(path), 'image/jpeg'
+
+    def image_bytes(self, path):
+        with self.lock:
+            data = self.images.get(path)
+        if data is None:
+            data = synthetic_image(path)
+            with self.lock:
+                self.images[path] = data
+        return data
+
+    def admit(self):
+        """限速和随机错误, 返回应答的状态码 (None为正常处理)"""
+        with self.lock:
+            self.stats['requests'] += 1
+            if self.rate_limit:
+                window, count = self._window
+                now = time.monotonic()
+                if now - window >= 1.0:
+                    window, count = now, 0
+                self._window = (window, count + 1)
+                if count + 1 > self.rate_limit:
+                    self.stats['throttled'] += 1
+                    return 429
+            if self.error_rate and self.random.random() < self.error_rate:
+                self.stats['errors'] += 1
+                return 503
+        return None
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                if stub.latency or stub.jitter:
+                    time.sleep(stub.latency + stub.random.uniform(0, stub.jitter))
+
+                status = stub.admit()
+                if status:
+                    self.send_body(status, b'', 'text/plain', {'Retry-After': '1'} if status == 429 else None)
+                    return
+
+                url = urlparse(self.path)
+                if url.path == LISTING_PATH:
+                    page = int(parse_qs(url.query).get('page', ['1'])[0])
+                    self.send_body(200, stub.listing_page(page), 'text/html; charset=utf-8')
+                    kind = 'pages'
+                elif url.path.lower().endswith(('.jpg', '.jpeg', '.png', '.gif', '.webp')):
+                    self.send_body(200, *stub.image(url.path))
+                    kind = 'images'
+                else:
+                    self.send_body(404, b'not found', 'text/plain')
+                    return
+                with stub.lock:
+                    stub.stats[kind] += 1
+
+            def send_body(self, status, body, content_type, headers=None):
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+                with stub.lock:
+                    stub.stats['bytes'] += len(body)
+
+            def log_message(self, format, *args):
+                logger.debug(format % args)
+
+        return Handler
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description='本地模拟零售商服务器')
+    parser.add_argument('--pages', default='data', help='存档列表页: 目录、通配符或文件 (默认 data/)')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--page-count', type=int, help='声明的总页数 (默认为存档页面数)')
+    parser.add_argument('--latency', type=float, default=0.0, help='每个请求的延迟(秒)')
+    parser.add_argument('--jitter', type=float, default=0.0, help='额外随机延迟上限(秒)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='随机返回503的比例')
+    parser.add_argument('--rate-limit', type=float, default=0, help='每秒允许的请求数, 超出返回429')
+    parser.add_argument('--placeholder-rate', type=float, default=0.0, help='图片返回占位图的比例')
+    parser.add_argument('--bad-image-rate', type=float, default=0.0, help='图片返回HTML错误页的比例')
+    return parser
+
+
+def main(argv=None):
+    options = build_parser().parse_args(argv)
+    stub = StubRetailer.from_replay(
+        options.pages,
+        host=options.host,
+        port=options.port,
+        page_count=options.page_count,
+        latency=options.latency,
+        jitter=options.jitter,
+        error_rate=options.error_rate,
+        rate_limit=options.rate_limit,
+        placeholder_rate=options.placeholder_rate,
+        bad_image_rate=options.bad_image_rate
+    )
+    stub.start()
+    print(f"模拟零售商: {stub.base_url}  (python src/scraper.py --base-url {stub.base_url})")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        stub.stop()
+    return 0
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    sys.exit(main())
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+import argparse
+import json
+import logging
+import os
+import random
+import re
+import sys
+from datetime import datetime, timedelta
+
+from scraper import SCHEMA_VERSION, product_key, upgrade_product
+
+logger = logging.getLogger(__name__)
+
+# 品牌按热度排序, 权重服从 1/rank^skew (skew越大越集中在头部品牌)
+BRANDS = ('Burton', 'Salomon', 'Lib Tech', 'Never Summer', 'Capita', 'Ride', 'Gnu', 'Arbor', 'K2',
+          'Jones', 'Rossignol', 'Nitro', 'Yes', 'Bataleon', 'Rome', 'Gilson', 'Korua', 'Flow',
+          'DC', 'Head', 'Public', 'Signal', 'Sims', 'Marhar')
+MODEL_WORDS = ('Custom', 'Process', 'Instigator', 'Orca', 'Skate', 'Banana', 'Mountain', 'Twin',
+               'Warpig', 'Mercury', 'Defenders', 'Assassin', 'Proto', 'Flagship', 'Hometown', 'Hero',
+               'Family', 'Tree', 'Ultra', 'Pro', 'Team', 'Spirit', 'Storm', 'Chaser', 'Frontier',
+               'Kazu', 'Kokoro', 'Frame', 'Terrain', 'Wrecker', 'Cosmic', 'Surfer', 'Sabbath', 'Element',
+               'Greats', 'Rocket', 'Fish', 'Backseat', 'Driver', 'Alpha')
+GENDERS = (("Men's", '男子雪板', 0.7), ("Women's", '女子雪板', 0.2), ('Unisex', '雪板', 0.1))
+KINDS = (('Snowboard', 0.6), ('Snowboard + Bindings Package', 0.3), ('Split Board', 0.1))
+
+
+def format_price(cents):
+    return f'${cents / 100:.2f}'
+
+
+def slugify(text):
+    return re.sub(r'[^a-z0-9]+', '-', text.lower()).strip('-')
+
+
+def brand_weights(brands=BRANDS, skew=1.2):
+    return [1 / (rank + 1) ** skew for rank in range(len(brands))]
+
+
+def synthetic_product(index, rng, brands=BRANDS, weights=None, scraped_at=None):
+    """生成一个与 extract_product 输出相同结构的产品"""
+    brand = rng.choices(brands, weights=weights)[0]
+    gender, category, _ = rng.choices(GENDERS, weights=[g[2] for g in GENDERS])[0]
+    kind = rng.choices(KINDS, weights=[k[1] for k in KINDS])[0][0]
+    model = f'{rng.choice(MODEL_WORDS)} {rng.choice(MODEL_WORDS)} {index}'
+    name = f'{gender} {brand} {model} {kind}'
+    if kind == 'Split Board':
+        category = '雪板'
+
+    # 原价服从对数正态分布 (中位数约$550), 价格以 .95/.99 结尾
+    original = int(min(max(rng.lognormvariate(6.3, 0.45), 150), 2500)) * 100 + rng.choice((95, 99))
+    scraped_at = scraped_at or datetime.now()
+    product = {
+        'id': f'prod_{int(scraped_at.timestamp())}_{index}',
+        'brand': brand,
+        'name': name,
+        'current_price': format_price(original),
+        'original_price': None,
+        'discount': None,
+        'image_url': f'https://snowboards.com/files/store/items/lg/{index % 10}/{index % 7}/synthetic{index}.jpg',
+        'local_image': None,
+        'product_url': f'https://snowboards.com/product/equipment-snowboards/{100000 + index}/{slugify(name)}',
+        'category': category,
+        'scraped_at': scraped_at.isoformat(),
+        'updated_at': scraped_at.strftime('%Y-%m-%d %H:%M:%S'),
+        'source': 'snowboards'
+    }
+    product['_list_cents'] = original
+    if rng.random() < 0.6:
+        apply_discount(product, rng.randint(5, 60))
+    return product
+
+
+def apply_discount(product, percent):
+    """按折扣重设显示价格 (percent为0时恢复原价), 数值字段随后由 upgrade_product 补齐"""
+    original = product['_list_cents']
+    if percent:
+        current = original * (100 - percent) // 100
+        product['current_price'] = format_price(current)
+        product['original_price'] = format_price(original)
+        product['discount'] = f'-{percent}%'
+    else:
+        product['current_price'] = format_price(original)
+        product['original_price'] = None
+        product['discount'] = None
+    for field in ('price_cents', 'original_price_cents', 'discount_bp'):
+        product.pop(field, None)
+
+
+def finalize(products, scraped_at):
+    """补齐数值字段和key, 去掉生成用的内部字段"""
+    result = []
+    for product in products:
+        item = {k: v for k, v in product.items() if not k.startswith('_')}
+        item['scraped_at'] = scraped_at.isoformat()
+        item['updated_at'] = scraped_at.strftime('%Y-%m-%d %H:%M:%S')
+        upgrade_product(item)
+        item['scraped_ts'] = int(scraped_at.timestamp())
+        item['key'] = product_key(item)
+        result.append(item)
+    return result
+
+
+def generate_catalog(count, skew=1.2, seed=0, scraped_at=None):
+    """生成count个产品的目录"""
+    rng = random.Random(seed)
+    weights = brand_weights(skew=skew)
+    scraped_at = scraped_at or datetime.now()
+    raw = [synthetic_product(i, rng, weights=weights, scraped_at=scraped_at) for i in range(count)]
+    return finalize(raw, scraped_at)
+
+
+def generate_history(count, days=30, skew=1.2, churn=0.05, turnover=0.01, seed=0, end=None):
+    """逐日生成目录快照, 产出 (日期, 产品列表)
+
+    churn     每天价格变化 (打折/改折扣/恢复原价) 的产品比例
+    turnover  每天下架并由新产品替换的比例
+    """
+    rng = random.Random(seed)
+    weights = brand_weights(skew=skew)
+    end = end or datetime.now().replace(hour=3, minute=0, second=0, microsecond=0)
+    start = end - timedelta(days=days - 1)
+    products = [synthetic_product(i, rng, weights=weights, scraped_at=start) for i in range(count)]
+    next_index = count
+
+    for day in range(days):
+        scraped_at = start + timedelta(days=day)
+        if day:
+            for i in rng.sample(range(len(products)), int(len(products) * churn)):
+                apply_discount(products[i], rng.choice((0, 0, rng.randint(5, 60))))
+            for i in rng.sample(range(len(products)), int(len(products) * turnover)):
+                products[i] = synthetic_product(next_index, rng, weights=weights, scraped_at=scraped_at)
+                next_index += 1
+        yield scraped_at, finalize(products, scraped_at)
+
+
+def write_snapshot(products, data_dir, scraped_at):
+    """按 save_data 的备份格式写出一天的快照 (紧凑JSON)"""
+    os.makedirs(data_dir, exist_ok=True)
+    path = os.path.join(data_dir, f"snowboards_{scraped_at.strftime('%Y%m%d_%H%M%S')}.json")
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(json.dumps({
+            'metadata': {
+                'schema_version': SCHEMA_VERSION,
+                'total_products': len(products),
+                'unique_brands': len(set(p['brand'] for p in products)),
+                'last_updated': scraped_at.strftime('%Y-%m-%d %H:%M:%S'),
+                'source': 'synthetic'
+            },
+            'products': products
+        }, ensure_ascii=False, separators=(',', ':')))
+    return path
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description='生成合成目录和价格历史')
+    parser.add_argument('--count', type=int, default=10000, help='产品数量')
+    parser.add_argument('--days', type=int, default=30, help='历史天数')
+    parser.add_argument('--skew', type=float, default=1.2, help='品牌分布偏斜度 (Zipf指数)')
+    parser.add_argument('--churn', type=float, default=0.05, help='每天价格变化的产品比例')
+    parser.add_argument('--turnover', type=float, default=0.01, help='每天替换的产品比例')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--data-dir', default='synthetic/data', help='快照输出目录')
+    return parser
+
+
+def main(argv=None):
+    options = build_parser().parse_args(argv)
+    for scraped_at, products in generate_history(options.count, options.days, options.skew,
+                                                 options.churn, options.turnover, options.seed):
+        path = write_snapshot(products, options.data_dir, scraped_at)
+    print(f"生成 {options.days} 天快照, 每天 {options.count} 个产品: {options.data_dir} (最新 {path})")
+    return 0
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    sys.exit(main())
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+import argparse
+import json
+import logging
+import os
+import re
+import sys
+from bisect import bisect_left
+from datetime import datetime
+
+from delta import read_json, write_json
+from scraper import product_key, upgrade_product
+
+logger = logging.getLogger(__name__)
+
+# 用户规则, 例如 {"user": "alice", "brand": "Burton", "max_price": 400}
+WATCHLIST_FILE = 'watchlists.json'
+# 上次运行时各产品的价格和已评估过的规则, 用来找出变化的产品和新增的规则
+STATE_FILE = 'watchlist_state.json'
+WATCH_DIR = 'watch'
+# 每个用户匹配文件保留的最近匹配数
+MAX_MATCHES = 100
+NO_LIMIT = float('inf')
+
+
+def scaled(raw, field, default):
+    """规则中的数值字段乘以100取整; 未填写时返回default, 不是数字时抛出ValueError"""
+    value = raw.get(field)
+    if value is None:
+        return default
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or value != value:
+        raise ValueError(f'{field} 不是数字: {value!r}')
+    return round(value * 100)
+
+
+def load_rules(path):
+    """读取并规范化规则: 品牌/类别/关键词小写, 价格转为美分, 折扣转为基点; 跳过没有用户或数值字段无效的规则"""
+    rules = []
+    for i, raw in enumerate(read_json(path, [])):
+        if not isinstance(raw, dict) or not raw.get('user'):
+            logger.warning(f'⚠️ 跳过无效的关注规则 #{i}: {raw}')
+            continue
+        try:
+            limits = {
+                'max_cents': scaled(raw, 'max_price', NO_LIMIT),
+                'min_cents': scaled(raw, 'min_price', 0),
+                'min_discount_bp': scaled(raw, 'min_discount', 0)
+            }
+        except ValueError as e:
+            logger.warning(f'⚠️ 跳过无效的关注规则 #{i}: {e}')
+            continue
+        rules.append({
+            'id': str(raw.get('id') or f"{raw['user']}-{i}"),
+            'user': str(raw['user']),
+            'brand': (raw.get('brand') or '').lower() or None,
+            'category': raw.get('category') or None,
+            'keyword': (raw.get('keyword') or '').lower() or None,
+            **limits
+        })
+    return rules
+
+
+class RuleIndex:
+    """按 (品牌, 类别) 分桶的规则索引, 桶内按价格上限升序
+
+    品牌/类别不限的规则放在对应的通配桶里; 一个产品最多查4个桶, 每个桶用二分
+    查找只取价格上限不低于产品价格的规则, 检查的规则数与真正相关的规则数成正比,
+    与规则总数无关。
+    """
+
+    def __init__(self, rules):
+        buckets = {}
+        for rule in rules:
+            buckets.setdefault((rule['brand'], rule['category']), []).append(rule)
+        self.buckets = {}
+        for key, bucket in buckets.items():
+            bucket.sort(key=lambda rule: rule['max_cents'])
+            self.buckets[key] = ([rule['max_cents'] for rule in bucket], bucket)
+        self.checked = 0
+
+    def candidates(self, product):
+        brand = (product.get('brand') or '').lower() or None
+        category = product.get('category') or None
+        price = product.get('price_cents')
+        for key in {(brand, category), (brand, None), (None, category), (None, None)}:
+            bucket = self.buckets.get(key)
+            if bucket:
+                ceilings, rules = bucket
+                yield from rules[bisect_left(ceilings, price):]
+
+    def match(self, product):
+        """产品满足的规则"""
+        if not product.get('price_cents'):
+            return []
+        matched = []
+        name = None
+        for rule in self.candidates(product):
+            self.checked += 1
+            if product['price_cents'] < rule['min_cents']:
+                continue
+            if rule['min_discount_bp'] and (product.get('discount_bp') or 0) < rule['min_discount_bp']:
+                continue
+            if rule['keyword']:
+                name = name if name is not None else (product.get('name') or '').lower()
+                if rule['keyword'] not in name:
+                    continue
+            matched.append(rule)
+        return matched
+
+
+def changed_products(products, previous_prices):
+    """本次新增或降价的产品, 返回 [(产品, 上次价格)]; 价格不变或上涨的不会触发提醒"""
+    changed = []
+    for product in products:
+        price = product.get('price_cents')
+        previous = previous_prices.get(product['key'])
+        if price and (previous is None or price < previous):
+            changed.append((product, previous))
+    return changed
+
+
+def user_filename(user):
+    return re.sub(r'[^\w.-]', '_', user) + '.json'
+
+
+def describe(product, rule, previous, matched_at):
+    return {
+        'rule': rule['id'],
+        'key': product['key'],
+        'brand': product.get('brand'),
+        'name': product.get('name'),
+        'category': product.get('category'),
+        'price': product['price_cents'] / 100,
+        'previous_price': previous / 100 if previous else None,
+        'discount': product.get('discount'),
+        'product_url': product.get('product_url'),
+        'matched_at': matched_at
+    }
+
+
+def write_matches(watch_dir, user, matches, updated):
+    """把新匹配合并到用户的匹配文件 (最新的在前, 同一规则/产品/价格只保留一条)"""
+    path = os.path.join(watch_dir, user_filename(user))
+    existing = read_json(path, {}).get('matches', [])
+    merged, seen = [], set()
+    for match in matches + existing:
+        identity = (match['rule'], match['key'], match['price'])
+        if identity not in seen:
+            seen.add(identity)
+            merged.append(match)
+    write_json(path, {'user': user, 'updated': updated, 'matches': merged[:MAX_MATCHES]})
+    return path
+
+
+def run_watchlists(products, data_dir='data', web_dir='web'):
+    """用本次变化的产品匹配关注规则, 为有新匹配的用户更新 web/watch/<用户>.json
+
+    已评估过的规则只检查新增或降价的产品; 新加入的规则对当前目录完整评估一次。
+    在副本上补齐key和数值字段, 不修改传入的产品。没有规则文件时直接返回None。
+    """
+    rules_file = os.path.join(data_dir, WATCHLIST_FILE)
+    if not os.path.exists(rules_file):
+        return None
+    rules = load_rules(rules_file)
+    state_file = os.path.join(data_dir, STATE_FILE)
+    state = read_json(state_file, {})
+    known_ids = set(state.get('rules', []))
+    products = [upgrade_product(dict(product)) for product in products]
+    for product in products:
+        product.setdefault('key', product_key(product))
+
+    known = RuleIndex([rule for rule in rules if rule['id'] in known_ids])
+    fresh = RuleIndex([rule for rule in rules if rule['id'] not in known_ids])
+    changed = changed_products(products, state.get('prices', {}))
+    matched_at = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+    by_user = {}
+    for product, previous in changed:
+        for rule in known.match(product):
+            by_user.setdefault(rule['user'], []).append(describe(product, rule, previous, matched_at))
+    if fresh.buckets:
+        for product in products:
+            for rule in fresh.match(product):
+                by_user.setdefault(rule['user'], []).append(describe(product, rule, None, matched_at))
+
+    watch_dir = os.path.join(web_dir, WATCH_DIR)
+    os.makedirs(watch_dir, exist_ok=True)
+    for user, matches in by_user.items():
+        write_matches(watch_dir, user, matches, matched_at)
+
+    write_json(state_file, {
+        'prices': {product['key']: product['price_cents'] for product in products if product.get('price_cents')},
+        'rules': sorted(rule['id'] for rule in rules)
+    })
+    report = {
+        'rules': len(rules),
+        'new_rules': len(rules) - len(known_ids & {rule['id'] for rule in rules}),
+        'changed': len(changed),
+        'checked': known.checked + fresh.checked,
+        'matches': sum(len(matches) for matches in by_user.values()),
+        'users': len(by_user)
+    }
+    logger.info(f"🔔 关注列表: {report['changed']} 个变化产品, 检查 {report['checked']} 条候选规则, "
+                f"{report['users']} 个用户共 {report['matches']} 条新匹配")
+    return report
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description='用最新数据中变化的产品匹配用户关注规则')
+    parser.add_argument('--data-dir', default='data', help=f'规则文件 {WATCHLIST_FILE} 和匹配状态所在目录')
+    parser.add_argument('--web-dir', default='web', help=f'读取 data.json, 匹配文件写入 {WATCH_DIR}/')
+    return parser
+
+
+def main(argv=None):
+    options = build_parser().parse_args(argv)
+    with open(os.path.join(options.web_dir, 'data.json'), 'r', encoding='utf-8') as f:
+        products = json.load(f).get('products', [])
+    report = run_watchlists(products, options.data_dir, options.web_dir)
+    if report is None:
+        print(f'没有规则文件: {os.path.join(options.data_dir, WATCHLIST_FILE)}')
+        return 1
+    print(json.dumps(report, ensure_ascii=False))
+    return 0
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    sys.exit(main())
@@ -0,0 +1,135 @@
+const SnowboardAPI = require('../../utils/api.js')
+
+const GRANULARITIES = [
+  { key: 'day', label: '日' },
+  { key: 'week', label: '周' },
+  { key: 'month', label: '月' }
+]
+
+Page({
+  data: {
+    product: null,
+    granularities: GRANULARITIES,
+    gran: 'day',
+    summary: null,
+    loading: true,
+    empty: false
+  },
+
+  onLoad(options) {
+    this.key = options.key
+    this.series = null
+    this.loadProduct()
+    this.loadSeries()
+  },
+
+  // 产品信息直接取列表页同步好的本地缓存, 不再请求
+  loadProduct() {
+    SnowboardAPI.getCachedData().then(data => {
+      const product = data.products.find(p => p.key === this.key)
+      if (product) {
+        const baseUrl = getApp().globalData.baseUrl
+        this.setData({
+          product: {
+            ...product,
+            image: product.thumbnail ? `${baseUrl}/web/images/${product.thumbnail}` :
+              product.local_image ? `${baseUrl}/web/images/${product.local_image}` : product.image_url
+          }
+        })
+      }
+    })
+  },
+
+  // 只下载这一个产品的聚合序列
+  loadSeries() {
+    SnowboardAPI.getSeries(this.key)
+      .then(series => {
+        this.series = series
+        this.setData({ loading: false })
+        this.renderChart()
+      })
+      .catch(() => {
+        this.setData({ loading: false, empty: true })
+      })
+  },
+
+  onGranChange(e) {
+    this.setData({ gran: e.currentTarget.dataset.gran })
+    this.renderChart()
+  },
+
+  // 每行为 [周期开始日期, 最低价, 最高价, 收盘价] (美分)
+  renderChart() {
+    const rows = (this.series && this.series[this.data.gran]) || []
+    if (!rows.length) {
+      this.setData({ summary: null })
+      return
+    }
+
+    const low = Math.min(...rows.map(r => r[1]))
+    const high = Math.max(...rows.map(r => r[2]))
+    this.setData({
+      summary: {
+        low: (low / 100).toFixed(2),
+        high: (high / 100).toFixed(2),
+        last: (rows[rows.length - 1][3] / 100).toFixed(2),
+        from: rows[0][0],
+        to: rows[rows.length - 1][0]
+      }
+    })
+
+    wx.createSelectorQuery()
+      .select('#trend-canvas')
+      .fields({ node: true, size: true })
+      .exec(res => {
+        if (!res[0] || !res[0].node) return
+        const { node: canvas, width, height } = res[0]
+        const dpr = wx.getSystemInfoSync().pixelRatio
+        canvas.width = width * dpr
+        canvas.height = height * dpr
+        const ctx = canvas.getContext('2d')
+        ctx.scale(dpr, dpr)
+        this.drawChart(ctx, width, height, rows, low, high)
+      })
+  },
+
+  drawChart(ctx, width, height, rows, low, high) {
+    const padding = 20
+    const range = high - low || 1
+    const x = i => padding + (rows.length > 1 ? i * (width - padding * 2) / (rows.length - 1) : (width - padding * 2) / 2)
+    const y = cents => height - padding - (cents - low) * (height - padding * 2) / range
+
+    ctx.clearRect(0, 0, width, height)
+
+    // 最低-最高区间
+    ctx.fillStyle = 'rgba(52, 152, 219, 0.15)'
+    ctx.beginPath()
+    rows.forEach((r, i) => ctx.lineTo(x(i), y(r[2])))
+    rows.slice().reverse().forEach((r, i) => ctx.lineTo(x(rows.length - 1 - i), y(r[1])))
+    ctx.closePath()
+    ctx.fill()
+
+    // 收盘价
+    ctx.strokeStyle = '#3498db'
+    ctx.lineWidth = 2
+    ctx.beginPath()
+    rows.forEach((r, i) => (i ? ctx.lineTo(x(i), y(r[3])) : ctx.moveTo(x(i), y(r[3]))))
+    ctx.stroke()
+  },
+
+  // 复制产品链接
+  copyProductLink() {
+    const product = this.data.product
+    if (product && product.product_url) {
+      wx.setClipboardData({
+        data: product.product_url,
+        success: () => {
+          wx.showToast({
+            title: '链接已复制',
+            icon: 'success'
+          })
+        }
+      })
+    }
+  }
+})
@@ -1,3 +1,5 @@
+const SnowboardAPI = require('../../utils/api.js')
+
 Page({
   data: {
     stats: {
@@ -30,31 +32,25 @@ Page({
     this.loadMore()
   },
 
-  // 加载数据
+  // 加载数据 (增量同步, 只下载上次缓存之后的变化)
   loadData(callback) {
-    const app = getApp()
-    
     this.setData({ loading: true })
     
-    wx.request({
-      url: `${app.globalData.baseUrl}/web/data.json`,
-      success: (res) => {
-        if (res.statusCode === 200) {
-          this.processData(res.data)
+    SnowboardAPI.getSnowboards()
+      .then(data => {
+        if (data.products.length) {
+          this.processData(data)
+        } else {
+          wx.showToast({
+            title: '数据加载失败',
+            icon: 'none'
+          })
         }
-      },
-      fail: (err) => {
-        console.error('数据加载失败:', err)
-        wx.showToast({
-          title: '数据加载失败',
-          icon: 'none'
-        })
-      },
-      complete: () => {
+      })
+      .finally(() => {
         this.setData({ loading: false })
         callback && callback()
-      }
-    })
+      })
   },
 
   // 处理数据
@@ -70,13 +66,20 @@ Page({
       },
       allProducts: products.map(p => ({
         id: p.id,
+        key: p.key,
         brand: p.brand,
         name: p.name,
         current_price: p.current_price,
+        // 数值字段 (旧数据没有时回退解析一次, 排序时不再处理字符串)
+        price_cents: p.price_cents != null ? p.price_cents :
+          Math.round(parseFloat(String(p.current_price || '0').replace(/[$,]/g, '')) * 100) || 0,
         original_price: p.original_price,
         discount: p.discount,
         category: p.category,
-        image: p.local_image ? 
+        // 优先使用缩略图, 卡片不需要加载原图
+        image: p.thumbnail ?
+          `${getApp().globalData.baseUrl}/web/images/${p.thumbnail}` :
+          p.local_image ? 
           `${getApp().globalData.baseUrl}/web/images/${p.local_image}` : 
           p.image_url,
         product_url: p.product_url
@@ -154,18 +157,10 @@ Page({
     
     switch(this.data.sortBy) {
       case 'price_low':
-        sorted.sort((a, b) => {
-          const priceA = parseFloat(a.current_price?.replace('$', '') || 0)
-          const priceB = parseFloat(b.current_price?.replace('$', '') || 0)
-          return priceA - priceB
-        })
+        sorted.sort((a, b) => a.price_cents - b.price_cents)
         break
       case 'price_high':
-        sorted.sort((a, b) => {
-          const priceA = parseFloat(a.current_price?.replace('$', '') || 0)
-          const priceB = parseFloat(b.current_price?.replace('$', '') || 0)
-          return priceB - priceA
-        })
+        sorted.sort((a, b) => b.price_cents - a.price_cents)
         break
       case 'brand':
         sorted.sort((a, b) => a.brand.localeCompare(b.brand))
@@ -177,20 +172,12 @@ Page({
     this.setData({ displayedProducts: sorted })
   },
 
-  // 查看产品详情
+  // 查看产品详情 (价格走势)
   viewProduct(e) {
     const product = e.currentTarget.dataset.product
-    if (product.product_url) {
-      wx.setClipboardData({
-        data: product.product_url,
-        success: () => {
-          wx.showToast({
-            title: '链接已复制',
-            icon: 'success'
-          })
-        }
-      })
-    }
+    wx.navigateTo({
+      url: `/pages/detail/detail?key=${product.key}`
+    })
   },
 
   // 复制价格信息
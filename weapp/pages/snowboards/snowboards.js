@@ -1,3 +1,5 @@
+const SnowboardAPI = require('../../utils/api.js')
+
 Page({
   data: {
     snowboards: [],
@@ -18,34 +20,34 @@ Page({
     })
   },
 
-  // 加载雪板数据
+  // 加载雪板数据 (增量同步, 只下载上次缓存之后的变化)
   loadSnowboardData(callback) {
     const app = getApp()
     
     this.setData({ loading: true })
     
-    wx.request({
-      url: `${app.globalData.baseUrl}/web/data.json`,
-      success: (res) => {
-        if (res.statusCode === 200) {
-          this.setData({
-            snowboards: res.data.products || [],
-            loading: false
+    SnowboardAPI.getSnowboards()
+      .then(data => {
+        const baseUrl = app.globalData.baseUrl
+        this.setData({
+          snowboards: data.products.map(p => ({
+            ...p,
+            // 优先使用缩略图, 卡片不需要加载原图
+            image: p.thumbnail ? `${baseUrl}/web/images/${p.thumbnail}` :
+              p.local_image ? `${baseUrl}/web/images/${p.local_image}` : p.image_url
+          }))
+        })
+        if (!data.products.length) {
+          wx.showToast({
+            title: '数据加载失败',
+            icon: 'none'
           })
         }
-      },
-      fail: (err) => {
-        console.error('数据加载失败:', err)
+      })
+      .finally(() => {
         this.setData({ loading: false })
-        wx.showToast({
-          title: '数据加载失败',
-          icon: 'none'
-        })
-      },
-      complete: () => {
         callback && callback()
-      }
-    })
+      })
   },
 
   // 搜索功能
@@ -68,7 +70,7 @@ Page({
   viewProductDetail(e) {
     const product = e.currentTarget.dataset.product
     wx.navigateTo({
-      url: `/pages/detail/detail?id=${product.id}`
+      url: `/pages/detail/detail?key=${product.key}`
     })
   },
 
@@ -1,27 +1,86 @@
 // weapp/utils/api.js
-const API_BASE = 'https://yourusername.github.io/snowboard-monitor/data'
+const CACHE_KEY = 'snowboards_feed'
+
+function feedBase() {
+  return `${getApp().globalData.baseUrl}/web/feed`
+}
+
+function request(url) {
+  return new Promise((resolve, reject) => {
+    wx.request({
+      url,
+      success: (res) => {
+        if (res.statusCode === 200) {
+          resolve(res.data)
+        } else {
+          reject(new Error(`HTTP ${res.statusCode}: ${url}`))
+        }
+      },
+      fail: reject
+    })
+  })
+}
 
 class SnowboardAPI {
-  // 获取雪板数据
+  // 获取雪板数据: 先读小的版本清单, 有缓存时只拉增量
   static async getSnowboards() {
+    const cached = await this.getCachedData()
     try {
-      const response = await fetch(`${API_BASE}/snowboards.json?t=${Date.now()}`)
-      const data = await response.json()
+      // 只有版本清单需要绕过缓存, 增量和快照文件内容不会变
+      const manifest = await request(`${feedBase()}/version.json?t=${Date.now()}`)
+      const data = await this.sync(cached, manifest)
+      this.cacheData(data)
       return data
     } catch (error) {
       console.error('API请求失败:', error)
       // 降级到本地缓存
-      return this.getCachedData()
+      return cached
+    }
+  }
+
+  // 把缓存同步到最新版本
+  static async sync(cached, manifest) {
+    if (cached.version === manifest.version) {
+      return { ...cached, metadata: manifest.metadata }
     }
+
+    if (!cached.version || cached.version < manifest.min_version || cached.version > manifest.version) {
+      const snapshot = await request(`${feedBase()}/${manifest.snapshot}`)
+      return {
+        version: snapshot.version,
+        metadata: snapshot.metadata,
+        products: snapshot.products
+      }
+    }
+
+    const products = {}
+    cached.products.forEach(p => { products[p.key] = p })
+    for (let version = cached.version + 1; version <= manifest.version; version++) {
+      const delta = await request(`${feedBase()}/delta_${version}.json`)
+      delta.added.forEach(p => { products[p.key] = p })
+      delta.changed.forEach(p => { products[p.key] = p })
+      delta.removed.forEach(key => { delete products[key] })
+    }
+
+    return {
+      version: manifest.version,
+      metadata: manifest.metadata,
+      products: Object.values(products)
+    }
+  }
+
+  // 价格走势序列 (每个产品一个小文件, 详情页打开时才下载)
+  static getSeries(key) {
+    return request(`${getApp().globalData.baseUrl}/web/series/${key}.json`)
   }
 
   // 本地缓存
   static getCachedData() {
     return new Promise((resolve) => {
       wx.getStorage({
-        key: 'snowboards_data',
+        key: CACHE_KEY,
         success: (res) => resolve(res.data),
-        fail: () => resolve({ products: [], last_updated: null })
+        fail: () => resolve({ version: 0, metadata: {}, products: [] })
       })
     })
   }
@@ -29,10 +88,10 @@ class SnowboardAPI {
   // 保存到缓存
   static cacheData(data) {
     wx.setStorage({
-      key: 'snowboards_data',
+      key: CACHE_KEY,
       data: data
     })
   }
 }
 
-module.exports = SnowboardAPI
\ No newline at end of file
+module.exports = SnowboardAPI